@@ -14,6 +14,8 @@ from pathlib import Path
 
 from src.agent import HouseAnalysisAgent
 from src.apify_client import ApifyClient
+from src.dataset import get_index
+from src.reanalysis import analysis_inputs
 from src.report_generator import ReportGenerator
 
 
@@ -78,7 +80,9 @@ def main():
         # Step 1: Fetch house data
         print("1️⃣  Fetching house data from Apify...")
         client = ApifyClient()
-        house_data = client.get_house_data(args.dataset_id, args.house_id)
+        # The synced local copy (if any) tells us where to look in the dataset
+        id_index = get_index(rebuild=False)
+        house_data = client.get_house_data(args.dataset_id, args.house_id, id_index=id_index)
 
         if not house_data:
             print(f"❌ House {args.house_id} not found in dataset {args.dataset_id}")
@@ -155,7 +159,8 @@ def main():
                 'analyzed_at': analysis['analyzed_at'],
                 'rules_version': analysis['rules_version'],
                 'overall_score': analysis['overall_score'],
-                'analysis_file': str(analysis_path.relative_to(house_dir))
+                'analysis_file': str(analysis_path.relative_to(house_dir)),
+                'inputs': analysis_inputs(house_data, rules_version=analysis['rules_version'])
             }, f, indent=2)
 
         # Step 5: Generate HTML report
@@ -1,12 +1,15 @@
 """Versioned rules system for house analysis."""
 
 from .base import BaseRules, CategoryCriteria
+from .prompt import AnalysisPrompt, PromptSection
 from .registry import RulesRegistry, get_rules
 from .v1_0_0 import RulesV1_0_0
 
 __all__ = [
+    "AnalysisPrompt",
     "BaseRules",
     "CategoryCriteria",
+    "PromptSection",
     "RulesRegistry",
     "get_rules",
     "RulesV1_0_0",
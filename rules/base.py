@@ -1,8 +1,13 @@
 """Base class for versioned analysis rules."""
 
+import hashlib
+import json
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import asdict, dataclass
+
+from .projection import format_house_data, projection_stats
+from .prompt import PROMPT_TOKEN_BUDGET
 
 
 @dataclass
@@ -17,6 +22,20 @@ class CategoryCriteria:
 class BaseRules(ABC):
     """Abstract base class for versioned analysis rules."""
 
+    # Listing fields embedded in the prompt (dotted paths, see
+    # rules.projection); None embeds the whole raw listing
+    house_fields: Optional[Tuple[str, ...]] = None
+
+    # How the listing is written into the prompt: 'json', 'compact' or 'text'
+    house_data_style: str = "json"
+
+    # Estimated-token budget for prompts built from sections (None: no limit)
+    prompt_token_budget: Optional[int] = PROMPT_TOKEN_BUDGET
+
+    # Red flag pack (rules/red_flags/<pack>.json) for the pre-screening;
+    # None: these rules don't screen on red flags
+    red_flag_pack: Optional[str] = None
+
     @property
     @abstractmethod
     def version(self) -> str:
@@ -35,6 +54,24 @@ class BaseRules(ABC):
         """System prompt for the LLM agent."""
         pass
 
+    @property
+    def prompt_hash(self) -> str:
+        """
+        Hash of the static prompt configuration.
+
+        Covers the system prompt, the categories and the listing projection
+        (house_fields, house_data_style), so an analysis can tell it was
+        made with another prompt even when the version string is the same.
+        """
+        config = [
+            self.system_prompt,
+            {name: asdict(criteria) for name, criteria in self.categories.items()},
+            list(self.house_fields) if self.house_fields is not None else None,
+            self.house_data_style,
+        ]
+        payload = json.dumps(config, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
     def get_category_weight(self, category: str) -> float:
         """Get the weight for a specific category."""
         return self.categories.get(category, CategoryCriteria("", 0.0, [], "")).weight
@@ -52,6 +89,133 @@ class BaseRules(ABC):
 
         return round(weighted_sum / total_weight, 2)
 
+    def format_house_data(self, house_data: Dict[str, Any]) -> str:
+        """
+        Format a listing for the prompt using house_fields and house_data_style.
+
+        Args:
+            house_data: Raw house data from Apify
+
+        Returns:
+            Listing text to embed in the prompt
+        """
+        return format_house_data(house_data, self.house_fields, self.house_data_style)
+
+    def house_data_stats(self, house_data: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Size of the listing in the prompt, raw versus as formatted by these rules.
+
+        Args:
+            house_data: Raw house data from Apify
+
+        Returns:
+            Dict with raw_chars, raw_tokens, projected_chars and projected_tokens
+        """
+        return projection_stats(house_data, self.house_fields, self.house_data_style)
+
+    def fast_rejection(self, house_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Build an analysis locally when the rules reject a house outright.
+
+        Rules versions without deterministic pre-screening never reject.
+
+        Args:
+            house_data: Raw house data from Apify
+
+        Returns:
+            Analysis data in the LLM response format (category_scores,
+            overall_assessment, ...), or None if the house needs a full analysis
+        """
+        return None
+
+    def get_screening_prompt(
+        self,
+        house_data: Dict[str, Any],
+        enrichment_data: Optional[Dict[str, Any]] = None,
+        market_metrics: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """
+        Build a compact prompt asking only for category scores.
+
+        Used by the agent's cascade mode on a small model; the response has
+        the same format as the full analysis, with only category_scores,
+        overall_assessment and investment_recommendation filled in. Rules
+        versions without a screening prompt return None.
+
+        Args:
+            house_data: Raw house data from Apify
+            enrichment_data: Optional AirROI enrichment data
+            market_metrics: Optional market-level metrics from AirROI
+
+        Returns:
+            Screening prompt, or None if not supported
+        """
+        return None
+
+    def get_category_prompts(
+        self,
+        house_data: Dict[str, Any],
+        enrichment_data: Optional[Dict[str, Any]] = None,
+        market_metrics: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        Build one prompt per category, for analyzing categories in parallel.
+
+        Each response holds {"category_scores": {<category>: {...}}}; a
+        synthesis call (get_synthesis_prompt) adds the overall fields.
+        Rules versions without a per-category mode return None.
+
+        Args:
+            house_data: Raw house data from Apify
+            enrichment_data: Optional AirROI enrichment data
+            market_metrics: Optional market-level metrics from AirROI
+
+        Returns:
+            Category name -> prompt, or None if not supported
+        """
+        return None
+
+    def get_synthesis_prompt(
+        self,
+        house_data: Dict[str, Any],
+        category_scores: Dict[str, Any]
+    ) -> Optional[str]:
+        """
+        Build the prompt for the overall fields from the category analyses.
+
+        Rules versions without a synthesis step return None; the overall
+        score then comes from the category scores alone and the overall
+        fields (overall_assessment, top_concerns, ...) stay empty.
+
+        Args:
+            house_data: Raw house data from Apify
+            category_scores: Category name -> parsed category analysis
+
+        Returns:
+            Prompt whose response holds overall_assessment, top_concerns, ...,
+            or None if not supported
+        """
+        return None
+
+    def merge_category_analyses(
+        self,
+        category_scores: Dict[str, Any],
+        synthesis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Combine per-category analyses and the synthesis into one analysis.
+
+        Args:
+            category_scores: Category name -> parsed category analysis
+            synthesis: Parsed synthesis response
+
+        Returns:
+            Analysis data in the single-prompt response format
+        """
+        merged = {"category_scores": {name: category_scores[name] for name in self.categories if name in category_scores}}
+        merged.update((key, value) for key, value in synthesis.items() if key != "category_scores")
+        return merged
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert rules to dictionary format."""
         return {
@@ -0,0 +1,175 @@
+"""Projection of raw Funda listings to the fields an analysis prompt needs."""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# Rough characters per token for Dutch listing text and JSON
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a text.
+
+    A character-count heuristic (CHARS_PER_TOKEN); good enough to compare
+    prompt variants without calling a tokenizer.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Estimated token count
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def flatten_kenmerken(sections: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """
+    Flatten KenmerkSections into section title -> label -> value.
+
+    Grouped kenmerken (LabelStyle 'Title' with a nested KenmerkenList) are
+    prefixed with their group label, e.g. 'Gebruiksoppervlakten / Wonen'.
+    Repeated labels within a section are joined with '; '.
+
+    Args:
+        sections: KenmerkSections of a Funda listing
+
+    Returns:
+        Section title -> {label: value}, in listing order
+    """
+    def collect(kenmerken: List[Dict[str, Any]], prefix: str, out: Dict[str, str]) -> None:
+        for kenmerk in kenmerken or []:
+            label = kenmerk.get('Label') or kenmerk.get('Id') or ''
+            label = f"{prefix} / {label}" if prefix else label
+            value = kenmerk.get('Value')
+            if value not in (None, ''):
+                out[label] = f"{out[label]}; {value}" if label in out else str(value)
+            if kenmerk.get('KenmerkenList'):
+                collect(kenmerk['KenmerkenList'], label, out)
+
+    flattened: Dict[str, Dict[str, str]] = {}
+    for section in sections or []:
+        values: Dict[str, str] = {}
+        collect(section.get('KenmerkenList', []), '', values)
+        if values:
+            title = section.get('Title') or section.get('Id') or 'Kenmerken'
+            flattened.setdefault(title, {}).update(values)
+    return flattened
+
+
+def project_house_data(house_data: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Keep only the given fields of a listing.
+
+    Args:
+        house_data: Raw Funda listing
+        fields: Dotted field paths ('Price.NumericSellingPrice'); the path
+            'KenmerkSections' is replaced by its flattened form
+
+    Returns:
+        Nested dict with the fields that are present and non-empty
+    """
+    from src.dataset import project_record
+
+    def prune(data: Dict[str, Any]) -> Dict[str, Any]:
+        pruned = {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                value = prune(value)
+            if value not in (None, '', [], {}):
+                pruned[key] = value
+        return pruned
+
+    projected = project_record(house_data, fields)
+    if 'KenmerkSections' in projected:
+        projected['KenmerkSections'] = flatten_kenmerken(projected['KenmerkSections'])
+    return prune(projected)
+
+
+def to_key_value_text(data: Dict[str, Any], indent: str = '') -> str:
+    """
+    Render a projected listing as indented 'key: value' lines.
+
+    Nested dicts become a header line followed by their indented keys;
+    lists of scalars are joined with ', '.
+
+    Args:
+        data: Projected listing (see project_house_data)
+        indent: Prefix for every line
+
+    Returns:
+        Text form of the listing
+    """
+    lines = []
+    for key, value in data.items():
+        if isinstance(value, dict):
+            lines.append(f"{indent}{key}:")
+            lines.append(to_key_value_text(value, indent + '  '))
+        elif isinstance(value, list):
+            items = [
+                item.get('Text', json.dumps(item, ensure_ascii=False)) if isinstance(item, dict) else str(item)
+                for item in value
+            ]
+            lines.append(f"{indent}{key}: {', '.join(items)}")
+        elif isinstance(value, str) and '\n' in value:
+            # Multi-line text (the description) as an indented block
+            block = '\n'.join(f"{indent}  {line}" if line else '' for line in value.strip().splitlines())
+            lines.append(f"{indent}{key}:\n{block}")
+        else:
+            lines.append(f"{indent}{key}: {value}")
+    return '\n'.join(lines)
+
+
+def format_house_data(
+    house_data: Dict[str, Any],
+    fields: Optional[Iterable[str]] = None,
+    style: str = 'json'
+) -> str:
+    """
+    Format a listing for embedding in a prompt.
+
+    Args:
+        house_data: Raw Funda listing
+        fields: Field paths to keep (None: the whole listing, unprojected)
+        style: 'json' (indented, as rules v1.x/v2.0.0 originally embedded
+            listings), 'compact' (single-line JSON) or 'text' (key: value)
+
+    Returns:
+        Listing text for the prompt
+    """
+    data = project_house_data(house_data, fields) if fields is not None else house_data
+
+    if style == 'json':
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    if style == 'compact':
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    if style == 'text':
+        return to_key_value_text(data)
+    raise ValueError(f"Unknown house data style: {style}")
+
+
+def projection_stats(
+    house_data: Dict[str, Any],
+    fields: Optional[Iterable[str]],
+    style: str
+) -> Dict[str, int]:
+    """
+    Compare the size of the raw and the projected listing in a prompt.
+
+    Args:
+        house_data: Raw Funda listing
+        fields: Field paths to keep (None: no projection)
+        style: Output style (see format_house_data)
+
+    Returns:
+        Dict with raw_chars, raw_tokens, projected_chars and projected_tokens
+    """
+    raw = format_house_data(house_data)
+    projected = format_house_data(house_data, fields, style)
+    return {
+        'raw_chars': len(raw),
+        'raw_tokens': estimate_tokens(raw),
+        'projected_chars': len(projected),
+        'projected_tokens': estimate_tokens(projected),
+    }
@@ -0,0 +1,143 @@
+"""Analysis prompts assembled from named sections with a token budget."""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .projection import estimate_tokens
+
+
+# Default prompt budget in estimated tokens (unset: no trimming)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "0")) or None
+
+
+@dataclass
+class PromptSection:
+    """
+    Named part of an analysis prompt.
+
+    Attributes:
+        name: Section name used in the size breakdown
+        text: Section text (including its trailing newlines)
+        static: Identical for every house; static sections form the
+            cacheable prefix and must come before the dynamic ones
+        priority: Trim order when over budget (lowest first); None means
+            the section is never trimmed
+        shorter: Progressively shorter (label, text) variants to fall back
+            to when trimming; an empty text drops the section
+    """
+    name: str
+    text: str
+    static: bool = False
+    priority: Optional[int] = None
+    shorter: Sequence[Tuple[str, str]] = ()
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+def fit_to_budget(sections: List[PromptSection], budget: Optional[int]) -> Tuple[List[PromptSection], List[str]]:
+    """
+    Trim optional sections until the prompt fits an estimated-token budget.
+
+    Sections are trimmed in ascending priority; each one steps through its
+    shorter variants before the next section is touched. Required sections
+    are never trimmed, so the result can still exceed the budget.
+
+    Args:
+        sections: Prompt sections in prompt order
+        budget: Maximum estimated tokens (None: no limit)
+
+    Returns:
+        Sections to use (same order) and a description of each trim step
+    """
+    sections = list(sections)
+    trimmed: List[str] = []
+    if budget is None:
+        return sections, trimmed
+
+    def total() -> int:
+        return sum(section.tokens for section in sections)
+
+    candidates = sorted(
+        (i for i, section in enumerate(sections) if section.priority is not None),
+        key=lambda i: sections[i].priority
+    )
+    for i in candidates:
+        for label, text in sections[i].shorter:
+            if total() <= budget:
+                break
+            section = sections[i]
+            sections[i] = PromptSection(section.name, text, section.static, section.priority)
+            trimmed.append(f"{section.name}: {label}")
+
+    return [section for section in sections if section.text], trimmed
+
+
+class AnalysisPrompt(str):
+    """
+    Analysis prompt split into a static prefix and a per-house part.
+
+    Behaves as the full prompt text (static + dynamic), so it can be used
+    anywhere a plain prompt string is expected. LLM clients that support
+    prompt caching can send ``static`` as a separately cached block.
+    ``sections`` keeps the named parts for the size breakdown;
+    ``red_flags`` the red flag evidence the prompt was built with, which
+    the agent stores in the analysis.
+    """
+
+    static: str
+    dynamic: str
+    sections: List[PromptSection]
+    budget: Optional[int]
+    trimmed: List[str]
+    red_flags: Optional[Dict[str, Any]]
+
+    def __new__(
+        cls,
+        sections: List[PromptSection],
+        budget: Optional[int] = None,
+        red_flags: Optional[Dict[str, Any]] = None
+    ) -> "AnalysisPrompt":
+        """
+        Assemble a prompt, trimming optional sections to fit the budget.
+
+        Args:
+            sections: Prompt sections, static ones first
+            budget: Maximum estimated tokens (None: no limit)
+            red_flags: Red flag evidence (recommendation, total weight and
+                the found flags with their snippets)
+        """
+        sections, trimmed = fit_to_budget(sections, budget)
+        static = "".join(section.text for section in sections if section.static)
+        dynamic = "".join(section.text for section in sections if not section.static)
+
+        prompt = super().__new__(cls, f"{static}\n{dynamic}")
+        prompt.static = static
+        prompt.dynamic = dynamic
+        prompt.sections = sections
+        prompt.budget = budget
+        prompt.trimmed = trimmed
+        prompt.red_flags = red_flags
+        return prompt
+
+    def breakdown(self) -> Dict[str, Any]:
+        """
+        Size of the prompt per section, for the analysis metadata.
+
+        Returns:
+            Dict with per-section chars/tokens, totals, the budget and the
+            trim steps applied
+        """
+        return {
+            "sections": {
+                section.name: {"chars": len(section.text), "tokens": section.tokens}
+                for section in self.sections
+            },
+            "total_chars": len(self),
+            "total_tokens": estimate_tokens(self),
+            "static_tokens": estimate_tokens(self.static),
+            "budget_tokens": self.budget,
+            "trimmed": self.trimmed,
+        }
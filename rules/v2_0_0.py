@@ -11,15 +11,60 @@ Key Features:
 - Focus op zelfverhuur en schaalbare investeringen
 """
 
-from typing import Dict
+from typing import Dict, List, Optional
 import json
 from pathlib import Path
 from .base import BaseRules, CategoryCriteria
+from .projection import format_house_data
+from .prompt import AnalysisPrompt, PromptSection
 
 
 class RulesV2_0_0(BaseRules):
     """BNB/Vakantieverhuur Expert Analyseregels met Red Flag Detectie."""
 
+    # Alleen velden die de categorieën gebruiken; foto's, URLs, sitemap en
+    # kadasterkaart blijven buiten de prompt
+    house_fields = (
+        "Identifiers.TinyId",
+        "ObjectType",
+        "ConstructionType",
+        "OfferingType",
+        "IsSoldOrRented",
+        "PublicationDate",
+        "Price.SellingPrice",
+        "Price.NumericSellingPrice",
+        "Price.IsAuction",
+        "AddressDetails.Title",
+        "AddressDetails.City",
+        "AddressDetails.Province",
+        "AddressDetails.PostCode",
+        "AddressDetails.NeighborhoodName",
+        "Coordinates",
+        "FastView",
+        "ParentProject.Title",
+        "ParentProject.Type",
+        "Labels",
+        "ObjectInsights",
+        "ListingDescription.Description",
+        "KenmerkSections",
+    )
+    house_data_style = "text"
+
+    # Patterns van de red flag pre-screening
+    red_flag_pack = "v2.0.0"
+
+    # Categorieën die in de per-categorie modus AirROI data en markt metrics krijgen
+    market_categories = ("location", "financial")
+
+    # Pandsamenvatting voor de synthese prompt
+    synthesis_fields = (
+        "AddressDetails.Title",
+        "AddressDetails.City",
+        "Price.SellingPrice",
+        "ObjectType",
+        "ParentProject.Title",
+    )
+
     @property
     def version(self) -> str:
         return "v2.0.0"
@@ -370,122 +415,91 @@ Aanbevelingen: [Juridisch advies indien onduidelijk]"""
             ),
         }
 
-    def get_analysis_prompt(
-        self,
-        house_data: dict,
-        enrichment_data: dict = None,
-        market_metrics: dict = None
-    ) -> str:
+    def scan_red_flags(self, house_data: dict) -> dict:
         """
-        Genereer complete analyse prompt met RED FLAG PRE-SCREENING.
+        Red flag pre-screening van een pand.
 
-        Integreert red flag detectie VOOR deep analysis.
+        Gebruikt de gedeelde detector van red_flag_pack, zodat het pack
+        per proces maar één keer geladen wordt.
 
         Args:
             house_data: Raw house data from Apify
-            enrichment_data: Optional AirROI enrichment (comparables, revenue estimate)
-            market_metrics: Optional market-level metrics from AirROI
-        """
-        from src.red_flags import RedFlagDetector
-
-        # PRE-SCREENING: Red Flag Detection
-        detector = RedFlagDetector()
-        red_flag_results = detector.scan(house_data)
-
-        prompt_parts = [self.system_prompt, "\n\n"]
-
-        # Add red flag pre-screening results
-        prompt_parts.append("## 🚨 RED FLAG PRE-SCREENING RESULTATEN\n\n")
-        prompt_parts.append(f"**Aanbeveling:** {red_flag_results['recommendation']}\n")
-        prompt_parts.append(f"**Betrouwbaarheid:** {red_flag_results['confidence']}\n")
-        prompt_parts.append(f"**Totaal gewicht:** {red_flag_results['total_weight']}\n\n")
 
-        if red_flag_results['dealbreakers']:
-            prompt_parts.append(f"**⛔ DEALBREAKERS GEVONDEN ({len(red_flag_results['dealbreakers'])}):**\n")
-            for flag in red_flag_results['dealbreakers']:
-                prompt_parts.append(f"- [{flag['weight']}] {flag['reason']}\n")
-                prompt_parts.append(f"  Pattern: '{flag['pattern']}'\n")
-            prompt_parts.append("\n")
+        Returns:
+            Resultaat van RedFlagDetector.scan
+        """
+        from src.red_flags import get_detector
 
-        if red_flag_results['warnings']:
-            prompt_parts.append(f"**⚠️  WARNINGS GEVONDEN ({len(red_flag_results['warnings'])}):**\n")
-            for flag in red_flag_results['warnings']:
-                prompt_parts.append(f"- [{flag['weight']}] {flag['reason']}\n")
-                prompt_parts.append(f"  Pattern: '{flag['pattern']}'\n")
-            prompt_parts.append("\n")
+        return get_detector(self.red_flag_pack).scan(house_data)
 
-        # If dealbreakers found, instruct immediate rejection
-        if red_flag_results['recommendation'] == 'AFWIJZEN':
-            prompt_parts.append("""
-⛔ **BELANGRIJK:** Er zijn dealbreakers gevonden.
-Dit pand moet worden AFGEWEZEN zonder verdere analyse.
+    def fast_rejection(self, house_data: dict) -> Optional[dict]:
+        """
+        Bouw een afwijzing zonder LLM als de red flag pre-screening AFWIJZEN geeft.
 
-Geef een beknopte analyse die uitlegt WAAROM dit pand afgekeurd wordt,
-met focus op de gevonden dealbreakers. Gebruik lage scores (0-3) voor alle categorieën.
+        De dealbreakers komen in de juridische categorie (verhuurvrijheid),
+        de overige categorieën krijgen een lage vaste score omdat ze niet
+        verder beoordeeld zijn.
 
-Investement recommendation moet AFWIJZEN zijn met duidelijke onderbouwing.
-""")
+        Args:
+            house_data: Raw house data from Apify
 
-        # Add house data
-        prompt_parts.append("## 📋 PAND DATA\n\n")
-        prompt_parts.append(f"```json\n{json.dumps(house_data, indent=2, ensure_ascii=False)}\n```\n\n")
+        Returns:
+            Analyse in het LLM uitvoerformaat, of None als een volledige
+            analyse nodig is
+        """
+        red_flag_results = self.scan_red_flags(house_data)
+        if red_flag_results['recommendation'] != 'AFWIJZEN':
+            return None
+
+        dealbreakers = sorted(red_flag_results['dealbreakers'], key=lambda f: -f['weight'])
+        warnings = sorted(red_flag_results['warnings'], key=lambda f: -f['weight'])
+        reasons = [flag['reason'] for flag in dealbreakers] or [flag['reason'] for flag in warnings]
+
+        not_assessed = "Niet beoordeeld: pand afgewezen op dealbreakers uit de red flag pre-screening (zie Juridisch & Verhuurvrijheid)."
+        category_scores = {
+            name: {"score": 2.0, "reasoning": not_assessed, "red_flags": [], "recommendations": []}
+            for name in self.categories
+        }
+        category_scores["legal"] = {
+            "score": 0.0,
+            "reasoning": (
+                f"Red flag pre-screening vond {len(dealbreakers)} dealbreaker(s) en "
+                f"{len(warnings)} waarschuwing(en) (totaal gewicht {red_flag_results['total_weight']}). "
+                "Zelfverhuur met voldoende rendement is hierdoor niet mogelijk."
+            ),
+            "red_flags": reasons,
+            "recommendations": ["Controleer de gevonden dealbreakers in de brochure voordat het pand definitief wordt afgeschreven"],
+            "rental_freedom": "Onvoldoende: " + "; ".join(reasons),
+        }
 
-        # Add AirROI enrichment data if available
-        if enrichment_data and enrichment_data.get('enriched'):
-            prompt_parts.append("## 🌍 AIRROI MARKTDATA (AIRBNB/SHORT-TERM RENTAL)\n\n")
-            prompt_parts.append("**Belangrijk:** Deze data komt van echte Airbnb listings in de buurt en kan gebruikt worden voor concretere revenue schattingen en marktanalyse.\n\n")
+        return {
+            "category_scores": category_scores,
+            "overall_assessment": (
+                "Automatisch afgewezen op basis van de red flag pre-screening, zonder LLM analyse. "
+                + " ".join(f"{reason}." for reason in reasons)
+            ),
+            "top_strengths": [],
+            "top_concerns": reasons + [flag['reason'] for flag in warnings if flag['reason'] not in reasons],
+            "investment_recommendation": f"AFWIJZEN - {reasons[0]}",
+            "red_flags": self.red_flag_evidence(red_flag_results),
+        }
 
-            # Add comparable listings summary
-            comparables = enrichment_data.get('comparables', [])
-            if comparables:
-                prompt_parts.append(f"### Vergelijkbare Airbnb listings in de buurt ({len(comparables)} listings)\n\n")
-                prompt_parts.append("Top vergelijkbare properties:\n\n")
-                for i, comp in enumerate(comparables[:5], 1):
-                    prompt_parts.append(f"**Listing {i}:**\n")
-                    prompt_parts.append(f"- Bedrooms: {comp.get('bedrooms', 'N/A')}\n")
-                    prompt_parts.append(f"- Bathrooms: {comp.get('bathrooms', 'N/A')}\n")
-
-                    # Metrics (TTM = Trailing Twelve Months)
-                    metrics = comp.get('metrics', {}).get('ttm', {})
-                    if metrics:
-                        prompt_parts.append(f"- Annual Revenue (TTM): {metrics.get('revenue', 'N/A')}\n")
-                        prompt_parts.append(f"- Occupancy Rate (TTM): {metrics.get('occupancy', 'N/A')}%\n")
-                        prompt_parts.append(f"- Average Daily Rate (TTM): {metrics.get('adr', 'N/A')}\n")
-                        prompt_parts.append(f"- Days Booked (TTM): {metrics.get('days_booked', 'N/A')}\n")
-                    prompt_parts.append("\n")
-
-            # Add revenue estimate
-            revenue_estimate = enrichment_data.get('revenue_estimate', {})
-            if revenue_estimate:
-                prompt_parts.append("### Revenue Schatting voor dit pand\n\n")
-                prompt_parts.append("**Gebaseerd op vergelijkbare listings in de buurt:**\n\n")
-                estimate_data = revenue_estimate.get('estimate', {})
-                if estimate_data:
-                    prompt_parts.append(f"```json\n{json.dumps(estimate_data, indent=2, ensure_ascii=False)}\n```\n\n")
-
-            prompt_parts.append("**Gebruik deze data actief in je financial analysis!** De revenue estimate en comparable listings geven concrete marktdata voor realistische projecties.\n\n")
+    def static_sections(self) -> List[PromptSection]:
+        """
+        De delen van de prompt die voor elk pand gelijk zijn.
 
-        # Add market-level metrics if available
-        if market_metrics:
-            prompt_parts.append("## 📊 MARKT METRICS (STAD-NIVEAU)\n\n")
-            city = house_data.get('AddressDetails', {}).get('City', 'Unknown')
-            province = market_metrics.get('province', 'Unknown')
-            prompt_parts.append(f"**Markt:** {city}, {province}\n\n")
-
-            metrics = market_metrics.get('metrics', {})
-            if metrics:
-                prompt_parts.append("**Market Performance (Trailing 12 Months):**\n\n")
-                prompt_parts.append(f"```json\n{json.dumps(metrics, indent=2, ensure_ascii=False)}\n```\n\n")
-                prompt_parts.append("**Gebruik deze data voor context:** Vergelijk de property's potentieel met het marktgemiddelde.\n\n")
-
-        # Add category-specific analysis requests
-        prompt_parts.append("## 🔍 VEREISTE ANALYSE PER CATEGORIE\n\n")
+        System prompt, analyse per categorie en uitvoerformaat. Staan vóór
+        de pand data zodat de LLM provider ze als prefix kan cachen.
+        """
+        category_parts = ["## 🔍 VEREISTE ANALYSE PER CATEGORIE\n\n"]
         for cat_name, criteria in self.categories.items():
-            prompt_parts.append(f"### {criteria.name} (Weging: {int(criteria.weight * 100)}%)\n\n")
-            prompt_parts.append(f"{criteria.prompt_template}\n\n")
+            category_parts.append(f"### {criteria.name} (Weging: {int(criteria.weight * 100)}%)\n\n")
+            category_parts.append(f"{criteria.prompt_template}\n\n")
 
-        # Add output format
-        prompt_parts.append("""
+        return [
+            PromptSection("system", self.system_prompt + "\n\n", static=True),
+            PromptSection("categories", "".join(category_parts), static=True),
+            PromptSection("output_format", """
 ## 📤 UITVOERFORMAAT
 
 Reageer met een geldig JSON-object in deze EXACTE structuur:
@@ -556,7 +570,7 @@ Reageer met een geldig JSON-object in deze EXACTE structuur:
 1. **Scores:** Altijd tussen 0-10. Score van 10 is UITZONDERLIJK zeldzaam.
 2. **Cijfers:** Gebruik concrete bedragen, percentages, afstanden (niet vaag blijven!)
 3. **Marktdata:** Refereer naar Airbnb/Booking.com data waar mogelijk
-4. **Red flags:** Neem ALLE gevonden red flags uit pre-screening over in relevante categorieën
+4. **Red flags:** Neem ALLE gevonden red flags uit pre-screening over in relevante categorieën; laat een flag alleen vallen als het bewijs hem tegenspreekt (bv. "géén erfpacht")
 5. **Rekenwerk:** Bij financial category ALLE berekeningen uitschrijven
 6. **Dealbreakers:** Als AFWIJZEN → scores 0-3, heldere uitleg waarom
 7. **Actieplan:** Concrete, uitvoerbare stappen (geen abstract advies)
@@ -568,6 +582,414 @@ Reageer met een geldig JSON-object in deze EXACTE structuur:
 
 **LET OP:** Als red flag pre-screening "AFWIJZEN" aanbeveelt, moet je investment_recommendation
 ook "AFWIJZEN" zijn met duidelijke focus op de dealbreakers.
+""", static=True),
+        ]
+
+    def static_prompt(self) -> str:
+        """Het deel van de prompt dat voor elk pand gelijk is (zie static_sections)."""
+        return "".join(section.text for section in self.static_sections())
+
+    def get_analysis_prompt(
+        self,
+        house_data: dict,
+        enrichment_data: dict = None,
+        market_metrics: dict = None
+    ) -> AnalysisPrompt:
+        """
+        Genereer complete analyse prompt met RED FLAG PRE-SCREENING.
+
+        Integreert red flag detectie VOOR deep analysis. De prompt bestaat uit
+        benoemde secties: eerst de statische (static_sections, voor elk pand
+        gelijk en dus cachebaar), dan de pand-specifieke. Boven het
+        prompt_token_budget worden eerst de AirROI comparables ingekort en
+        daarna de markt metrics weggelaten.
+
+        Args:
+            house_data: Raw house data from Apify
+            enrichment_data: Optional AirROI enrichment (comparables, revenue estimate)
+            market_metrics: Optional market-level metrics from AirROI
+        """
+        # PRE-SCREENING: Red Flag Detection
+        red_flag_results = self.scan_red_flags(house_data)
+
+        sections = self.static_sections()
+        sections.extend(self._house_sections(house_data, red_flag_results, enrichment_data, market_metrics))
+        sections.append(PromptSection(
+            "instructions",
+            "## ▶️ OPDRACHT\n\n"
+            "Analyseer het pand hierboven volgens de categorieën, het uitvoerformaat "
+            "en de kwaliteitseisen uit het eerste deel van deze prompt.\n"
+        ))
+
+        return AnalysisPrompt(
+            sections, budget=self.prompt_token_budget, red_flags=self.red_flag_evidence(red_flag_results)
+        )
+
+    def get_screening_prompt(
+        self,
+        house_data: dict,
+        enrichment_data: dict = None,
+        market_metrics: dict = None
+    ) -> AnalysisPrompt:
+        """
+        Genereer een compacte screening prompt die alleen scores vraagt.
+
+        Alleen de criteria per categorie (niet de volledige instructies),
+        de red flags, de pand data en de AirROI revenue schatting zonder
+        comparables. Markt metrics blijven weg.
+
+        Args:
+            house_data: Raw house data from Apify
+            enrichment_data: Optional AirROI enrichment (comparables, revenue estimate)
+            market_metrics: Niet gebruikt bij de screening
+
+        Returns:
+            Screening prompt
+        """
+        red_flag_results = self.scan_red_flags(house_data)
+
+        category_parts = ["## 🔍 CATEGORIEËN\n\n"]
+        for criteria in self.categories.values():
+            category_parts.append(f"### {criteria.name} (Weging: {int(criteria.weight * 100)}%)\n")
+            category_parts.extend(f"- {criterion}\n" for criterion in criteria.criteria)
+            category_parts.append("\n")
+
+        output = {
+            "category_scores": {
+                name: {"score": 6.0, "reasoning": "Eén zin met de doorslaggevende factor"}
+                for name in self.categories
+            },
+            "overall_assessment": "Eén of twee zinnen",
+            "investment_recommendation": "KOPEN|OVERWEGEN|AFWIJZEN - korte reden",
+        }
+
+        sections = [
+            PromptSection(
+                "system",
+                "Je bent een expert BNB/Vakantieverhuur analyst. Doel: maximaal rendement door "
+                "ZELF te verhuren. Dit is een snelle SCREENING: geef per categorie een score, "
+                "zodat alleen kansrijke panden een volledige analyse krijgen. Wees kritisch; "
+                "gebruik dezelfde schaal als een volledige analyse.\n\n",
+                static=True
+            ),
+            PromptSection("categories", "".join(category_parts), static=True),
+            PromptSection(
+                "output_format",
+                "## 📤 UITVOERFORMAAT\n\n"
+                "Reageer met alleen een geldig JSON-object in deze structuur:\n\n"
+                f"```json\n{json.dumps(output, indent=2, ensure_ascii=False)}\n```\n\n"
+                "Scores 0-10 (10 is uitzonderlijk zeldzaam). Als de pre-screening AFWIJZEN "
+                "aanbeveelt: scores 0-3 en AFWIJZEN. Alles in het Nederlands.\n\n",
+                static=True
+            ),
+            PromptSection("red_flags", self._red_flag_section(red_flag_results)),
+            PromptSection(
+                "house_data",
+                f"## 📋 PAND DATA\n\n```\n{self.format_house_data(house_data)}\n```\n\n"
+            ),
+        ]
+        if enrichment_data and enrichment_data.get('enriched'):
+            sections.append(PromptSection("airroi", self._airroi_section(enrichment_data, 0)))
+        sections.append(PromptSection(
+            "instructions",
+            "## ▶️ OPDRACHT\n\nScreen het pand hierboven volgens het uitvoerformaat.\n"
+        ))
+
+        return AnalysisPrompt(
+            sections, budget=self.prompt_token_budget, red_flags=self.red_flag_evidence(red_flag_results)
+        )
+
+    def get_category_prompts(
+        self,
+        house_data: dict,
+        enrichment_data: dict = None,
+        market_metrics: dict = None
+    ) -> Dict[str, AnalysisPrompt]:
+        """
+        Genereer één kleinere prompt per categorie voor parallelle analyse.
+
+        Elke prompt bevat alleen de criteria en het uitvoerformaat van zijn
+        eigen categorie; AirROI data en markt metrics gaan alleen mee naar
+        market_categories. De statische prefix verschilt per categorie maar
+        is per categorie voor elk pand gelijk, dus ook cachebaar.
+
+        Args:
+            house_data: Raw house data from Apify
+            enrichment_data: Optional AirROI enrichment (comparables, revenue estimate)
+            market_metrics: Optional market-level metrics from AirROI
+
+        Returns:
+            Categorie naam -> prompt
+        """
+        red_flag_results = self.scan_red_flags(house_data)
+        evidence = self.red_flag_evidence(red_flag_results)
+        example = self._output_example()
+
+        prompts = {}
+        for cat_name, criteria in self.categories.items():
+            output = {"category_scores": {cat_name: example["category_scores"][cat_name]}}
+            sections = [
+                PromptSection("system", self.system_prompt + "\n\n", static=True),
+                PromptSection(
+                    "categories",
+                    f"## 🔍 VEREISTE ANALYSE: {criteria.name.upper()}\n\n"
+                    "Je analyseert alleen deze categorie; de andere categorieën en de "
+                    "eindconclusie worden apart beoordeeld.\n\n"
+                    f"{criteria.prompt_template}\n\n",
+                    static=True
+                ),
+                PromptSection("output_format", self._output_format_section(output), static=True),
+            ]
+            sections.extend(self._house_sections(
+                house_data, red_flag_results,
+                enrichment_data if cat_name in self.market_categories else None,
+                market_metrics if cat_name in self.market_categories else None
+            ))
+            sections.append(PromptSection(
+                "instructions",
+                "## ▶️ OPDRACHT\n\n"
+                f"Analyseer het pand hierboven alleen voor de categorie {criteria.name}, "
+                "volgens het uitvoerformaat en de kwaliteitseisen uit het eerste deel van deze prompt.\n"
+            ))
+            prompts[cat_name] = AnalysisPrompt(sections, budget=self.prompt_token_budget, red_flags=evidence)
+
+        return prompts
+
+    def get_synthesis_prompt(self, house_data: dict, category_scores: dict) -> AnalysisPrompt:
+        """
+        Genereer de prompt voor de eindconclusie over de categorie analyses.
+
+        De synthese krijgt de red flags, een korte pandsamenvatting en de
+        categorie resultaten, niet de volledige pand data.
+
+        Args:
+            house_data: Raw house data from Apify
+            category_scores: Categorie naam -> resultaat van de categorie analyse
+
+        Returns:
+            Prompt voor overall_assessment, top_strengths, top_concerns,
+            investment_recommendation, action_plan en scale_up_potential
+        """
+        red_flag_results = self.scan_red_flags(house_data)
+        example = self._output_example()
+        output = {key: value for key, value in example.items() if key != "category_scores"}
+
+        overall_score = self.calculate_overall_score({
+            name: category.get("score", 0.0) for name, category in category_scores.items()
+        })
+        weights = ", ".join(
+            f"{criteria.name} {int(criteria.weight * 100)}%" for criteria in self.categories.values()
+        )
+        summary = format_house_data(house_data, self.synthesis_fields, self.house_data_style)
+
+        sections = [
+            PromptSection("system", self.system_prompt + "\n\n", static=True),
+            PromptSection(
+                "categories",
+                "## 🧩 SYNTHESE\n\n"
+                "De categorieën zijn al afzonderlijk geanalyseerd. Trek op basis van die "
+                "analyses de eindconclusie: weeg sterktes tegen zorgen, neem dealbreakers "
+                "over en maak het actieplan concreet.\n\n",
+                static=True
+            ),
+            PromptSection("output_format", self._output_format_section(output), static=True),
+            PromptSection("red_flags", self._red_flag_section(red_flag_results)),
+            PromptSection("house_data", f"## 📋 PAND SAMENVATTING\n\n```\n{summary}\n```\n\n"),
+            PromptSection(
+                "category_scores",
+                "## 📊 CATEGORIE ANALYSES\n\n"
+                f"**Gewogen score:** {overall_score} (weging: {weights})\n\n"
+                f"```json\n{json.dumps(category_scores, indent=2, ensure_ascii=False)}\n```\n\n"
+            ),
+            PromptSection(
+                "instructions",
+                "## ▶️ OPDRACHT\n\n"
+                "Geef de eindconclusie voor dit pand volgens het uitvoerformaat en de "
+                "kwaliteitseisen uit het eerste deel van deze prompt.\n"
+            ),
+        ]
+        return AnalysisPrompt(
+            sections, budget=self.prompt_token_budget, red_flags=self.red_flag_evidence(red_flag_results)
+        )
+
+    def _output_example(self) -> dict:
+        """Het voorbeeld JSON-object uit het volledige uitvoerformaat."""
+        text = next(section.text for section in self.static_sections() if section.name == "output_format")
+        return json.loads(text.split("```json\n", 1)[1].split("\n```", 1)[0])
+
+    def _output_format_section(self, example: dict) -> str:
+        """Uitvoerformaat en kwaliteitseisen voor een deel van de analyse."""
+        return (
+            "\n## 📤 UITVOERFORMAAT\n\n"
+            "Reageer met een geldig JSON-object in deze EXACTE structuur:\n\n"
+            f"```json\n{json.dumps(example, indent=2, ensure_ascii=False)}\n```\n\n"
+            "## ✅ KWALITEITSEISEN\n\n"
+            "1. **Scores:** Altijd tussen 0-10. Score van 10 is UITZONDERLIJK zeldzaam.\n"
+            "2. **Cijfers:** Gebruik concrete bedragen, percentages, afstanden (niet vaag blijven!)\n"
+            "3. **Red flags:** Neem ALLE relevante red flags uit pre-screening over, tenzij het bewijs ze tegenspreekt\n"
+            "4. **Dealbreakers:** Als pre-screening AFWIJZEN aanbeveelt → scores 0-3 en AFWIJZEN, heldere uitleg waarom\n"
+            "5. **Nederlands:** Alle tekst in correct Nederlands\n"
+            "6. **JSON:** Valide JSON structuur, geen syntax errors\n"
+            "7. **Beknoptheid:** Reasoning MAX 400 woorden. Focus op kernpunten en cijfers.\n"
+        )
+
+    def _house_sections(
+        self,
+        house_data: dict,
+        red_flag_results: dict,
+        enrichment_data: dict = None,
+        market_metrics: dict = None
+    ) -> List[PromptSection]:
+        """Pand-specifieke secties: red flags, pand data en optionele marktdata."""
+        sections = [PromptSection("red_flags", self._red_flag_section(red_flag_results))]
+
+        # Add house data
+        sections.append(PromptSection(
+            "house_data",
+            f"## 📋 PAND DATA\n\n```\n{self.format_house_data(house_data)}\n```\n\n"
+        ))
+
+        # Add AirROI enrichment data if available
+        if enrichment_data and enrichment_data.get('enriched'):
+            comparables = enrichment_data.get('comparables', [])
+            shorter = [
+                (f"{count} comparables", self._airroi_section(enrichment_data, count))
+                for count in (2, 0)
+                if count < min(len(comparables), 5)
+            ]
+            sections.append(PromptSection(
+                "airroi", self._airroi_section(enrichment_data, 5), priority=1, shorter=shorter
+            ))
+
+        # Add market-level metrics if available
+        if market_metrics:
+            sections.append(PromptSection(
+                "market_metrics",
+                self._market_metrics_section(house_data, market_metrics),
+                priority=2,
+                shorter=[("dropped", "")]
+            ))
+
+        return sections
+
+    def red_flag_evidence(self, red_flag_results: dict) -> dict:
+        """
+        Compacte red flag resultaten om in de analyse op te slaan.
+
+        Args:
+            red_flag_results: Resultaat van RedFlagDetector.scan
+
+        Returns:
+            Aanbeveling, totaal gewicht en de gevonden dealbreakers en
+            warnings met pattern, reden, gewicht, offsets en snippet
+        """
+        fields = ('pattern', 'reason', 'weight', 'start', 'end', 'snippet')
+        return {
+            "recommendation": red_flag_results['recommendation'],
+            "total_weight": red_flag_results['total_weight'],
+            "dealbreakers": [{key: flag[key] for key in fields} for flag in red_flag_results['dealbreakers']],
+            "warnings": [{key: flag[key] for key in fields} for flag in red_flag_results['warnings']],
+        }
+
+    def _red_flag_section(self, red_flag_results: dict) -> str:
+        """
+        Red flag pre-screening resultaten (en afwijzingsinstructie bij dealbreakers).
+
+        Per flag staat het stukje advertentietekst waar hij op matchte, zodat
+        het model de context (bv. "géén erfpacht") niet zelf in de pand data
+        hoeft te zoeken. Een snippet die al bij een eerdere flag stond wordt
+        niet herhaald.
+        """
+        prompt_parts = ["## 🚨 RED FLAG PRE-SCREENING RESULTATEN\n\n"]
+        prompt_parts.append(f"**Aanbeveling:** {red_flag_results['recommendation']}\n")
+        prompt_parts.append(f"**Betrouwbaarheid:** {red_flag_results['confidence']}\n")
+        prompt_parts.append(f"**Totaal gewicht:** {red_flag_results['total_weight']}\n\n")
+
+        shown = set()
+
+        def flag_lines(flag: dict) -> List[str]:
+            lines = [f"- [{flag['weight']}] {flag['reason']}\n"]
+            if flag['snippet'] in shown:
+                lines.append("  Bewijs: zie hierboven\n")
+            else:
+                shown.add(flag['snippet'])
+                lines.append(f"  Bewijs: \"{flag['snippet']}\"\n")
+            return lines
+
+        if red_flag_results['dealbreakers']:
+            prompt_parts.append(f"**⛔ DEALBREAKERS GEVONDEN ({len(red_flag_results['dealbreakers'])}):**\n")
+            for flag in red_flag_results['dealbreakers']:
+                prompt_parts.extend(flag_lines(flag))
+            prompt_parts.append("\n")
+
+        if red_flag_results['warnings']:
+            prompt_parts.append(f"**⚠️  WARNINGS GEVONDEN ({len(red_flag_results['warnings'])}):**\n")
+            for flag in red_flag_results['warnings']:
+                prompt_parts.extend(flag_lines(flag))
+            prompt_parts.append("\n")
+
+        # If dealbreakers found, instruct immediate rejection
+        if red_flag_results['recommendation'] == 'AFWIJZEN':
+            prompt_parts.append("""
+⛔ **BELANGRIJK:** Er zijn dealbreakers gevonden.
+Dit pand moet worden AFGEWEZEN zonder verdere analyse.
+
+Geef een beknopte analyse die uitlegt WAAROM dit pand afgekeurd wordt,
+met focus op de gevonden dealbreakers. Gebruik lage scores (0-3) voor alle categorieën.
+
+Investement recommendation moet AFWIJZEN zijn met duidelijke onderbouwing.
 """)
 
         return "".join(prompt_parts)
+
+    def _airroi_section(self, enrichment_data: dict, max_comparables: int) -> str:
+        """AirROI marktdata met maximaal max_comparables vergelijkbare listings."""
+        prompt_parts = ["## 🌍 AIRROI MARKTDATA (AIRBNB/SHORT-TERM RENTAL)\n\n"]
+        prompt_parts.append("**Belangrijk:** Deze data komt van echte Airbnb listings in de buurt en kan gebruikt worden voor concretere revenue schattingen en marktanalyse.\n\n")
+
+        # Add comparable listings summary
+        comparables = enrichment_data.get('comparables', [])
+        if comparables and max_comparables:
+            prompt_parts.append(f"### Vergelijkbare Airbnb listings in de buurt ({len(comparables)} listings)\n\n")
+            prompt_parts.append("Top vergelijkbare properties:\n\n")
+            for i, comp in enumerate(comparables[:max_comparables], 1):
+                prompt_parts.append(f"**Listing {i}:**\n")
+                prompt_parts.append(f"- Bedrooms: {comp.get('bedrooms', 'N/A')}\n")
+                prompt_parts.append(f"- Bathrooms: {comp.get('bathrooms', 'N/A')}\n")
+
+                # Metrics (TTM = Trailing Twelve Months)
+                metrics = comp.get('metrics', {}).get('ttm', {})
+                if metrics:
+                    prompt_parts.append(f"- Annual Revenue (TTM): {metrics.get('revenue', 'N/A')}\n")
+                    prompt_parts.append(f"- Occupancy Rate (TTM): {metrics.get('occupancy', 'N/A')}%\n")
+                    prompt_parts.append(f"- Average Daily Rate (TTM): {metrics.get('adr', 'N/A')}\n")
+                    prompt_parts.append(f"- Days Booked (TTM): {metrics.get('days_booked', 'N/A')}\n")
+                prompt_parts.append("\n")
+
+        # Add revenue estimate
+        revenue_estimate = enrichment_data.get('revenue_estimate', {})
+        if revenue_estimate:
+            prompt_parts.append("### Revenue Schatting voor dit pand\n\n")
+            prompt_parts.append("**Gebaseerd op vergelijkbare listings in de buurt:**\n\n")
+            estimate_data = revenue_estimate.get('estimate', {})
+            if estimate_data:
+                prompt_parts.append(f"```json\n{json.dumps(estimate_data, indent=2, ensure_ascii=False)}\n```\n\n")
+
+        prompt_parts.append("**Gebruik deze data actief in je financial analysis!** De revenue estimate en comparable listings geven concrete marktdata voor realistische projecties.\n\n")
+
+        return "".join(prompt_parts)
+
+    def _market_metrics_section(self, house_data: dict, market_metrics: dict) -> str:
+        """Markt metrics op stadsniveau."""
+        prompt_parts = ["## 📊 MARKT METRICS (STAD-NIVEAU)\n\n"]
+        city = house_data.get('AddressDetails', {}).get('City', 'Unknown')
+        province = market_metrics.get('province', 'Unknown')
+        prompt_parts.append(f"**Markt:** {city}, {province}\n\n")
+
+        metrics = market_metrics.get('metrics', {})
+        if metrics:
+            prompt_parts.append("**Market Performance (Trailing 12 Months):**\n\n")
+            prompt_parts.append(f"```json\n{json.dumps(metrics, indent=2, ensure_ascii=False)}\n```\n\n")
+            prompt_parts.append("**Gebruik deze data voor context:** Vergelijk de property's potentieel met het marktgemiddelde.\n\n")
+
+        return "".join(prompt_parts)
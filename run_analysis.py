@@ -9,24 +9,30 @@ Usage:
     python run_analysis.py 43084820 --rules v2.0.0 --llm claude
     python run_analysis.py 43084820 --mock --no-commit
     python run_analysis.py 43084820 --skip-enrichment
+    python run_analysis.py query --city Hoenderloo --max-price 200000
+    python run_analysis.py stale --rules v2.0.0
+    python run_analysis.py batch --stale --rules v2.0.0 --workers 8
+    python run_analysis.py prompt-size --rules v2.0.0
 """
 
+import functools
+import itertools
 import json
 import os
 import subprocess
 import sys
 import time
-import gzip
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import urllib.request
 import urllib.error
 
 try:
     import typer
     from rich.console import Console
-    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn
     from rich import print as rprint
 except ImportError:
     print("❌ Missing dependencies. Install with:")
@@ -37,6 +43,14 @@ except ImportError:
 from src.agent import HouseAnalysisAgent
 from src.report_generator import ReportGenerator
 from src.markdown_generator import MarkdownGenerator
+from src.dataset import DATASET_PATH, INDEX_PATH, DatasetIndex, get_index
+from src.dataset_store import get_store
+from src.prescreen import PRESCREEN_PATH, get_prescreen
+from src.red_flags import DEFAULT_PACK
+from src.reanalysis import analysis_inputs, select_stale_houses
+from src.llm_stream import StreamProgress, TruncatedResponseError
+from src.request_scheduler import send
+from rules import get_rules
 
 app = typer.Typer(
     help="Analyze houses for short-stay rental potential using compressed dataset",
@@ -49,32 +63,37 @@ def load_house_from_dataset(house_id: str) -> Optional[Dict[str, Any]]:
     """
     Extract house data from compressed dataset.
 
+    Uses the sidecar id index (data/apify_dataset.index.json.gz) to read only
+    the requested record. A missing or stale index is rebuilt first, which
+    costs one streaming pass over the dataset.
+
     Args:
-        house_id: Unique house identifier (TinyId)
+        house_id: Unique house identifier (TinyId, GlobalId or propertyId)
 
     Returns:
         House data dict or None if not found
     """
-    dataset_path = Path('data/apify_dataset.json.gz')
+    dataset_path = DATASET_PATH
 
     if not dataset_path.exists():
         console.print(f"[red]❌ Dataset not found: {dataset_path}[/red]")
         return None
 
-    console.print(f"[dim]📦 Loading dataset: {dataset_path}[/dim]")
-
     try:
-        with gzip.open(dataset_path, 'rt', encoding='utf-8') as f:
-            dataset = json.load(f)
+        index = DatasetIndex.load(INDEX_PATH, dataset_path)
+        if index is None:
+            console.print(f"[dim]📦 Building dataset index: {INDEX_PATH}[/dim]")
+            index = get_index(dataset_path, INDEX_PATH)
 
-        # Find house by TinyId
-        for item in dataset:
-            if item.get('Identifiers', {}).get('TinyId') == house_id:
-                console.print(f"[green]✅ House found in dataset[/green]")
-                return item
+        console.print(f"[dim]📦 Looking up house in dataset index ({len(index)} records)[/dim]")
+        house_data = index.get(house_id)
 
-        console.print(f"[red]❌ House {house_id} not found in dataset[/red]")
-        return None
+        if house_data is None:
+            console.print(f"[red]❌ House {house_id} not found in dataset[/red]")
+            return None
+
+        console.print(f"[green]✅ House found in dataset[/green]")
+        return house_data
 
     except Exception as e:
         console.print(f"[red]❌ Error loading dataset: {e}[/red]")
@@ -138,15 +157,14 @@ def fetch_airroi_enrichment(
 
         console.print(f"[dim]🗺️  Geocoding postcode {postcode}...[/dim]")
         try:
-            time.sleep(1)  # Rate limit for Nominatim
             geocode_url = f"https://nominatim.openstreetmap.org/search?postalcode={postcode}&country=NL&format=json"
             req = urllib.request.Request(
                 geocode_url,
                 headers={'User-Agent': 'BNB-Analysis-Tool/1.0'}
             )
 
-            with urllib.request.urlopen(req, timeout=10) as response:
-                geocode_results = json.loads(response.read().decode())
+            # The shared scheduler keeps Nominatim at one request per second
+            geocode_results = json.loads(send(req, timeout=10).decode())
 
             if geocode_results:
                 lat = float(geocode_results[0]['lat'])
@@ -204,8 +222,7 @@ def fetch_airroi_enrichment(
             headers={'x-api-key': api_key}
         )
 
-        with urllib.request.urlopen(req, timeout=30) as response:
-            comparables_data = json.loads(response.read().decode())
+        comparables_data = json.loads(send(req, timeout=30).decode())
 
         enrichment['comparables'] = comparables_data.get('data', [])
         enrichment['api_calls'] += 1
@@ -231,8 +248,7 @@ def fetch_airroi_enrichment(
             headers={'x-api-key': api_key}
         )
 
-        with urllib.request.urlopen(req, timeout=30) as response:
-            revenue_estimate = json.loads(response.read().decode())
+        revenue_estimate = json.loads(send(req, timeout=30).decode())
 
         enrichment['revenue_estimate'] = revenue_estimate.get('data', {})
         enrichment['api_calls'] += 1
@@ -262,6 +278,13 @@ def fetch_airroi_enrichment(
     return enrichment
 
 
+@functools.lru_cache(maxsize=1)
+def _load_market_data(metrics_file: Path) -> Dict[str, Any]:
+    """Read market_metrics.json once per process (batch runs look up many cities)."""
+    with open(metrics_file, 'r') as f:
+        return json.load(f)
+
+
 def load_market_metrics(city: str) -> Optional[Dict[str, Any]]:
     """
     Load market metrics for a city.
@@ -278,8 +301,7 @@ def load_market_metrics(city: str) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        with open(metrics_file, 'r') as f:
-            data = json.load(f)
+        data = _load_market_data(metrics_file)
 
         if city in data.get('cities', {}):
             console.print(f"[green]✅ Loaded market metrics for {city}[/green]")
@@ -290,6 +312,124 @@ def load_market_metrics(city: str) -> Optional[Dict[str, Any]]:
     return None
 
 
+def save_analysis(
+    house_id: str,
+    house_data: Dict[str, Any],
+    analysis: Dict[str, Any],
+    enrichment_data: Optional[Dict[str, Any]] = None,
+    verbose: bool = True
+) -> Tuple[Path, str]:
+    """
+    Save the analysis, the raw house data and the latest analysis reference.
+
+    Args:
+        house_id: House identifier
+        house_data: Raw house data the analysis was made from
+        analysis: Analysis results
+        enrichment_data: Enrichment data used (if any)
+        verbose: Print the written paths
+
+    Returns:
+        (house directory, timestamp used in the file names)
+    """
+    house_dir = Path('houses') / house_id
+    house_dir.mkdir(parents=True, exist_ok=True)
+
+    # Save to analyses directory with version and timestamp
+    analyses_dir = house_dir / 'analyses'
+    analyses_dir.mkdir(exist_ok=True)
+
+    timestamp = analysis['analyzed_at'].replace(':', '-').split('.')[0]
+    filename = f"{analysis['rules_version']}_{timestamp}.json"
+    analysis_path = analyses_dir / filename
+
+    with open(analysis_path, 'w') as f:
+        json.dump(analysis, f, indent=2)
+
+    if verbose:
+        console.print(f"[green]  📄 {analysis_path}[/green]")
+
+    # Save raw data
+    raw_dir = house_dir / 'raw'
+    raw_dir.mkdir(exist_ok=True)
+    raw_path = raw_dir / f'data_{timestamp}.json'
+
+    with open(raw_path, 'w') as f:
+        json.dump(house_data, f, indent=2)
+
+    if verbose:
+        console.print(f"[dim]  📦 {raw_path}[/dim]")
+
+    # Save latest analysis reference
+    with open(house_dir / 'latest_analysis.json', 'w') as f:
+        json.dump({
+            'analyzed_at': analysis['analyzed_at'],
+            'rules_version': analysis['rules_version'],
+            'overall_score': analysis['overall_score'],
+            'analysis_file': str(analysis_path.relative_to(house_dir)),
+            'inputs': analysis_inputs(house_data, enrichment_data, analysis['rules_version'])
+        }, f, indent=2)
+
+    return house_dir, timestamp
+
+
+def generate_reports(
+    analysis: Dict[str, Any],
+    house_dir: Path,
+    timestamp: str,
+    verbose: bool = True
+) -> Path:
+    """
+    Generate HTML and Markdown reports and point the latest.* symlinks at them.
+
+    Args:
+        analysis: Analysis results
+        house_dir: House directory (houses/{house_id})
+        timestamp: Timestamp used in the analysis file name
+        verbose: Print the written paths
+
+    Returns:
+        Reports directory
+    """
+    reports_dir = house_dir / 'reports'
+    reports_dir.mkdir(exist_ok=True)
+
+    base_filename = f"{analysis['rules_version']}_{timestamp}"
+
+    # HTML report
+    html_generator = ReportGenerator()
+    html_path = reports_dir / f'{base_filename}.html'
+    html_generator.save(analysis, html_path)
+    if verbose:
+        console.print(f"[green]  📊 {html_path}[/green]")
+
+    # Markdown report
+    md_generator = MarkdownGenerator()
+    md_path = reports_dir / f'{base_filename}.md'
+    md_generator.save(analysis, md_path)
+    if verbose:
+        console.print(f"[green]  📝 {md_path}[/green]")
+
+    # Create symlinks to latest reports
+    latest_html = reports_dir / 'latest.html'
+    latest_md = reports_dir / 'latest.md'
+
+    # Remove old symlinks
+    if latest_html.exists() or latest_html.is_symlink():
+        latest_html.unlink()
+    if latest_md.exists() or latest_md.is_symlink():
+        latest_md.unlink()
+
+    # Create new symlinks
+    os.symlink(f'{base_filename}.html', latest_html)
+    os.symlink(f'{base_filename}.md', latest_md)
+
+    if verbose:
+        console.print(f"[dim]  🔗 Created symlinks to latest reports[/dim]")
+
+    return reports_dir
+
+
 def update_analysis_scores(house_id: str, analysis: Dict[str, Any]) -> None:
     """
     Update the analysis scores index.
@@ -298,6 +438,16 @@ def update_analysis_scores(house_id: str, analysis: Dict[str, Any]) -> None:
         house_id: House identifier
         analysis: Analysis results
     """
+    update_analysis_scores_batch({house_id: analysis})
+
+
+def update_analysis_scores_batch(analyses: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Update the analysis scores index for several houses with one write.
+
+    Args:
+        analyses: House identifier -> analysis results
+    """
     scores_file = Path('data/analysis_scores.json')
 
     # Load current scores
@@ -309,11 +459,12 @@ def update_analysis_scores(house_id: str, analysis: Dict[str, Any]) -> None:
 
     # Update
     scores_data['last_updated'] = datetime.now(timezone.utc).isoformat()
-    scores_data['houses'][house_id] = {
-        'score': analysis['overall_score'],
-        'analyzed_at': analysis['analyzed_at'],
-        'rules_version': analysis['rules_version']
-    }
+    for house_id, analysis in analyses.items():
+        scores_data['houses'][house_id] = {
+            'score': analysis['overall_score'],
+            'analyzed_at': analysis['analyzed_at'],
+            'rules_version': analysis['rules_version']
+        }
 
     # Save
     with open(scores_file, 'w') as f:
@@ -334,10 +485,16 @@ def git_commit_and_push(house_id: str, score: float, rules_version: str) -> bool
     Returns:
         True if successful
     """
+    commit_msg = f"Analysis: {house_id} using {rules_version} (score: {score:.2f})"
+    return _git_commit_and_push([house_id], commit_msg)
+
+
+def _git_commit_and_push(house_ids: List[str], commit_msg: str) -> bool:
+    """Commit the given house directories plus the scores index and push."""
     try:
         # Add files
         subprocess.run(
-            ['git', 'add', f'houses/{house_id}/', 'data/analysis_scores.json'],
+            ['git', 'add'] + [f'houses/{house_id}/' for house_id in house_ids] + ['data/analysis_scores.json'],
             check=True,
             capture_output=True
         )
@@ -353,7 +510,6 @@ def git_commit_and_push(house_id: str, score: float, rules_version: str) -> bool
             return True
 
         # Commit
-        commit_msg = f"Analysis: {house_id} using {rules_version} (score: {score:.2f})"
         subprocess.run(
             ['git', 'commit', '-m', commit_msg],
             check=True,
@@ -391,6 +547,14 @@ def analyze(
     only_enrichment: bool = typer.Option(False, "--only-enrichment", help="Only fetch enrichment data, skip analysis"),
     no_commit: bool = typer.Option(False, "--no-commit", help="Skip git commit and push"),
     no_reports: bool = typer.Option(False, "--no-reports", help="Skip report generation"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Don't use the LLM response cache"),
+    refresh: bool = typer.Option(False, "--refresh", help="Call the LLM even if the response is cached"),
+    fast_reject: bool = typer.Option(False, "--fast-reject", help="Skip the LLM for houses with red flag dealbreakers"),
+    prompt_budget: Optional[int] = typer.Option(None, "--prompt-budget", help="Estimated-token prompt budget; trims comparables and market metrics above it"),
+    per_category: bool = typer.Option(False, "--per-category", help="One concurrent LLM call per category plus a synthesis call"),
+    cascade: Optional[float] = typer.Option(None, "--cascade", help="Screen with a small model first; full analysis only above this score"),
+    no_stream: bool = typer.Option(False, "--no-stream", help="Wait for the complete LLM response instead of streaming it"),
+    output_budget: Optional[int] = typer.Option(None, "--output-budget", help="Abort the streamed analysis above this many output tokens"),
 ):
     """
     Analyze a house for short-stay rental potential.
@@ -460,18 +624,50 @@ def analyze(
 
     agent = HouseAnalysisAgent(
         rules_version=rules_version,
-        llm_provider=llm_provider
+        llm_provider=llm_provider,
+        cache=not no_cache,
+        refresh_cache=refresh,
+        fast_reject=fast_reject,
+        prompt_budget=prompt_budget,
+        per_category=per_category,
+        cascade_threshold=cascade,
+        stream=not no_stream,
+        output_token_budget=output_budget
     )
 
     console.print(f"[dim]Agent initialized with {llm_provider} provider[/dim]")
 
-    analysis = agent.analyze_house(
-        house_data=house_data,
-        house_id=house_id,
-        apify_dataset_id='Yb4fTMJ9wQsuyZf3L',  # Hardcoded dataset ID
-        enrichment_data=enrichment_data,
-        market_metrics=market_metrics
-    )
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("{task.description}"),
+            BarColumn(),
+            TextColumn("~{task.completed:.0f} tokens"),
+            console=console,
+            transient=True,
+            disable=no_stream or per_category
+        ) as progress:
+            task = progress.add_task("Generating analysis", total=None)
+
+            def on_progress(update: StreamProgress) -> None:
+                progress.update(task, completed=update.output_tokens, total=update.max_tokens)
+                if update.latest and update.latest.startswith("category_scores."):
+                    category = update.latest.split(".", 1)[1]
+                    score = update.value.get("score") if isinstance(update.value, dict) else None
+                    progress.console.print(f"   ✓ {category}: {score}/10")
+
+            analysis = agent.analyze_house(
+                house_data=house_data,
+                house_id=house_id,
+                apify_dataset_id='Yb4fTMJ9wQsuyZf3L',  # Hardcoded dataset ID
+                enrichment_data=enrichment_data,
+                market_metrics=market_metrics,
+                on_progress=on_progress
+            )
+    except TruncatedResponseError as e:
+        console.print(f"[red]❌ {e}[/red]")
+        console.print("[dim]Raise --output-budget, or use --per-category for shorter responses[/dim]")
+        raise typer.Exit(code=1)
 
     # Validate
     agent.validate_analysis(analysis)
@@ -481,42 +677,7 @@ def analyze(
 
     # Step 5: Save analysis results
     console.print("[bold]5️⃣  Saving analysis results...[/bold]")
-
-    house_dir = Path('houses') / house_id
-    house_dir.mkdir(parents=True, exist_ok=True)
-
-    # Save to analyses directory with version and timestamp
-    analyses_dir = house_dir / 'analyses'
-    analyses_dir.mkdir(exist_ok=True)
-
-    timestamp = analysis['analyzed_at'].replace(':', '-').split('.')[0]
-    filename = f"{analysis['rules_version']}_{timestamp}.json"
-    analysis_path = analyses_dir / filename
-
-    with open(analysis_path, 'w') as f:
-        json.dump(analysis, f, indent=2)
-
-    console.print(f"[green]  📄 {analysis_path}[/green]")
-
-    # Save raw data
-    raw_dir = house_dir / 'raw'
-    raw_dir.mkdir(exist_ok=True)
-    raw_path = raw_dir / f'data_{timestamp}.json'
-
-    with open(raw_path, 'w') as f:
-        json.dump(house_data, f, indent=2)
-
-    console.print(f"[dim]  📦 {raw_path}[/dim]")
-
-    # Save latest analysis reference
-    with open(house_dir / 'latest_analysis.json', 'w') as f:
-        json.dump({
-            'analyzed_at': analysis['analyzed_at'],
-            'rules_version': analysis['rules_version'],
-            'overall_score': analysis['overall_score'],
-            'analysis_file': str(analysis_path.relative_to(house_dir))
-        }, f, indent=2)
-
+    house_dir, timestamp = save_analysis(house_id, house_data, analysis, enrichment_data)
     console.print()
 
     # Step 6: Generate reports
@@ -524,39 +685,7 @@ def analyze(
         console.print("[bold]6️⃣  Skipping report generation (--no-reports)[/bold]")
     else:
         console.print("[bold]6️⃣  Generating reports...[/bold]")
-
-        reports_dir = house_dir / 'reports'
-        reports_dir.mkdir(exist_ok=True)
-
-        base_filename = f"{analysis['rules_version']}_{timestamp}"
-
-        # HTML report
-        html_generator = ReportGenerator()
-        html_path = reports_dir / f'{base_filename}.html'
-        html_generator.save(analysis, html_path)
-        console.print(f"[green]  📊 {html_path}[/green]")
-
-        # Markdown report
-        md_generator = MarkdownGenerator()
-        md_path = reports_dir / f'{base_filename}.md'
-        md_generator.save(analysis, md_path)
-        console.print(f"[green]  📝 {md_path}[/green]")
-
-        # Create symlinks to latest reports
-        latest_html = reports_dir / 'latest.html'
-        latest_md = reports_dir / 'latest.md'
-
-        # Remove old symlinks
-        if latest_html.exists() or latest_html.is_symlink():
-            latest_html.unlink()
-        if latest_md.exists() or latest_md.is_symlink():
-            latest_md.unlink()
-
-        # Create new symlinks
-        os.symlink(f'{base_filename}.html', latest_html)
-        os.symlink(f'{base_filename}.md', latest_md)
-
-        console.print(f"[dim]  🔗 Created symlinks to latest reports[/dim]")
+        reports_dir = generate_reports(analysis, house_dir, timestamp)
 
     console.print()
 
@@ -603,5 +732,507 @@ def analyze(
     console.print()
 
 
-if __name__ == '__main__':
+@app.command()
+def query(
+    city: Optional[str] = typer.Option(None, "--city", help="Exact city name (AddressDetails.City)"),
+    province: Optional[str] = typer.Option(None, "--province", help="Province name"),
+    postcode: Optional[str] = typer.Option(None, "--postcode", help="Postcode prefix (e.g. 7351)"),
+    min_price: Optional[int] = typer.Option(None, "--min-price", help="Minimum asking price"),
+    max_price: Optional[int] = typer.Option(None, "--max-price", help="Maximum asking price"),
+    min_bedrooms: Optional[int] = typer.Option(None, "--min-bedrooms", help="Minimum number of bedrooms"),
+    include_sold: bool = typer.Option(False, "--include-sold", help="Include sold/rented listings"),
+    limit: int = typer.Option(50, "--limit", "-n", help="Maximum number of results"),
+    ids_only: bool = typer.Option(False, "--ids-only", help="Print only TinyIds (one per line)"),
+):
+    """
+    Query listings in the local SQLite store (data/apify_dataset.sqlite).
+
+    The store is synced incrementally from the compressed dataset first.
+    """
+    if not DATASET_PATH.exists():
+        console.print(f"[red]❌ Dataset not found: {DATASET_PATH}[/red]")
+        raise typer.Exit(code=1)
+
+    with get_store() as store:
+        filters = dict(
+            city=city,
+            province=province,
+            post_code_prefix=postcode,
+            min_price=min_price,
+            max_price=max_price,
+            min_bedrooms=min_bedrooms,
+            include_sold=include_sold,
+        )
+
+        if ids_only:
+            for house_id in store.find_ids(limit=limit, **filters):
+                print(house_id)
+            return
+
+        console.print(f"[dim]📦 {len(store)} listings in store[/dim]")
+        count = 0
+        for listing in store.find(limit=limit, **filters):
+            count += 1
+            address = listing.get('AddressDetails', {})
+            price = listing.get('Price', {}).get('NumericSellingPrice')
+            bedrooms = listing.get('FastView', {}).get('NumberOfBedrooms', '?')
+            console.print(
+                f"  {listing['Identifiers']['TinyId']:>10}  "
+                f"€{price or 0:>9,}  {bedrooms} bed  "
+                f"{address.get('Title', '')}, {address.get('City', '')}"
+            )
+
+        console.print(f"[green]✅ {count} matching listings[/green]")
+
+
+def _inputs_for_batch(
+    house_id: str,
+    house_data: Dict[str, Any],
+    skip_enrichment: bool,
+    force_enrichment: bool
+) -> Dict[str, Any]:
+    """Collect enrichment and market metrics for a house (runs on a batch worker)."""
+    if skip_enrichment:
+        enrichment_data = None
+    else:
+        enrichment_data = fetch_airroi_enrichment(house_id, house_data, force=force_enrichment)
+
+    city = house_data.get('AddressDetails', {}).get('City')
+    market_metrics = load_market_metrics(city) if city else None
+
+    return {
+        'house_id': house_id,
+        'house_data': house_data,
+        'enrichment_data': enrichment_data,
+        'market_metrics': market_metrics,
+    }
+
+
+def _save_for_batch(
+    agent: HouseAnalysisAgent,
+    house: Dict[str, Any],
+    analysis: Dict[str, Any],
+    no_reports: bool
+) -> Dict[str, Any]:
+    """Validate, save and report a single analysis."""
+    agent.validate_analysis(analysis)
+
+    house_dir, timestamp = save_analysis(
+        house['house_id'], house['house_data'], analysis, house['enrichment_data'], verbose=False
+    )
+    if not no_reports:
+        generate_reports(analysis, house_dir, timestamp, verbose=False)
+
+    return analysis
+
+
+def _analyze_for_batch(
+    agent: HouseAnalysisAgent,
+    house_id: str,
+    house_data: Dict[str, Any],
+    skip_enrichment: bool,
+    force_enrichment: bool,
+    no_reports: bool
+) -> Dict[str, Any]:
+    """Enrich, analyze, save and report a single house (runs on a batch worker)."""
+    house = _inputs_for_batch(house_id, house_data, skip_enrichment, force_enrichment)
+
+    analysis = agent.analyze_house(
+        house_data=house_data,
+        house_id=house_id,
+        apify_dataset_id='Yb4fTMJ9wQsuyZf3L',  # Hardcoded dataset ID
+        enrichment_data=house['enrichment_data'],
+        market_metrics=house['market_metrics']
+    )
+
+    return _save_for_batch(agent, house, analysis, no_reports)
+
+
+MESSAGE_BATCHES_PATH = Path('.cache/message_batches.json')
+
+
+def _record_message_batches(batch_ids: List[str], house_ids: List[str]) -> None:
+    """
+    Save submitted message batch ids before waiting on them.
+
+    Written to MESSAGE_BATCHES_PATH and, in GitHub Actions, to the step
+    output (batch_ids) and summary, so a batch that outlasts the process
+    can be collected later with --batch-id.
+    """
+    console.print(f"[cyan]📨 Message batch ids: {' '.join(batch_ids)} (resume with --batch-id)[/cyan]")
+
+    MESSAGE_BATCHES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MESSAGE_BATCHES_PATH.write_text(json.dumps({
+        'batch_ids': batch_ids,
+        'house_ids': house_ids,
+        'submitted_at': datetime.now(timezone.utc).isoformat(),
+    }, indent=2))
+
+    if os.getenv('GITHUB_OUTPUT'):
+        with open(os.environ['GITHUB_OUTPUT'], 'a') as f:
+            f.write(f"batch_ids={','.join(batch_ids)}\n")
+    if os.getenv('GITHUB_STEP_SUMMARY'):
+        with open(os.environ['GITHUB_STEP_SUMMARY'], 'a') as f:
+            f.write(f"**Message batch ids:** `{','.join(batch_ids)}` (rerun with `batch_ids` to collect)\n")
+
+
+@app.command()
+def batch(
+    house_ids: Optional[List[str]] = typer.Argument(None, help="House identifiers (TinyId)"),
+    ids_file: Optional[Path] = typer.Option(None, "--ids-file", help="File with one house ID per line ('-' for stdin)"),
+    stale_only: bool = typer.Option(False, "--stale", help="Select houses whose latest analysis is out of date"),
+    city: Optional[str] = typer.Option(None, "--city", help="Select listings in this city (see query)"),
+    province: Optional[str] = typer.Option(None, "--province", help="Select listings in this province"),
+    max_price: Optional[int] = typer.Option(None, "--max-price", help="Select listings up to this asking price"),
+    min_bedrooms: Optional[int] = typer.Option(None, "--min-bedrooms", help="Select listings with at least this many bedrooms"),
+    limit: Optional[int] = typer.Option(None, "--limit", "-n", help="Maximum number of houses"),
+    rules_version: str = typer.Option("latest", "--rules", "-r", help="Rules version to use"),
+    llm_provider: str = typer.Option("claude", "--llm", "-l", help="LLM provider: mock, claude, or openai"),
+    mock: bool = typer.Option(False, "--mock", "-m", help="Use mock LLM (no API costs)"),
+    workers: int = typer.Option(4, "--workers", "-w", help="Houses analyzed concurrently"),
+    skip_enrichment: bool = typer.Option(False, "--skip-enrichment", help="Skip AirROI enrichment"),
+    force_enrichment: bool = typer.Option(False, "--force-enrichment", help="Force re-fetch enrichment data"),
+    no_commit: bool = typer.Option(False, "--no-commit", help="Skip git commit and push"),
+    no_reports: bool = typer.Option(False, "--no-reports", help="Skip report generation"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Don't use the LLM response cache"),
+    refresh: bool = typer.Option(False, "--refresh", help="Call the LLM even if the response is cached"),
+    fast_reject: bool = typer.Option(False, "--fast-reject", help="Skip the LLM for houses with red flag dealbreakers"),
+    prompt_budget: Optional[int] = typer.Option(None, "--prompt-budget", help="Estimated-token prompt budget; trims comparables and market metrics above it"),
+    per_category: bool = typer.Option(False, "--per-category", help="One concurrent LLM call per category plus a synthesis call"),
+    cascade: Optional[float] = typer.Option(None, "--cascade", help="Screen with a small model first; full analysis only above this score"),
+    skip_rejected: bool = typer.Option(False, "--skip-rejected", help="Leave out listings the red flag prescreen rejects (see prescreen)"),
+    message_batch: bool = typer.Option(False, "--message-batch", help="Submit all prompts as one Claude message batch (half price, results within 24h)"),
+    poll_interval: int = typer.Option(60, "--poll-interval", help="Seconds between message batch status checks"),
+    batch_timeout: Optional[int] = typer.Option(None, "--batch-timeout", help="Minutes to wait for the message batch; it keeps running afterwards (resume with --batch-id)"),
+    batch_ids: Optional[List[str]] = typer.Option(None, "--batch-id", help="Collect the results of an earlier message batch for the same houses instead of submitting again (repeatable)"),
+):
+    """
+    Analyze many houses in one process.
+
+    The dataset index and the agent are loaded once; enrichment, the LLM call
+    and report generation run on a pool of worker threads (the work is
+    almost entirely waiting on HTTP). The scores index is written and
+    committed once at the end.
+
+    With --message-batch the prompts are sent to Claude as one message batch
+    instead, and the process waits until the batch has been processed. The
+    batch ids are saved to .cache/message_batches.json (and the GitHub
+    Actions step output) right after submitting; rerun with the same houses
+    and --batch-id to collect the results of a batch that outlasted the
+    process instead of paying for it again.
+    """
+    if mock:
+        llm_provider = "mock"
+
+    if batch_ids:
+        message_batch = True
+
+    if message_batch and llm_provider != "claude":
+        console.print("[red]❌ --message-batch requires the claude provider[/red]")
+        raise typer.Exit(code=1)
+
+    if message_batch and per_category:
+        console.print("[red]❌ --message-batch can't be combined with --per-category[/red]")
+        raise typer.Exit(code=1)
+
+    # Collect house ids
+    filters = (city, province, max_price, min_bedrooms)
+    has_selector = bool(house_ids) or ids_file is not None or any(value is not None for value in filters)
+    selected = list(house_ids or [])
+    if ids_file is not None:
+        lines = sys.stdin.read().splitlines() if str(ids_file) == '-' else ids_file.read_text().splitlines()
+        selected += [line.strip() for line in lines if line.strip()]
+
+    if any(value is not None for value in filters):
+        if not DATASET_PATH.exists():
+            console.print(f"[red]❌ Dataset not found: {DATASET_PATH}[/red]")
+            raise typer.Exit(code=1)
+        with get_store() as store:
+            selected += store.find_ids(
+                city=city, province=province, max_price=max_price, min_bedrooms=min_bedrooms
+            )
+
+    # Selectors that matched nothing must not widen --stale to every analyzed house
+    if has_selector and not selected:
+        console.print("[yellow]⚠️  No houses selected[/yellow]")
+        return
+
+    if stale_only:
+        stale_houses = select_stale_houses(rules_version, selected if has_selector else None)
+        selected = list(stale_houses)
+
+    if skip_rejected:
+        pack = get_rules(rules_version).red_flag_pack or DEFAULT_PACK
+        rejected = set(get_prescreen(pack=pack).rejected(selected))
+        if rejected:
+            console.print(f"[dim]🚩 Skipping {len(rejected)} listings rejected by the red flag prescreen[/dim]")
+        selected = [house_id for house_id in selected if house_id not in rejected]
+
+    selected = list(dict.fromkeys(selected))[:limit]
+    if not selected:
+        console.print("[yellow]⚠️  No houses selected[/yellow]")
+        return
+
+    console.print()
+    console.print("=" * 70)
+    console.print(f"[bold cyan]🏘️  Batch Analysis - {len(selected)} houses[/bold cyan]")
+    console.print("=" * 70)
+    mode = "message batch" if message_batch else f"Workers: {workers}"
+    console.print(f"[dim]Rules: {rules_version} | LLM: {llm_provider} | {mode}[/dim]")
+    console.print()
+
+    # Load the dataset index and the agent once
+    index = get_index()
+    if index is None:
+        console.print(f"[red]❌ Dataset not found: {DATASET_PATH}[/red]")
+        raise typer.Exit(code=1)
+
+    # One agent is shared by all worker threads. This relies on the agent
+    # being read-only after __init__: analyze_house keeps its per-house state
+    # in locals, the LLM clients open a connection per request (through the
+    # thread-safe request scheduler) and the response cache writes through
+    # per-thread temp files and atomic renames. Per-house state added to the
+    # agent or its LLM clients would have to stay local to the call.
+    agent = HouseAnalysisAgent(
+        rules_version=rules_version,
+        llm_provider=llm_provider,
+        cache=not no_cache,
+        refresh_cache=refresh,
+        fast_reject=fast_reject,
+        prompt_budget=prompt_budget,
+        per_category=per_category,
+        cascade_threshold=cascade
+    )
+
+    jobs = {}
+    for house_id in selected:
+        house_data = index.get(house_id)
+        if house_data is None:
+            console.print(f"[yellow]⚠️  {house_id}: not found in dataset, skipped[/yellow]")
+        else:
+            jobs[house_id] = house_data
+
+    analyses: Dict[str, Dict[str, Any]] = {}
+    failures: Dict[str, str] = {}
+    started = time.time()
+
+    def record(done: int, house_id: str, analysis: Optional[Dict[str, Any]], error: Optional[Exception]) -> None:
+        if error is not None:
+            failures[house_id] = str(error)
+            console.print(f"[red]  [{done}/{len(jobs)}] ❌ {house_id}: {error}[/red]")
+        else:
+            analyses[house_id] = analysis
+            console.print(
+                f"[green]  [{done}/{len(jobs)}] ✅ {house_id}: "
+                f"{analysis['overall_score']:.2f}/10[/green]"
+            )
+
+    if message_batch:
+        # Enrichment still runs on the worker pool; only the LLM calls are batched
+        houses = []
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = {
+                executor.submit(
+                    _inputs_for_batch, house_id, house_data, skip_enrichment, force_enrichment
+                ): house_id
+                for house_id, house_data in jobs.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    houses.append(future.result())
+                except Exception as e:
+                    failures[futures[future]] = str(e)
+                    console.print(f"[red]  ❌ {futures[future]}: {e}[/red]")
+
+        try:
+            results = agent.analyze_batch(
+                houses,
+                apify_dataset_id='Yb4fTMJ9wQsuyZf3L',  # Hardcoded dataset ID
+                poll_interval=poll_interval,
+                timeout=batch_timeout * 60 if batch_timeout is not None else None,
+                batch_ids=batch_ids or None,
+                on_submitted=lambda ids: _record_message_batches(ids, [house['house_id'] for house in houses])
+            )
+        except TimeoutError as e:
+            console.print(f"[yellow]⏳ {e}[/yellow]")
+            console.print("[yellow]   The batch keeps processing; rerun with the same houses and --batch-id to collect it[/yellow]")
+            raise typer.Exit(code=1)
+
+        for done, (house, result) in enumerate(zip(houses, results), start=1):
+            if isinstance(result, Exception):
+                record(done, house['house_id'], None, result)
+                continue
+            try:
+                record(done, house['house_id'], _save_for_batch(agent, house, result, no_reports), None)
+            except Exception as e:
+                record(done, house['house_id'], None, e)
+    else:
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = {
+                executor.submit(
+                    _analyze_for_batch, agent, house_id, house_data,
+                    skip_enrichment, force_enrichment, no_reports
+                ): house_id
+                for house_id, house_data in jobs.items()
+            }
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    record(done, futures[future], future.result(), None)
+                except Exception as e:
+                    record(done, futures[future], None, e)
+
+    console.print()
+    console.print(
+        f"[bold]Analyzed {len(analyses)} houses in {time.time() - started:.0f}s "
+        f"({len(failures)} failed)[/bold]"
+    )
+
+    if analyses:
+        update_analysis_scores_batch(analyses)
+
+        if no_commit:
+            console.print("[dim]Skipping git commit (--no-commit)[/dim]")
+        else:
+            versions = ', '.join(sorted({a['rules_version'] for a in analyses.values()}))
+            _git_commit_and_push(
+                list(analyses),
+                f"Batch analysis: {len(analyses)} houses using {versions}"
+            )
+
+    if failures:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def stale(
+    rules_version: str = typer.Option("latest", "--rules", "-r", help="Rules version to compare against"),
+    ids: Optional[str] = typer.Option(None, "--ids", help="Comma-separated house IDs (default: all analyzed houses)"),
+    as_json: bool = typer.Option(False, "--json", help="Print the house IDs as a JSON array"),
+):
+    """
+    List houses whose latest analysis is out of date.
+
+    A house is listed when it was analyzed with another rules version, its
+    listing changed in the dataset, or its enrichment was re-fetched since.
+    """
+    house_ids = [h.strip() for h in ids.split(',') if h.strip()] if ids else None
+    houses = select_stale_houses(rules_version, house_ids)
+
+    if as_json:
+        print(json.dumps(list(houses)))
+        return
+
+    for house_id, reason in houses.items():
+        console.print(f"  {house_id:>10}  [yellow]{reason}[/yellow]")
+    console.print(f"[green]✅ {len(houses)} houses need re-analysis[/green]")
+
+
+@app.command()
+def prescreen(
+    house_ids: Optional[List[str]] = typer.Argument(None, help="Show the result for these house IDs"),
+    workers: Optional[int] = typer.Option(None, "--workers", "-w", help="Worker processes (default: CPU count)"),
+    force: bool = typer.Option(False, "--force", help="Rescan every listing"),
+    rejected_only: bool = typer.Option(False, "--rejected", help="Print the IDs of all rejected listings (one per line)"),
+    pack: str = typer.Option(DEFAULT_PACK, "--pack", help="Red flag pack to scan with (rules/red_flags/<pack>.json)"),
+):
+    """
+    Run the red flag detector over every listing in the dataset.
+
+    Results are kept in data/red_flags.prescreen.json.gz; only listings that
+    changed since the last run are rescanned.
+    """
+    if not DATASET_PATH.exists():
+        console.print(f"[red]❌ Dataset not found: {DATASET_PATH}[/red]")
+        raise typer.Exit(code=1)
+
+    started = time.time()
+    index = get_prescreen(update=False)
+    stats = index.update(workers=workers, force=force, pack=pack)
+    index.save(PRESCREEN_PATH)
+
+    if rejected_only:
+        for house_id in index.rejected():
+            print(house_id)
+        return
+
+    counts: Dict[str, int] = {}
+    for entry in index.houses.values():
+        counts[entry[0]] = counts.get(entry[0], 0) + 1
+
+    console.print(
+        f"[dim]Scanned {stats['added'] + stats['updated']} listings in {time.time() - started:.1f}s "
+        f"({stats['added']} new, {stats['updated']} changed, {stats['unchanged']} unchanged, "
+        f"{stats['deleted']} removed)[/dim]"
+    )
+    for recommendation in ("AFWIJZEN", "VERDER ONDERZOEK", "GESCHIKT"):
+        console.print(f"  {recommendation:<17} {counts.get(recommendation, 0):>6}")
+
+    for house_id in house_ids or []:
+        result = index.get(house_id)
+        if result is None:
+            console.print(f"  {house_id:>10}  [yellow]not in the dataset[/yellow]")
+            continue
+        console.print(f"  {house_id:>10}  {result['recommendation']} ({result['total_weight']} weight)")
+        for pattern in result['patterns']:
+            console.print(f"  {'':>10}  • {pattern.get('pattern')} [dim]({pattern.get('category')}, {pattern.get('weight')})[/dim]")
+
+    console.print(f"[green]✅ {len(index)} listings prescreened ({PRESCREEN_PATH})[/green]")
+
+
+@app.command("prompt-size")
+def prompt_size(
+    house_ids: Optional[List[str]] = typer.Argument(None, help="House identifiers (default: first listings in the dataset)"),
+    rules_version: str = typer.Option("latest", "--rules", "-r", help="Rules version to use"),
+    limit: int = typer.Option(100, "--limit", "-n", help="Listings to sample when no IDs are given"),
+):
+    """
+    Show how much the rules' field projection shrinks the listing in the prompt.
+
+    Token counts are estimates (about 4 characters per token).
+    """
+    rules = get_rules(rules_version)
+
+    index = get_index()
+    if index is None:
+        console.print(f"[red]❌ Dataset not found: {DATASET_PATH}[/red]")
+        raise typer.Exit(code=1)
+
+    if house_ids:
+        records = [(house_id, index.get(house_id)) for house_id in house_ids]
+    else:
+        records = [
+            (record.get('Identifiers', {}).get('TinyId'), record)
+            for record in itertools.islice(index.iter_records(), limit)
+        ]
+
+    raw_total = projected_total = 0
+    for house_id, record in records:
+        if record is None:
+            console.print(f"[yellow]⚠️  {house_id}: not found in dataset[/yellow]")
+            continue
+        stats = rules.house_data_stats(record)
+        raw_total += stats['raw_tokens']
+        projected_total += stats['projected_tokens']
+        if house_ids:
+            console.print(
+                f"  {house_id:>10}  ~{stats['raw_tokens']:>6,} → ~{stats['projected_tokens']:>6,} tokens"
+            )
+
+    if raw_total:
+        console.print(
+            f"[green]✅ {rules.version}: house data ~{raw_total:,} → ~{projected_total:,} tokens "
+            f"({100 - 100 * projected_total / raw_total:.0f}% smaller)[/green]"
+        )
+
+
+def main():
+    """Run the CLI, defaulting to the analyze command (run_analysis.py HOUSE_ID)."""
+    commands = {command.name or command.callback.__name__ for command in app.registered_commands}
+    if len(sys.argv) > 1 and sys.argv[1] not in commands and not sys.argv[1].startswith('-'):
+        sys.argv.insert(1, 'analyze')
     app()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,12 @@
 import os
 import json
 import time
-from typing import Dict, Any, Optional
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Any, List, Optional, Union
 from datetime import datetime, timezone
 import sys
 from pathlib import Path
@@ -12,11 +17,121 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from rules import get_rules
+from rules.projection import estimate_tokens
 
+from .llm_batch import POLL_INTERVAL, MessageBatchClient
+from .llm_cache import CachedLLM, LLMCache
+from .llm_stream import ResponseStream, StreamProgress, iter_sse, replay
+from .request_scheduler import get_scheduler, send
 
-class MockLLM:
+
+# Maximum concurrent requests per provider for the async variants
+PROVIDER_CONCURRENCY = {
+    "mock": 16,
+    "claude": int(os.getenv("CLAUDE_MAX_CONCURRENCY", "4")),
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "4")),
+}
+
+# Small models for the cascade screening pass (CLAUDE_SCREENING_MODEL and
+# OPENAI_SCREENING_MODEL override them per provider)
+SCREENING_MODELS = {
+    "mock": "mock",
+    "claude": os.getenv("CLAUDE_SCREENING_MODEL", "claude-haiku-4-5"),
+    "openai": os.getenv("OPENAI_SCREENING_MODEL", "gpt-4o-mini"),
+}
+
+# The screening response is only scores and a few sentences
+SCREENING_MAX_TOKENS = 1500
+
+# Maximum concurrent LLM requests across all providers
+MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Semaphores belong to an event loop, so keep one set per loop
+_loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Optional[str], asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# The blocking HTTP calls run here; the default executor is sized by CPU count
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="llm")
+
+# Process-wide request slots, held by the executor threads. Every blocking
+# analyze_house() runs its own event loop, so with batch workers the
+# per-loop semaphores alone would allow that many times the caps
+_thread_slots: Dict[Any, threading.BoundedSemaphore] = {}
+_thread_slots_lock = threading.Lock()
+
+
+def _thread_slot(provider: Optional[str]) -> threading.BoundedSemaphore:
+    """Process-wide slot of a provider (None: across providers), keyed on its current cap."""
+    limit = MAX_CONCURRENT_REQUESTS if provider is None else PROVIDER_CONCURRENCY.get(provider, 1)
+    with _thread_slots_lock:
+        if (provider, limit) not in _thread_slots:
+            _thread_slots[(provider, limit)] = threading.BoundedSemaphore(limit)
+        return _thread_slots[(provider, limit)]
+
+
+def _analyze_in_slot(llm: Any, prompt: str) -> str:
+    """Call llm.analyze() holding the process-wide slots (runs on _executor)."""
+    with _thread_slot(llm.provider), _thread_slot(None):
+        return llm.analyze(prompt)
+
+
+@asynccontextmanager
+async def _llm_slot(provider: str):
+    """Hold a request slot for a provider and a shared slot across providers."""
+    semaphores = _loop_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if provider not in semaphores:
+        semaphores[provider] = asyncio.Semaphore(PROVIDER_CONCURRENCY.get(provider, 1))
+    if None not in semaphores:
+        semaphores[None] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    # Provider slot first, so tasks waiting on a busy provider don't block
+    # the shared slots other providers could use
+    async with semaphores[provider]:
+        async with semaphores[None]:
+            yield
+
+
+class AsyncLLMMixin:
+    """Async variant of analyze() for LLM clients with a blocking analyze()."""
+
+    provider = "mock"
+
+    async def analyze_async(self, prompt: str) -> str:
+        """
+        Run analyze() without blocking the event loop.
+
+        Concurrency is capped per provider (PROVIDER_CONCURRENCY) and across
+        providers (MAX_CONCURRENT_REQUESTS), per event loop and across the
+        threads of the process.
+
+        Args:
+            prompt: Analysis prompt
+
+        Returns:
+            Response text, as analyze() returns it
+        """
+        async with _llm_slot(self.provider):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, _analyze_in_slot, self, prompt)
+
+
+class MockLLM(AsyncLLMMixin):
     """Mock LLM for testing without API costs."""
 
+    provider = "mock"
+    model = "mock"
+    max_tokens = None
+
+    def analyze_stream(
+        self,
+        prompt: str,
+        on_progress: Optional[Callable[[StreamProgress], None]] = None,
+        token_budget: Optional[int] = None
+    ) -> str:
+        """Mock analysis, delivered in small chunks like a streamed response."""
+        return replay(self.analyze(prompt), token_budget=token_budget, on_progress=on_progress, chunk_size=40)
+
     def analyze(self, prompt: str) -> str:
         """
         Generate mock analysis response.
@@ -70,18 +185,53 @@ class MockLLM:
         })
 
 
-class ClaudeLLM:
+class ClaudeLLM(AsyncLLMMixin):
     """Claude API integration for real analysis."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    provider = "claude"
+
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None, max_tokens: Optional[int] = None):
         """Initialize Claude client."""
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable required")
 
-        self.model = "claude-sonnet-4-5"
+        self.model = model or "claude-sonnet-4-5"
+        self.max_tokens = max_tokens or 8000  # Increased for detailed v2.0.0 analyses with financial calculations
         self.api_url = "https://api.anthropic.com/v1/messages"
 
+    def request_body(self, prompt: str) -> Dict[str, Any]:
+        """
+        Build the Messages API request body for a prompt.
+
+        For an AnalysisPrompt the static rules prefix is sent as its own
+        content block marked with cache_control, so repeated analyses read
+        it from Anthropic's prompt cache instead of paying for it again.
+
+        Args:
+            prompt: Analysis prompt (str or AnalysisPrompt)
+
+        Returns:
+            Request body for /v1/messages
+        """
+        static = getattr(prompt, "static", None)
+        if static:
+            content = [
+                {"type": "text", "text": static, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt.dynamic},
+            ]
+        else:
+            content = prompt
+
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [{
+                "role": "user",
+                "content": content
+            }]
+        }
+
     def analyze(self, prompt: str) -> str:
         """
         Call Claude API for analysis.
@@ -101,15 +251,75 @@ class ClaudeLLM:
             "content-type": "application/json"
         }
 
-        body = {
-            "model": self.model,
-            "max_tokens": 8000,  # Increased for detailed v2.0.0 analyses with financial calculations
-            "messages": [{
-                "role": "user",
-                "content": prompt
-            }]
+        body = self.request_body(prompt)
+
+        req = urllib.request.Request(
+            self.api_url,
+            data=json.dumps(body).encode('utf-8'),
+            headers=headers,
+            method='POST'
+        )
+
+        # Input tokens count against the per-minute limit; prompt cache reads do not
+        estimated = estimate_tokens(prompt)
+
+        try:
+            response_data = json.loads(send(req, timeout=180, tokens=estimated).decode('utf-8'))  # 180s for 8000 token responses
+        except urllib.error.HTTPError as e:
+            error_body = e.read().decode('utf-8')
+            raise Exception(f"Claude API error: {e.code} {e.reason}\n{error_body}")
+
+        usage = response_data.get("usage", {})
+        if usage.get("cache_read_input_tokens"):
+            print(f"   Prompt cache: {usage['cache_read_input_tokens']} tokens read from cache")
+        if "input_tokens" in usage:
+            actual = usage["input_tokens"] + usage.get("cache_creation_input_tokens", 0)
+            get_scheduler().adjust_tokens(self.api_url, actual - estimated)
+
+        # Extract text from response
+        content = response_data.get("content", [])
+        text = content[0].get("text", "") if content else ""
+        if response_data.get("stop_reason") == "max_tokens":
+            stream = ResponseStream(max_tokens=self.max_tokens)
+            stream.add(text)
+            return stream.finish(hit_limit=True)
+        return text
+
+    def analyze_stream(
+        self,
+        prompt: str,
+        on_progress: Optional[Callable[[StreamProgress], None]] = None,
+        token_budget: Optional[int] = None
+    ) -> str:
+        """
+        Call Claude API with a streamed response.
+
+        Args:
+            prompt: Analysis prompt
+            on_progress: Called as the response is generated, e.g. when a
+                category result is complete
+            token_budget: Abort the generation once the response exceeds
+                this many output tokens
+
+        Returns:
+            JSON string with analysis
+
+        Raises:
+            TruncatedResponseError: If the response hit max_tokens or the
+                budget before the JSON was complete
+        """
+        import urllib.request
+        import urllib.error
+
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json"
         }
 
+        body = self.request_body(prompt)
+        body["stream"] = True
+
         req = urllib.request.Request(
             self.api_url,
             data=json.dumps(body).encode('utf-8'),
@@ -117,29 +327,51 @@ class ClaudeLLM:
             method='POST'
         )
 
+        estimated = estimate_tokens(prompt)
+        stream = ResponseStream(max_tokens=self.max_tokens, token_budget=token_budget, on_progress=on_progress)
+        stop_reason = None
+
         try:
-            with urllib.request.urlopen(req, timeout=180) as response:  # Increased from 120s to 180s for 8000 token responses
-                response_data = json.loads(response.read().decode('utf-8'))
-                # Extract text from response
-                content = response_data.get("content", [])
-                if content and len(content) > 0:
-                    return content[0].get("text", "")
-                return ""
+            # Closing the response on a budget abort ends the generation
+            with get_scheduler().open(req, timeout=180, tokens=estimated) as response:
+                for event, data in iter_sse(response):
+                    payload = json.loads(data)
+                    if event == "content_block_delta":
+                        delta = payload.get("delta", {})
+                        if delta.get("type") == "text_delta":
+                            stream.add(delta.get("text", ""))
+                    elif event == "message_start":
+                        usage = payload.get("message", {}).get("usage", {})
+                        if usage.get("cache_read_input_tokens"):
+                            print(f"   Prompt cache: {usage['cache_read_input_tokens']} tokens read from cache")
+                        if "input_tokens" in usage:
+                            actual = usage["input_tokens"] + usage.get("cache_creation_input_tokens", 0)
+                            get_scheduler().adjust_tokens(self.api_url, actual - estimated)
+                    elif event == "message_delta":
+                        stop_reason = payload.get("delta", {}).get("stop_reason") or stop_reason
+                    elif event == "error":
+                        error = payload.get("error", {})
+                        raise Exception(f"Claude API error: {error.get('type')} {error.get('message', '')}".rstrip())
         except urllib.error.HTTPError as e:
             error_body = e.read().decode('utf-8')
             raise Exception(f"Claude API error: {e.code} {e.reason}\n{error_body}")
 
+        return stream.finish(hit_limit=stop_reason == "max_tokens")
+
 
-class OpenAILLM:
+class OpenAILLM(AsyncLLMMixin):
     """OpenAI API integration for real analysis."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    provider = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None, max_tokens: Optional[int] = None):
         """Initialize OpenAI client."""
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable required")
 
-        self.model = "gpt-4-turbo-preview"
+        self.model = model or "gpt-4-turbo-preview"
+        self.max_tokens = max_tokens  # None: not sent, the API default applies
         self.api_url = "https://api.openai.com/v1/chat/completions"
 
     def analyze(self, prompt: str) -> str:
@@ -167,6 +399,8 @@ class OpenAILLM:
             ],
             "response_format": {"type": "json_object"}
         }
+        if self.max_tokens:
+            body["max_tokens"] = self.max_tokens
 
         req = urllib.request.Request(
             self.api_url,
@@ -175,17 +409,99 @@ class OpenAILLM:
             method='POST'
         )
 
+        # OpenAI counts prompt and completion tokens against the per-minute limit
+        estimated = estimate_tokens(prompt) + (self.max_tokens or 0)
+
         try:
-            with urllib.request.urlopen(req, timeout=180) as response:  # Increased from 120s to 180s for 8000 token responses
-                response_data = json.loads(response.read().decode('utf-8'))
-                choices = response_data.get("choices", [])
-                if choices and len(choices) > 0:
-                    return choices[0].get("message", {}).get("content", "")
-                return ""
+            response_data = json.loads(send(req, timeout=180, tokens=estimated).decode('utf-8'))  # 180s for 8000 token responses
         except urllib.error.HTTPError as e:
             error_body = e.read().decode('utf-8')
             raise Exception(f"OpenAI API error: {e.code} {e.reason}\n{error_body}")
 
+        usage = response_data.get("usage", {})
+        if "total_tokens" in usage:
+            get_scheduler().adjust_tokens(self.api_url, usage["total_tokens"] - estimated)
+
+        choices = response_data.get("choices", [])
+        if not choices:
+            return ""
+        text = choices[0].get("message", {}).get("content", "")
+        if choices[0].get("finish_reason") == "length":
+            stream = ResponseStream(max_tokens=self.max_tokens)
+            stream.add(text)
+            return stream.finish(hit_limit=True)
+        return text
+
+    def analyze_stream(
+        self,
+        prompt: str,
+        on_progress: Optional[Callable[[StreamProgress], None]] = None,
+        token_budget: Optional[int] = None
+    ) -> str:
+        """
+        Call OpenAI API with a streamed response.
+
+        Args:
+            prompt: Analysis prompt
+            on_progress: Called as the response is generated
+            token_budget: Abort the generation once the response exceeds
+                this many output tokens
+
+        Returns:
+            JSON string with analysis
+
+        Raises:
+            TruncatedResponseError: If the response hit max_tokens or the
+                budget before the JSON was complete
+        """
+        import urllib.request
+        import urllib.error
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {"type": "json_object"},
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        if self.max_tokens:
+            body["max_tokens"] = self.max_tokens
+
+        req = urllib.request.Request(
+            self.api_url,
+            data=json.dumps(body).encode('utf-8'),
+            headers=headers,
+            method='POST'
+        )
+
+        estimated = estimate_tokens(prompt) + (self.max_tokens or 0)
+        stream = ResponseStream(max_tokens=self.max_tokens, token_budget=token_budget, on_progress=on_progress)
+        finish_reason = None
+
+        try:
+            with get_scheduler().open(req, timeout=180, tokens=estimated) as response:
+                for _, data in iter_sse(response):
+                    if data == "[DONE]":
+                        break
+                    payload = json.loads(data)
+                    if payload.get("usage"):
+                        get_scheduler().adjust_tokens(self.api_url, payload["usage"]["total_tokens"] - estimated)
+                    for choice in payload.get("choices", []):
+                        stream.add(choice.get("delta", {}).get("content") or "")
+                        finish_reason = choice.get("finish_reason") or finish_reason
+        except urllib.error.HTTPError as e:
+            error_body = e.read().decode('utf-8')
+            raise Exception(f"OpenAI API error: {e.code} {e.reason}\n{error_body}")
+
+        return stream.finish(hit_limit=finish_reason == "length")
+
 
 class HouseAnalysisAgent:
     """Orchestrator for house analysis using LLM."""
@@ -193,7 +509,15 @@ class HouseAnalysisAgent:
     def __init__(
         self,
         rules_version: str = "latest",
-        llm_provider: str = "mock"
+        llm_provider: str = "mock",
+        cache: Union[bool, LLMCache] = False,
+        refresh_cache: bool = False,
+        fast_reject: bool = False,
+        prompt_budget: Optional[int] = None,
+        per_category: bool = False,
+        cascade_threshold: Optional[float] = None,
+        stream: bool = False,
+        output_token_budget: Optional[int] = None
     ):
         """
         Initialize analysis agent.
@@ -201,27 +525,81 @@ class HouseAnalysisAgent:
         Args:
             rules_version: Version of rules to use (e.g., 'v1.0.0' or 'latest')
             llm_provider: LLM provider ('mock', 'claude', or 'openai')
+            cache: Answer identical prompts from the on-disk response cache
+                (True for .cache/llm, or an LLMCache); ignored for mock
+            refresh_cache: Call the LLM even on a cache hit and store the
+                new response
+            fast_reject: Skip the LLM for houses the rules reject outright
+                (v2.0.0 red flag dealbreakers) and build the analysis locally
+            prompt_budget: Estimated-token budget for the prompt; optional
+                sections are trimmed above it (default: PROMPT_TOKEN_BUDGET)
+            per_category: Analyze each category in its own concurrent LLM
+                call, then synthesize the overall fields in a short final
+                call (rules that support it, i.e. v2.0.0)
+            cascade_threshold: Screen every house with a compact prompt on a
+                small model (SCREENING_MODELS) first; only houses whose
+                screening score exceeds this threshold get the full
+                analysis, the others keep the screening result (None: off)
+            stream: Stream the full analysis in analyze_house(), reporting
+                progress as it is generated and failing fast on a
+                truncated response
+            output_token_budget: With stream, abort a response once it
+                exceeds this many output tokens (None: up to max_tokens)
         """
         self.rules = get_rules(rules_version)
+        if prompt_budget is not None:
+            self.rules.prompt_token_budget = prompt_budget
         self.llm_provider = llm_provider
+        self.fast_reject = fast_reject
+        self.per_category = per_category
+        self.cascade_threshold = cascade_threshold
+        self.stream = stream
+        self.output_token_budget = output_token_budget
 
         # Initialize LLM client
+        self.llm = self._create_llm(llm_provider, cache, refresh_cache)
+
+        self.screening_llm = None
+        if cascade_threshold is not None:
+            self.screening_llm = self._create_llm(
+                llm_provider, cache, refresh_cache,
+                model=SCREENING_MODELS[llm_provider], max_tokens=SCREENING_MAX_TOKENS
+            )
+
+    @staticmethod
+    def _create_llm(
+        llm_provider: str,
+        cache: Union[bool, LLMCache] = False,
+        refresh_cache: bool = False,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> Any:
+        """Create an LLM client for a provider, wrapped in the response cache if enabled."""
         if llm_provider == "mock":
-            self.llm = MockLLM()
+            llm = MockLLM()
         elif llm_provider == "claude":
-            self.llm = ClaudeLLM()
+            llm = ClaudeLLM(model=model, max_tokens=max_tokens)
         elif llm_provider == "openai":
-            self.llm = OpenAILLM()
+            llm = OpenAILLM(model=model, max_tokens=max_tokens)
         else:
             raise ValueError(f"Unknown LLM provider: {llm_provider}")
 
+        if cache and llm_provider != "mock":
+            llm = CachedLLM(
+                llm,
+                cache=cache if isinstance(cache, LLMCache) else None,
+                refresh=refresh_cache
+            )
+        return llm
+
     def analyze_house(
         self,
         house_data: Dict[str, Any],
         house_id: str,
         apify_dataset_id: Optional[str] = None,
         enrichment_data: Optional[Dict[str, Any]] = None,
-        market_metrics: Optional[Dict[str, Any]] = None
+        market_metrics: Optional[Dict[str, Any]] = None,
+        on_progress: Optional[Callable[[StreamProgress], None]] = None
     ) -> Dict[str, Any]:
         """
         Analyze a house using the configured rules and LLM.
@@ -232,24 +610,515 @@ class HouseAnalysisAgent:
             apify_dataset_id: Optional Apify dataset ID for metadata
             enrichment_data: Optional AirROI enrichment data (comparables, revenue estimate)
             market_metrics: Optional market-level metrics from AirROI
+            on_progress: With stream, called as the full analysis is
+                generated (see StreamProgress)
 
         Returns:
             Complete analysis result
+
+        Raises:
+            TruncatedResponseError: With stream, if the response was cut
+                off or exceeded output_token_budget
         """
         start_time = time.time()
 
+        rejection = self._fast_rejection(house_data, house_id)
+        if rejection is not None:
+            return self._result_from_data(house_id, rejection, start_time, apify_dataset_id, llm_model="red_flags")
+
+        screening = None
+        screening_prompt = self._build_screening_prompt(house_id, house_data, enrichment_data, market_metrics)
+        if screening_prompt is not None:
+            try:
+                screening_response = self.screening_llm.analyze(screening_prompt)
+            except Exception as e:
+                screening_response = e
+            screening = self._screening_result(
+                house_id, screening_response, start_time, apify_dataset_id, screening_prompt
+            )
+            if screening is not None and not screening["metadata"]["screening"]["passed"]:
+                return screening
+
+        category_prompts = self._build_category_prompts(house_id, house_data, enrichment_data, market_metrics)
+        if category_prompts is not None:
+            # Same request slots as the async path, shared by all threads of the process
+            result = asyncio.run(self._analyze_categories_async(
+                house_id, house_data, category_prompts, start_time, apify_dataset_id
+            ))
+            return self._add_screening(result, screening)
+
         # Generate analysis prompt with enrichment
+        prompt = self._build_prompt(house_id, house_data, enrichment_data, market_metrics)
+
+        # Get LLM analysis
+        print(f"Analyzing house {house_id} using {self.llm_provider}...")
+        if self.stream:
+            llm_response = self.llm.analyze_stream(
+                prompt, on_progress=on_progress, token_budget=self.output_token_budget
+            )
+        else:
+            llm_response = self.llm.analyze(prompt)
+
+        result = self._build_result(house_id, llm_response, start_time, apify_dataset_id, prompt)
+        return self._add_screening(result, screening)
+
+    async def analyze_house_async(
+        self,
+        house_data: Dict[str, Any],
+        house_id: str,
+        apify_dataset_id: Optional[str] = None,
+        enrichment_data: Optional[Dict[str, Any]] = None,
+        market_metrics: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of analyze_house(); the LLM call doesn't block the event loop.
+
+        Args:
+            house_data: Raw house data from Apify
+            house_id: Unique identifier for the house
+            apify_dataset_id: Optional Apify dataset ID for metadata
+            enrichment_data: Optional AirROI enrichment data (comparables, revenue estimate)
+            market_metrics: Optional market-level metrics from AirROI
+
+        Returns:
+            Complete analysis result
+        """
+        start_time = time.time()
+
+        rejection = self._fast_rejection(house_data, house_id)
+        if rejection is not None:
+            return self._result_from_data(house_id, rejection, start_time, apify_dataset_id, llm_model="red_flags")
+
+        screening = None
+        screening_prompt = self._build_screening_prompt(house_id, house_data, enrichment_data, market_metrics)
+        if screening_prompt is not None:
+            try:
+                screening_response = await self.screening_llm.analyze_async(screening_prompt)
+            except Exception as e:
+                screening_response = e
+            screening = self._screening_result(
+                house_id, screening_response, start_time, apify_dataset_id, screening_prompt
+            )
+            if screening is not None and not screening["metadata"]["screening"]["passed"]:
+                return screening
+
+        category_prompts = self._build_category_prompts(house_id, house_data, enrichment_data, market_metrics)
+        if category_prompts is not None:
+            result = await self._analyze_categories_async(
+                house_id, house_data, category_prompts, start_time, apify_dataset_id
+            )
+            return self._add_screening(result, screening)
+
+        prompt = self._build_prompt(house_id, house_data, enrichment_data, market_metrics)
+
+        print(f"Analyzing house {house_id} using {self.llm_provider}...")
+        llm_response = await self.llm.analyze_async(prompt)
+
+        result = self._build_result(house_id, llm_response, start_time, apify_dataset_id, prompt)
+        return self._add_screening(result, screening)
+
+    async def analyze_many_async(
+        self,
+        houses: List[Dict[str, Any]],
+        apify_dataset_id: Optional[str] = None
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Analyze several houses concurrently (see analyze_many).
+        """
+        tasks = [
+            self.analyze_house_async(
+                house_data=house["house_data"],
+                house_id=house["house_id"],
+                apify_dataset_id=apify_dataset_id,
+                enrichment_data=house.get("enrichment_data"),
+                market_metrics=house.get("market_metrics")
+            )
+            for house in houses
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def analyze_many(
+        self,
+        houses: List[Dict[str, Any]],
+        apify_dataset_id: Optional[str] = None
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Analyze several houses concurrently.
+
+        All prompts are sent at once; the provider concurrency caps decide
+        how many requests are actually in flight.
+
+        Args:
+            houses: Dicts with house_id and house_data, optionally
+                enrichment_data and market_metrics
+            apify_dataset_id: Optional Apify dataset ID for metadata
+
+        Returns:
+            Analysis result per house, in input order; the exception for
+            houses that failed
+        """
+        return asyncio.run(self.analyze_many_async(houses, apify_dataset_id))
+
+    def analyze_batch(
+        self,
+        houses: List[Dict[str, Any]],
+        apify_dataset_id: Optional[str] = None,
+        batch_client: Optional[MessageBatchClient] = None,
+        poll_interval: float = POLL_INTERVAL,
+        timeout: Optional[float] = None,
+        batch_ids: Optional[List[str]] = None,
+        on_submitted: Optional[Callable[[List[str]], None]] = None
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Analyze several houses through the Claude Message Batches API.
+
+        Prompts are built as usual and submitted together; cached responses
+        are reused and new ones stored. Slower than analyze_many (results
+        can take up to 24 hours) but half the price, for bulk re-analysis.
+
+        Args:
+            houses: Dicts with house_id and house_data, optionally
+                enrichment_data and market_metrics
+            apify_dataset_id: Optional Apify dataset ID for metadata
+            batch_client: Client to submit with (default: uses ANTHROPIC_API_KEY)
+            poll_interval: Seconds between batch status checks
+            timeout: Give up waiting after this many seconds in total
+            batch_ids: Collect the results of batches submitted earlier for
+                the same houses instead of submitting (and paying) again
+            on_submitted: Called with the batch ids right after submitting,
+                before waiting, so they can be saved for a resume
+
+        Returns:
+            Analysis result per house, in input order; the exception for
+            houses that failed
+
+        Raises:
+            TimeoutError: If the batches are still processing after timeout
+                (they keep running; resume with batch_ids)
+        """
+        cached = self.llm if isinstance(self.llm, CachedLLM) else None
+        llm = cached.llm if cached else self.llm
+        if llm.provider != "claude":
+            raise ValueError(f"Message batches require the claude provider, not {llm.provider}")
+        if self.per_category:
+            raise ValueError("Message batches don't support per-category analysis")
+
+        start_time = time.time()
+
+        # Results that need no batch request: fast rejections and houses screened out
+        local_results: Dict[str, Dict[str, Any]] = {}
+        for house in houses:
+            rejection = self._fast_rejection(house["house_data"], house["house_id"])
+            if rejection is not None:
+                local_results[house["house_id"]] = self._result_from_data(
+                    house["house_id"], rejection, start_time, apify_dataset_id, llm_model="red_flags"
+                )
+
+        # Cascade: screen with direct calls (small and fast), batch only the houses that pass
+        screenings: Dict[str, Dict[str, Any]] = {}
+        if self.cascade_threshold is not None:
+            screenings = asyncio.run(self._screen_many_async(
+                [house for house in houses if house["house_id"] not in local_results],
+                start_time, apify_dataset_id
+            ))
+            local_results.update(
+                (house_id, screening) for house_id, screening in screenings.items()
+                if not screening["metadata"]["screening"]["passed"]
+            )
+
+        prompts = {
+            house["house_id"]: self._build_prompt(
+                house["house_id"], house["house_data"],
+                house.get("enrichment_data"), house.get("market_metrics")
+            )
+            for house in houses
+            if house["house_id"] not in local_results
+        }
+
+        responses: Dict[str, Any] = {}
+        if cached:
+            for house_id, prompt in prompts.items():
+                response = cached.lookup(prompt)
+                if response is not None:
+                    responses[house_id] = response
+
+        requests = [
+            {"custom_id": house_id, "params": llm.request_body(prompt)}
+            for house_id, prompt in prompts.items()
+            if house_id not in responses
+        ]
+        if requests:
+            print(f"Analyzing {len(requests)} houses in a {self.llm_provider} message batch...")
+            client = batch_client or MessageBatchClient(api_key=llm.api_key, api_url=f"{llm.api_url}/batches")
+            batch_responses = client.run(
+                requests, poll_interval=poll_interval, timeout=timeout,
+                batch_ids=batch_ids, on_submitted=on_submitted
+            )
+            for house_id, response in batch_responses.items():
+                if house_id not in prompts:
+                    # A resumed batch may hold houses this run no longer sends
+                    # (now fast-rejected, screened out or not selected)
+                    print(f"   Skipping batch result for {house_id}: not requested in this run")
+                    continue
+                if cached and isinstance(response, str):
+                    cached.store(prompts[house_id], response)
+                responses[house_id] = response
+
+        results: List[Union[Dict[str, Any], Exception]] = []
+        for house in houses:
+            if house["house_id"] in local_results:
+                results.append(local_results[house["house_id"]])
+                continue
+
+            response = responses[house["house_id"]]
+            if isinstance(response, Exception):
+                results.append(response)
+                continue
+            try:
+                result = self._build_result(
+                    house["house_id"], response, start_time, apify_dataset_id, prompts[house["house_id"]]
+                )
+                results.append(self._add_screening(result, screenings.get(house["house_id"])))
+            except ValueError as e:
+                results.append(e)
+
+        return results
+
+    def _build_prompt(
+        self,
+        house_id: str,
+        house_data: Dict[str, Any],
+        enrichment_data: Optional[Dict[str, Any]],
+        market_metrics: Optional[Dict[str, Any]]
+    ) -> str:
+        """Build the analysis prompt and report sections trimmed to fit the budget."""
         prompt = self.rules.get_analysis_prompt(
             house_data,
             enrichment_data=enrichment_data,
             market_metrics=market_metrics
         )
 
-        # Get LLM analysis
-        print(f"Analyzing house {house_id} using {self.llm_provider}...")
-        llm_response = self.llm.analyze(prompt)
+        trimmed = getattr(prompt, "trimmed", None)
+        if trimmed:
+            print(f"✂️  Prompt for {house_id} trimmed to {prompt.budget} tokens: {', '.join(trimmed)}")
+        return prompt
 
-        # Parse response
+    def _build_screening_prompt(
+        self,
+        house_id: str,
+        house_data: Dict[str, Any],
+        enrichment_data: Optional[Dict[str, Any]],
+        market_metrics: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Screening prompt if the cascade is on and the rules support it."""
+        if self.screening_llm is None:
+            return None
+
+        prompt = self.rules.get_screening_prompt(
+            house_data,
+            enrichment_data=enrichment_data,
+            market_metrics=market_metrics
+        )
+        if prompt is None:
+            print(f"⚠️  Rules {self.rules.version} have no screening prompt, running the full analysis")
+            return None
+
+        print(f"🔎 Screening house {house_id} using {self.llm_provider} ({self.screening_llm.model})...")
+        return prompt
+
+    def _screening_result(
+        self,
+        house_id: str,
+        llm_response: Union[str, Exception],
+        start_time: float,
+        apify_dataset_id: Optional[str],
+        prompt: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Analysis result from the screening response, with metadata.screening.
+
+        Returns None if the screening call failed; the full analysis then
+        runs as if the cascade were off.
+        """
+        if not isinstance(llm_response, Exception):
+            try:
+                result = self._build_result(house_id, llm_response, start_time, apify_dataset_id, prompt)
+            except ValueError as e:
+                llm_response = e
+        if isinstance(llm_response, Exception):
+            print(f"⚠️  Screening of {house_id} failed, running the full analysis: {llm_response}")
+            return None
+
+        score = result["overall_score"]
+        passed = score > self.cascade_threshold
+        result["metadata"]["llm_model"] = "screening"
+        result["metadata"]["screening"] = {
+            "model": self.screening_llm.model,
+            "overall_score": score,
+            "threshold": self.cascade_threshold,
+            "passed": passed,
+        }
+
+        verdict = "running full analysis" if passed else "keeping screening result"
+        print(f"🔎 House {house_id} screened at {score} (threshold {self.cascade_threshold}): {verdict}")
+        return result
+
+    async def _screen_many_async(
+        self,
+        houses: List[Dict[str, Any]],
+        start_time: float,
+        apify_dataset_id: Optional[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Screen several houses concurrently; house_id -> screening result (failed screenings left out)."""
+        async def screen(house: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            prompt = self._build_screening_prompt(
+                house["house_id"], house["house_data"],
+                house.get("enrichment_data"), house.get("market_metrics")
+            )
+            if prompt is None:
+                return None
+            try:
+                response = await self.screening_llm.analyze_async(prompt)
+            except Exception as e:
+                response = e
+            return self._screening_result(house["house_id"], response, start_time, apify_dataset_id, prompt)
+
+        screenings = await asyncio.gather(*(screen(house) for house in houses))
+        return {
+            house["house_id"]: screening
+            for house, screening in zip(houses, screenings)
+            if screening is not None
+        }
+
+    def _add_screening(self, result: Dict[str, Any], screening: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Record the screening that let a house through in the full analysis metadata."""
+        if screening is not None:
+            result["metadata"]["screening"] = screening["metadata"]["screening"]
+        return result
+
+    def _build_category_prompts(
+        self,
+        house_id: str,
+        house_data: Dict[str, Any],
+        enrichment_data: Optional[Dict[str, Any]],
+        market_metrics: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, str]]:
+        """Per-category prompts if per_category is on and the rules support it."""
+        if not self.per_category:
+            return None
+
+        prompts = self.rules.get_category_prompts(
+            house_data,
+            enrichment_data=enrichment_data,
+            market_metrics=market_metrics
+        )
+        if prompts is None:
+            print(f"⚠️  Rules {self.rules.version} have no per-category mode, using a single prompt")
+            return None
+
+        print(f"Analyzing house {house_id} using {self.llm_provider} ({len(prompts)} categories in parallel)...")
+        return prompts
+
+    async def _analyze_categories_async(
+        self,
+        house_id: str,
+        house_data: Dict[str, Any],
+        category_prompts: Dict[str, str],
+        start_time: float,
+        apify_dataset_id: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Analyze the categories concurrently, then run the synthesis call.
+
+        Latency is bounded by the slowest category instead of one long
+        generation. Rules without a synthesis prompt get the overall score
+        from the category scores only.
+        """
+        responses = await asyncio.gather(*(self.llm.analyze_async(p) for p in category_prompts.values()))
+        category_scores = self._parse_category_responses(dict(zip(category_prompts, responses)))
+
+        prompts = dict(category_prompts)
+        synthesis_response = None
+        synthesis_prompt = self.rules.get_synthesis_prompt(house_data, category_scores)
+        if synthesis_prompt is not None:
+            synthesis_response = await self.llm.analyze_async(synthesis_prompt)
+            prompts["synthesis"] = synthesis_prompt
+
+        return self._build_category_result(
+            house_id, category_scores, synthesis_response, start_time, apify_dataset_id, prompts
+        )
+
+    def _fast_rejection(self, house_data: Dict[str, Any], house_id: str) -> Optional[Dict[str, Any]]:
+        """Locally built rejection if fast_reject is on and the rules reject the house."""
+        if not self.fast_reject:
+            return None
+
+        rejection = self.rules.fast_rejection(house_data)
+        if rejection is not None:
+            print(f"⛔ House {house_id} rejected on red flag dealbreakers, skipping {self.llm_provider}")
+        return rejection
+
+    def _build_result(
+        self,
+        house_id: str,
+        llm_response: str,
+        start_time: float,
+        apify_dataset_id: Optional[str] = None,
+        prompt: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Parse the LLM response and build the complete analysis result."""
+        analysis_data = self._parse_response(llm_response)
+        result = self._result_from_data(house_id, analysis_data, start_time, apify_dataset_id)
+
+        # Per-section prompt size (rules that build sectioned prompts)
+        if hasattr(prompt, "breakdown"):
+            result["metadata"]["prompt"] = prompt.breakdown()
+
+        # Red flag evidence the prompt was built with
+        if getattr(prompt, "red_flags", None) is not None:
+            result["red_flags"] = prompt.red_flags
+
+        return result
+
+    def _build_category_result(
+        self,
+        house_id: str,
+        category_scores: Dict[str, Any],
+        synthesis_response: Optional[str],
+        start_time: float,
+        apify_dataset_id: Optional[str],
+        prompts: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """Merge per-category analyses and the synthesis (if any) into the complete analysis result."""
+        synthesis = self._parse_response(synthesis_response) if synthesis_response is not None else {}
+        analysis_data = self.rules.merge_category_analyses(category_scores, synthesis)
+        result = self._result_from_data(house_id, analysis_data, start_time, apify_dataset_id)
+
+        result["metadata"]["llm_calls"] = len(prompts)
+        result["metadata"]["prompts"] = {
+            name: prompt.breakdown() for name, prompt in prompts.items() if hasattr(prompt, "breakdown")
+        }
+
+        # Every prompt carries the same red flag evidence
+        evidence = next((p.red_flags for p in prompts.values() if getattr(p, "red_flags", None) is not None), None)
+        if evidence is not None:
+            result["red_flags"] = evidence
+        return result
+
+    def _parse_category_responses(self, responses: Dict[str, str]) -> Dict[str, Any]:
+        """Parse per-category responses into category name -> category analysis."""
+        category_scores = {}
+        for name, response in responses.items():
+            data = self._parse_response(response)
+            # Accept the bare category object as well as the wrapped format the prompt asks for
+            category = data.get("category_scores", {}).get(name, data if "score" in data else None)
+            if category is None:
+                raise ValueError(f"LLM response for category {name} has no {name} analysis\n{response}")
+            category_scores[name] = category
+        return category_scores
+
+    def _parse_response(self, llm_response: str) -> Dict[str, Any]:
+        """Parse an LLM response as JSON (optionally in a markdown code block)."""
         try:
             # Extract JSON from response (handle markdown code blocks)
             response_text = llm_response.strip()
@@ -262,6 +1131,17 @@ class HouseAnalysisAgent:
         except json.JSONDecodeError as e:
             raise ValueError(f"Failed to parse LLM response as JSON: {e}\n{llm_response}")
 
+        return analysis_data
+
+    def _result_from_data(
+        self,
+        house_id: str,
+        analysis_data: Dict[str, Any],
+        start_time: float,
+        apify_dataset_id: Optional[str] = None,
+        llm_model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the complete analysis result from parsed analysis data."""
         # Calculate overall score
         category_scores = analysis_data.get("category_scores", {})
         score_values = {
@@ -283,10 +1163,16 @@ class HouseAnalysisAgent:
             "investment_recommendation": analysis_data.get("investment_recommendation", ""),
             "metadata": {
                 "processing_time_seconds": round(time.time() - start_time, 2),
-                "llm_model": self.llm_provider,
+                "llm_model": llm_model or self.llm_provider,
             }
         }
 
+        # Optional fields of the v2.0.0 output format (shown in the markdown report),
+        # and the red flag evidence of a fast rejection
+        for field in ("action_plan", "scale_up_potential", "red_flags"):
+            if analysis_data.get(field):
+                result[field] = analysis_data[field]
+
         if apify_dataset_id:
             result["metadata"]["apify_dataset_id"] = apify_dataset_id
 
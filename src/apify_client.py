@@ -2,12 +2,102 @@
 
 import os
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import urllib.request
 import urllib.error
 import urllib.parse
 
+from .request_scheduler import send
+
+
+# Possible ID fields to check (common patterns in Funda/property datasets)
+ID_FIELDS = [
+    "id",
+    "house_id",
+    "globalId",
+    "makelaarId",
+    "objectId",
+    "propertyId",
+    "advertentieId",
+    "internalId"
+]
+
+# Nested field paths to check (for Funda API structure)
+NESTED_ID_FIELDS = [
+    ("Identifiers", "TinyId"),
+    ("Identifiers", "GlobalId"),
+    ("sitemapData", "propertyId"),
+]
+
+# Top-level fields needed to match an item (Apify only projects top-level fields)
+MATCH_FIELDS = ID_FIELDS + ["Identifiers", "sitemapData", "url", "Urls"]
+
+# Items per page when scanning a dataset for a house
+PAGE_SIZE = 1000
+
+
+def _item_url(item: Dict[str, Any]) -> str:
+    """Get the listing URL of an item (plain 'url' or Urls.FriendlyUrl.FullUrl)."""
+    url = item.get("url", "")
+    if not url and isinstance(item.get("Urls"), dict):
+        friendly_url = item.get("Urls", {}).get("FriendlyUrl", {})
+        url = friendly_url.get("FullUrl", "") if isinstance(friendly_url, dict) else ""
+    return str(url or "")
+
+
+def item_ids(item: Dict[str, Any]) -> List[str]:
+    """
+    Collect every identifier a house can be requested by.
+
+    Args:
+        item: Dataset item (may be projected to MATCH_FIELDS)
+
+    Returns:
+        Root ID fields, nested ID fields and numeric URL path segments
+        (e.g. the TinyId in .../huis-krimweg-140-a65/43017473/), as strings
+    """
+    ids = []
+
+    # Root-level ID fields
+    for field in ID_FIELDS:
+        field_value = item.get(field)
+        if field_value is not None:
+            ids.append(str(field_value))
+
+    # Nested ID fields (e.g., Identifiers.TinyId)
+    for parent, child in NESTED_ID_FIELDS:
+        parent_obj = item.get(parent, {})
+        if isinstance(parent_obj, dict):
+            field_value = parent_obj.get(child)
+            if field_value is not None:
+                ids.append(str(field_value))
+
+    # Ids in the listing URL
+    path = urllib.parse.urlparse(_item_url(item)).path
+    ids.extend(segment for segment in path.split("/") if segment.isdigit())
+
+    return ids
+
+
+class _DatasetIds:
+    """Id -> item offset map of one Apify dataset, filled while paging."""
+
+    def __init__(self):
+        self.offsets: Dict[str, int] = {}
+        self.next_offset = 0      # First item not scanned yet
+        self.complete = False     # Whole dataset scanned
+        self.sample: Optional[Dict[str, Any]] = None
+
+    def add_page(self, items: List[Dict[str, Any]], offset: int) -> None:
+        if self.sample is None and items:
+            self.sample = items[0]
+        for position, item in enumerate(items):
+            for house_id in item_ids(item):
+                # First occurrence wins, like the local dataset index
+                self.offsets.setdefault(house_id, offset + position)
+        self.next_offset = offset + len(items)
+
 
 class ApifyClient:
     """Client for interacting with Apify API."""
@@ -27,11 +117,15 @@ class ApifyClient:
 
         self.base_url = "https://api.apify.com/v2"
 
+        # Per-dataset id -> offset maps, reused across lookups
+        self._dataset_ids: Dict[str, _DatasetIds] = {}
+
     def _make_request(
         self,
         method: str,
         endpoint: str,
-        data: Optional[Dict] = None
+        data: Optional[Dict] = None,
+        params: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Make HTTP request to Apify API.
@@ -40,6 +134,7 @@ class ApifyClient:
             method: HTTP method (GET, POST, PUT, etc.)
             endpoint: API endpoint path
             data: Optional request body data
+            params: Optional query string parameters
 
         Returns:
             Response JSON data
@@ -49,9 +144,11 @@ class ApifyClient:
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
 
-        # Add token to URL
+        # Add query parameters and token to URL
+        query = dict(params or {})
+        query["token"] = self.api_token
         separator = "&" if "?" in url else "?"
-        url = f"{url}{separator}token={self.api_token}"
+        url = f"{url}{separator}{urllib.parse.urlencode(query)}"
 
         headers = {
             "Content-Type": "application/json",
@@ -70,9 +167,8 @@ class ApifyClient:
         )
 
         try:
-            with urllib.request.urlopen(req, timeout=30) as response:
-                response_data = response.read()
-                return json.loads(response_data.decode('utf-8'))
+            response_data = send(req, timeout=30)
+            return json.loads(response_data.decode('utf-8'))
         except urllib.error.HTTPError as e:
             error_body = e.read().decode('utf-8')
             raise Exception(
@@ -81,86 +177,158 @@ class ApifyClient:
         except urllib.error.URLError as e:
             raise Exception(f"Network error connecting to Apify: {e.reason}")
 
+    def get_dataset_items(
+        self,
+        dataset_id: str,
+        offset: int = 0,
+        limit: int = PAGE_SIZE,
+        fields: Optional[List[str]] = None,
+        clean: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch one page of dataset items.
+
+        Args:
+            dataset_id: Apify dataset ID
+            offset: Number of items to skip
+            limit: Maximum number of items to return
+            fields: Optional top-level fields to return (others are omitted)
+            clean: Skip empty items and hidden fields (like the export does)
+
+        Returns:
+            List of items (shorter than limit on the last page)
+        """
+        params: Dict[str, Any] = {"offset": offset, "limit": limit}
+        if fields:
+            params["fields"] = ",".join(fields)
+        if clean:
+            params["clean"] = "true"
+
+        response = self._make_request("GET", f"datasets/{dataset_id}/items", params=params)
+        return response if isinstance(response, list) else response.get("data", [])
+
+    def get_dataset_item_count(self, dataset_id: str) -> int:
+        """
+        Get the number of items in a dataset.
+
+        Args:
+            dataset_id: Apify dataset ID
+
+        Returns:
+            Item count reported by the dataset metadata
+        """
+        response = self._make_request("GET", f"datasets/{dataset_id}")
+        return int(response.get("data", response).get("itemCount", 0))
+
+    def resolve_ids(
+        self,
+        dataset_id: str,
+        house_ids: List[str],
+        page_size: int = PAGE_SIZE
+    ) -> Dict[str, Optional[int]]:
+        """
+        Resolve house ids to dataset item offsets.
+
+        Pages of id fields are fetched only until every id is known; the map
+        is kept on the client, so later lookups in the same dataset are
+        dictionary hits. Once the whole dataset was scanned, a missing id
+        first checks the item count, and only items appended since the last
+        scan are fetched.
+
+        Args:
+            dataset_id: Apify dataset ID
+            house_ids: Ids in any supported form (TinyId, GlobalId, ...)
+            page_size: Items per page while scanning
+
+        Returns:
+            Offset per requested id, None for ids not in the dataset
+        """
+        ids = self._dataset_ids.setdefault(dataset_id, _DatasetIds())
+        wanted = {str(house_id) for house_id in house_ids}
+
+        if ids.complete and not wanted.issubset(ids.offsets):
+            # Items may have been appended since the last scan
+            if self.get_dataset_item_count(dataset_id) > ids.next_offset:
+                ids.complete = False
+
+        while not ids.complete and not wanted.issubset(ids.offsets):
+            items = self.get_dataset_items(
+                dataset_id, ids.next_offset, page_size, fields=MATCH_FIELDS
+            )
+            ids.add_page(items, ids.next_offset)
+            if len(items) < page_size:
+                ids.complete = True
+
+        return {str(house_id): ids.offsets.get(str(house_id)) for house_id in house_ids}
+
+    def forget_dataset(self, dataset_id: str) -> None:
+        """Drop the cached id map of a dataset (e.g. after it was rewritten)."""
+        self._dataset_ids.pop(dataset_id, None)
+
+    def _fetch_at(self, dataset_id: str, offset: int, house_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch the full item at an offset if it is the requested house."""
+        items = self.get_dataset_items(dataset_id, offset, 1)
+        if items and str(house_id) in item_ids(items[0]):
+            return items[0]
+        return None
+
     def get_house_data(
         self,
         dataset_id: str,
-        house_id: str
+        house_id: str,
+        id_index: Optional[Any] = None,
+        page_size: int = PAGE_SIZE
     ) -> Optional[Dict[str, Any]]:
         """
         Fetch house data from Apify dataset.
 
+        The dataset is scanned in pages of id fields only and the scan stops
+        at the first match, so a lookup downloads one full item instead of
+        the whole dataset. Ids seen while scanning are remembered (see
+        resolve_ids), so repeated lookups don't scan again.
+
         Args:
             dataset_id: Apify dataset ID
             house_id: Unique identifier for the house
+            id_index: Optional local index of a copy of this dataset
+                (src.dataset.DatasetIndex); its record number is tried as
+                the item offset before scanning
+            page_size: Items per page while scanning
 
         Returns:
             House data dictionary or None if not found
         """
-        endpoint = f"datasets/{dataset_id}/items"
-
         try:
-            response = self._make_request("GET", endpoint)
-            items = response if isinstance(response, list) else response.get("data", [])
-
-            # Possible ID fields to check (common patterns in Funda/property datasets)
-            id_fields = [
-                "id",
-                "house_id",
-                "globalId",
-                "makelaarId",
-                "objectId",
-                "propertyId",
-                "advertentieId",
-                "internalId"
-            ]
-
-            # Nested field paths to check (for Funda API structure)
-            nested_fields = [
-                ("Identifiers", "TinyId"),
-                ("Identifiers", "GlobalId"),
-                ("sitemapData", "propertyId"),
-            ]
-
             print(f"🔍 Searching for house {house_id} in dataset {dataset_id}")
-            print(f"   Dataset contains {len(items)} items")
-
-            # Find the house by checking multiple possible ID fields
-            for idx, item in enumerate(items):
-                # Check root-level ID fields
-                for field in id_fields:
-                    field_value = item.get(field)
-                    if field_value is not None:
-                        # Try both string and integer comparison
-                        if str(field_value) == str(house_id):
-                            print(f"✅ Found house using field '{field}' = {field_value}")
-                            return item
-
-                # Check nested ID fields (e.g., Identifiers.TinyId)
-                for parent, child in nested_fields:
-                    parent_obj = item.get(parent, {})
-                    if isinstance(parent_obj, dict):
-                        field_value = parent_obj.get(child)
-                        if field_value is not None:
-                            # Try both string and integer comparison
-                            if str(field_value) == str(house_id):
-                                print(f"✅ Found house using nested field '{parent}.{child}' = {field_value}")
-                                return item
-
-                # Also check if the ID appears in the URL
-                url = item.get("url", "")
-                if not url and isinstance(item.get("Urls"), dict):
-                    friendly_url = item.get("Urls", {}).get("FriendlyUrl", {})
-                    url = friendly_url.get("FullUrl", "") if isinstance(friendly_url, dict) else ""
-
-                if house_id in str(url):
-                    print(f"✅ Found house by URL match: {url}")
+
+            # Local index hint: the synced copy keeps Apify's item order
+            known = self._dataset_ids.get(dataset_id)
+            if id_index is not None and (known is None or str(house_id) not in known.offsets):
+                record_no = id_index.lookup(house_id)
+                if record_no is not None:
+                    item = self._fetch_at(dataset_id, record_no, house_id)
+                    if item:
+                        print(f"✅ Found house at offset {record_no} using local index")
+                        return item
+                    print(f"   Local index offset {record_no} is outdated, scanning dataset")
+
+            offset = self.resolve_ids(dataset_id, [house_id], page_size)[str(house_id)]
+            if offset is not None:
+                item = self._fetch_at(dataset_id, offset, house_id)
+                if item is None:
+                    # Dataset changed since the id map was built
+                    self.forget_dataset(dataset_id)
+                    offset = self.resolve_ids(dataset_id, [house_id], page_size)[str(house_id)]
+                    item = self._fetch_at(dataset_id, offset, house_id) if offset is not None else None
+                if item:
+                    print(f"✅ Found house at offset {offset}")
                     return item
 
             # If not found, show debugging information
             print(f"❌ House {house_id} not found in dataset {dataset_id}")
             print(f"\n📋 Sample data structure from first item:")
-            if items:
-                sample = items[0]
+            sample = self._dataset_ids[dataset_id].sample
+            if sample:
                 available_fields = list(sample.keys())
                 print(f"   Available fields: {', '.join(available_fields[:20])}")
 
@@ -0,0 +1,838 @@
+"""Local access to the compressed Apify dataset (data/apify_dataset.json.gz).
+
+Listings added or changed since the dataset was last written are kept in a
+small delta file next to it (see src/dataset_sync.py); the readers in this
+module overlay it on the base dataset.
+"""
+
+import bisect
+import codecs
+import gzip
+import hashlib
+import json
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+DATASET_PATH = Path('data/apify_dataset.json.gz')
+INDEX_PATH = Path('data/apify_dataset.index.json.gz')
+
+# Records per independently compressed gzip member written by write_dataset()
+RECORDS_PER_BLOCK = 500
+
+# Bytes read per step while scanning the dataset
+_READ_CHUNK_SIZE = 1024 * 1024
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+_JSON_WHITESPACE = ' \t\n\r'
+
+
+def record_ids(record: Dict[str, Any]) -> List[str]:
+    """
+    Collect every identifier a listing can be looked up by.
+
+    Args:
+        record: Single Funda listing from the Apify dataset
+
+    Returns:
+        Unique ids as strings (TinyId, GlobalId, sitemapData.propertyId)
+    """
+    ids = []
+    identifiers = record.get('Identifiers')
+    if isinstance(identifiers, dict):
+        ids.extend([identifiers.get('TinyId'), identifiers.get('GlobalId')])
+
+    sitemap = record.get('sitemapData')
+    if isinstance(sitemap, dict):
+        ids.append(sitemap.get('propertyId'))
+
+    unique = []
+    for value in ids:
+        if value is not None and str(value) not in unique:
+            unique.append(str(value))
+    return unique
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    """
+    Content hash of a listing, independent of key order and formatting.
+
+    Args:
+        record: Single Funda listing
+
+    Returns:
+        Hex SHA-256 of the canonical JSON encoding
+    """
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def listing_key(record: Dict[str, Any]) -> Optional[str]:
+    """
+    Key that identifies a listing across dataset versions.
+
+    Args:
+        record: Single Funda listing
+
+    Returns:
+        TinyId (or the first other id) as string, None if the record has no id
+    """
+    ids = record_ids(record) if isinstance(record, dict) else []
+    return ids[0] if ids else None
+
+
+def delta_path_for(dataset_path: Path) -> Path:
+    """Path of the delta file belonging to a dataset (apify_dataset.delta.json.gz)."""
+    dataset_path = Path(dataset_path)
+    stem = dataset_path.name[:-len('.json.gz')] if dataset_path.name.endswith('.json.gz') else dataset_path.stem
+    return dataset_path.with_name(f"{stem}.delta.json.gz")
+
+
+def index_path_for(dataset_path: Path) -> Path:
+    """Path of the sidecar index belonging to a dataset (apify_dataset.index.json.gz)."""
+    dataset_path = Path(dataset_path)
+    stem = dataset_path.name[:-len('.json.gz')] if dataset_path.name.endswith('.json.gz') else dataset_path.stem
+    return dataset_path.with_name(f"{stem}.index.json.gz")
+
+
+def load_delta(dataset_path: Path = DATASET_PATH) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the listings changed since the dataset was written.
+
+    Args:
+        dataset_path: Base dataset (the delta file is found next to it)
+
+    Returns:
+        listing_key -> listing in delta order; empty if there is no delta
+    """
+    delta_path = delta_path_for(dataset_path)
+    if not delta_path.exists():
+        return {}
+
+    with gzip.open(delta_path, 'rt', encoding='utf-8') as f:
+        records = json.load(f)
+    return {listing_key(record): record for record in records if listing_key(record)}
+
+
+def _scan_records(stream: BinaryIO) -> Iterator[Tuple[int, int, Any]]:
+    """
+    Incrementally parse a top-level JSON array from a binary stream.
+
+    Only one record is held in memory at a time (plus one read chunk).
+
+    Args:
+        stream: Binary stream positioned at the start of the array
+
+    Yields:
+        (byte_offset, byte_length, record) for every array element, where the
+        offset and length refer to the decompressed JSON text
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0       # Index into buffer
+    byte_offset = 0    # Absolute byte offset of buffer[position]
+    eof = False
+    started = False
+
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        chunk = stream.read(_READ_CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + text_decoder.decode(chunk, final=eof)
+        position = 0
+        return not eof or bool(buffer)
+
+    def skip_whitespace() -> bool:
+        nonlocal position, byte_offset
+        while True:
+            while position < len(buffer) and buffer[position] in _JSON_WHITESPACE:
+                position += 1
+                byte_offset += 1
+            if position < len(buffer):
+                return True
+            if not fill():
+                return False
+
+    while True:
+        # Whitespace and separators are single-byte ASCII
+        if not skip_whitespace():
+            if not started:
+                raise ValueError("Dataset is empty, expected a JSON array")
+            raise ValueError("Unexpected end of dataset, array not terminated")
+
+        char = buffer[position]
+        if not started:
+            if char != '[':
+                raise ValueError("Dataset must be a JSON array of listings")
+            started = True
+            position += 1
+            byte_offset += 1
+            continue
+
+        if char == ']':
+            return
+        if char == ',':
+            position += 1
+            byte_offset += 1
+            continue
+
+        # Decode the next element; read more input until it is complete
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                if end < len(buffer) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+
+        length = len(buffer[position:end].encode('utf-8'))
+        yield byte_offset, length, record
+        byte_offset += length
+        position = end
+
+
+def project_record(record: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Keep only selected fields of a record.
+
+    Args:
+        record: Listing
+        fields: Dotted field paths, e.g. ['Identifiers.TinyId', 'AddressDetails.City']
+
+    Returns:
+        New dict with the same nesting, containing only the fields present
+    """
+    projected = {}
+    for field in fields:
+        *parents, leaf = field.split('.')
+
+        source = record
+        for key in parents:
+            source = source.get(key) if isinstance(source, dict) else None
+        if not isinstance(source, dict) or leaf not in source:
+            continue
+
+        target = projected
+        for key in parents:
+            target = target.setdefault(key, {})
+        target[leaf] = source[leaf]
+
+    return projected
+
+
+def _overlay_delta(
+    records: Iterable[Any],
+    delta: Dict[str, Dict[str, Any]],
+    fields: Optional[List[str]] = None
+) -> Iterator[Any]:
+    """
+    Replace listings that have a newer version in the delta, then append the
+    listings that only exist in the delta. Projection happens after the
+    replacement, since it needs the listing key.
+    """
+    remaining = dict(delta)
+    for record in records:
+        if remaining and isinstance(record, dict):
+            record = remaining.pop(listing_key(record), record)
+        if fields is not None and isinstance(record, dict):
+            record = project_record(record, fields)
+        yield record
+
+    for record in remaining.values():
+        yield project_record(record, fields) if fields is not None else record
+
+
+def iter_dataset_records(
+    dataset_path: Path = DATASET_PATH,
+    fields: Optional[Iterable[str]] = None,
+    include_delta: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream listings from the compressed dataset.
+
+    The top-level JSON array is parsed incrementally from the gzip stream, so
+    memory stays flat regardless of dataset size and a consumer that stops
+    early (e.g. at the first match) never reads the rest of the file.
+
+    Args:
+        dataset_path: Path to the compressed dataset
+        fields: Optional dotted field paths to keep (see project_record)
+        include_delta: Overlay the listings from the delta file (if any)
+
+    Yields:
+        Listings, projected to ``fields`` when given
+    """
+    fields = list(fields) if fields is not None else None
+    delta = load_delta(dataset_path) if include_delta else {}
+
+    with gzip.open(dataset_path, 'rb') as f:
+        records = (record for _, _, record in _scan_records(f))
+        yield from _overlay_delta(records, delta, fields)
+
+
+def _dataset_fingerprint(
+    dataset_path: Path,
+    blocks: Optional[List[List[int]]] = None
+) -> str:
+    """
+    Cheap content fingerprint of a gzip file.
+
+    Uses the file size plus the gzip trailer (CRC32 and length of the
+    decompressed data) of every member, which changes whenever the content
+    does, without hashing the full file.
+
+    Args:
+        dataset_path: Path to the gzip file
+        blocks: Block table when the file has multiple members
+    """
+    size = dataset_path.stat().st_size
+    member_ends = [offset + length for _, offset, length in blocks] if blocks else [size]
+
+    trailers = []
+    with open(dataset_path, 'rb') as f:
+        for end in member_ends:
+            f.seek(max(end - 8, 0))
+            trailers.append(f.read(8))
+
+    if len(trailers) == 1:
+        return f"{size}:{trailers[0].hex()}"
+    return f"{size}:{hashlib.sha1(b''.join(trailers)).hexdigest()}"
+
+
+def _gzip_members(dataset_path: Path) -> List[List[int]]:
+    """
+    Locate the members of a (multi-member) gzip file.
+
+    Args:
+        dataset_path: Path to the gzip file
+
+    Returns:
+        [uncompressed_start, compressed_offset, compressed_length] per member
+    """
+    members = []
+    decompressor = zlib.decompressobj(wbits=31)
+    consumed = 0              # Compressed bytes consumed so far
+    produced = 0              # Decompressed bytes produced so far
+    member_start = (0, 0)     # (uncompressed, compressed) start of current member
+    pending = b''
+
+    with open(dataset_path, 'rb') as f:
+        while True:
+            data = pending or f.read(_READ_CHUNK_SIZE)
+            pending = b''
+            if not data:
+                break
+
+            produced += len(decompressor.decompress(data))
+            if not decompressor.eof:
+                consumed += len(data)
+                continue
+
+            # Member finished; whatever is left belongs to the next one
+            consumed += len(data) - len(decompressor.unused_data)
+            members.append([member_start[0], member_start[1], consumed - member_start[1]])
+            member_start = (produced, consumed)
+            pending = decompressor.unused_data
+            decompressor = zlib.decompressobj(wbits=31)
+
+    return members
+
+
+class DatasetIndex:
+    """
+    Sidecar index mapping listing ids to record locations in the dataset.
+
+    Record locations are byte ranges in the decompressed JSON. For datasets
+    written by write_dataset() the index also holds a block table (one entry
+    per gzip member), so a record is read by decompressing only its block.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        dataset_path: Path,
+        offsets: List[List[int]],
+        ids: Dict[str, int],
+        fingerprint: str,
+        built_at: Optional[str] = None,
+        blocks: Optional[List[List[int]]] = None
+    ):
+        """
+        Initialize index.
+
+        Args:
+            dataset_path: Dataset the index was built from
+            offsets: [byte_offset, byte_length] per record in decompressed JSON
+            ids: Listing id (TinyId, GlobalId, propertyId) -> record number
+            fingerprint: Dataset fingerprint at build time
+            built_at: ISO timestamp of the build
+            blocks: [uncompressed_start, compressed_offset, compressed_length]
+                per gzip member, or None for a single gzip stream
+        """
+        self.dataset_path = Path(dataset_path)
+        self.offsets = offsets
+        self.ids = ids
+        self.fingerprint = fingerprint
+        self.built_at = built_at
+        self.blocks = blocks
+        self._block_starts = [block[0] for block in blocks] if blocks else []
+        self._cached_block: Tuple[int, bytes] = (-1, b'')
+        self._delta: Optional[Dict[str, Dict[str, Any]]] = None
+        self._delta_ids: Dict[str, str] = {}
+
+    @property
+    def delta(self) -> Dict[str, Dict[str, Any]]:
+        """Listings from the delta file next to the dataset (loaded once)."""
+        if self._delta is None:
+            self._delta = load_delta(self.dataset_path)
+            self._delta_ids = {
+                house_id: key
+                for key, record in self._delta.items()
+                for house_id in record_ids(record)
+            }
+        return self._delta
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @classmethod
+    def build(cls, dataset_path: Path = DATASET_PATH) -> 'DatasetIndex':
+        """
+        Build the index with a single streaming pass over the dataset.
+
+        Args:
+            dataset_path: Path to the gzip compressed dataset
+
+        Returns:
+            New index (not yet saved)
+        """
+        dataset_path = Path(dataset_path)
+        offsets = []
+        ids = {}
+
+        with gzip.open(dataset_path, 'rb') as f:
+            for record_no, (offset, length, record) in enumerate(_scan_records(f)):
+                offsets.append([offset, length])
+                if not isinstance(record, dict):
+                    continue
+                for house_id in record_ids(record):
+                    # First occurrence wins, like the linear scan it replaces
+                    ids.setdefault(house_id, record_no)
+
+        # A single gzip stream has no useful block table: seeking it still
+        # means decompressing everything before the record
+        members = _gzip_members(dataset_path)
+        blocks = members if len(members) > 1 else None
+
+        return cls(
+            dataset_path=dataset_path,
+            offsets=offsets,
+            ids=ids,
+            fingerprint=_dataset_fingerprint(dataset_path, blocks),
+            built_at=datetime.now(timezone.utc).isoformat(),
+            blocks=blocks
+        )
+
+    def save(self, index_path: Path = INDEX_PATH) -> Path:
+        """
+        Write the index as compressed JSON.
+
+        Args:
+            index_path: Destination path
+
+        Returns:
+            Path written to
+        """
+        index_path = Path(index_path)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+
+        data = {
+            'format_version': self.FORMAT_VERSION,
+            'dataset': self.dataset_path.name,
+            'fingerprint': self.fingerprint,
+            'built_at': self.built_at,
+            'record_count': len(self.offsets),
+            'offsets': self.offsets,
+            'ids': self.ids,
+            'blocks': self.blocks,
+        }
+
+        # Write atomically so concurrent readers never see a partial index
+        tmp_path = index_path.with_name(index_path.name + '.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+
+        return index_path
+
+    @classmethod
+    def load(
+        cls,
+        index_path: Path = INDEX_PATH,
+        dataset_path: Path = DATASET_PATH
+    ) -> Optional['DatasetIndex']:
+        """
+        Load a saved index if it matches the current dataset.
+
+        Args:
+            index_path: Path of the saved index
+            dataset_path: Dataset the index should describe
+
+        Returns:
+            Index, or None if missing, unreadable or stale
+        """
+        index_path = Path(index_path)
+        dataset_path = Path(dataset_path)
+
+        if not index_path.exists() or not dataset_path.exists():
+            return None
+
+        try:
+            with gzip.open(index_path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('format_version') != cls.FORMAT_VERSION:
+            return None
+        if data.get('fingerprint') != _dataset_fingerprint(dataset_path, data.get('blocks')):
+            return None
+
+        return cls(
+            dataset_path=dataset_path,
+            offsets=data['offsets'],
+            ids=data['ids'],
+            fingerprint=data['fingerprint'],
+            built_at=data.get('built_at'),
+            blocks=data.get('blocks')
+        )
+
+    def lookup(self, house_id: str) -> Optional[int]:
+        """Get the record number for a listing id, or None if unknown."""
+        return self.ids.get(str(house_id))
+
+    def _read_block(self, block_no: int) -> bytes:
+        """Decompress a single block (gzip member)."""
+        cached_no, cached_data = self._cached_block
+        if cached_no == block_no:
+            return cached_data
+
+        _, compressed_offset, compressed_length = self.blocks[block_no]
+        with open(self.dataset_path, 'rb') as f:
+            f.seek(compressed_offset)
+            data = zlib.decompress(f.read(compressed_length), wbits=31)
+
+        # Consecutive lookups often hit the same block (batch runs)
+        self._cached_block = (block_no, data)
+        return data
+
+    def _read_range(self, offset: int, length: int) -> bytes:
+        """Read a byte range of the decompressed JSON."""
+        if not self.blocks:
+            with gzip.open(self.dataset_path, 'rb') as f:
+                f.seek(offset)
+                return f.read(length)
+
+        parts = []
+        block_no = bisect.bisect_right(self._block_starts, offset) - 1
+        while length > 0 and block_no < len(self.blocks):
+            data = self._read_block(block_no)
+            start = offset - self._block_starts[block_no]
+            part = data[start:start + length]
+            parts.append(part)
+            offset += len(part)
+            length -= len(part)
+            block_no += 1
+
+        return b''.join(parts)
+
+    def read_record(self, record_no: int) -> Dict[str, Any]:
+        """
+        Read a single record without parsing the rest of the dataset.
+
+        Args:
+            record_no: Record number from lookup()
+
+        Returns:
+            Parsed listing
+        """
+        offset, length = self.offsets[record_no]
+        return json.loads(self._read_range(offset, length))
+
+    def get(self, house_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up and read a listing by any of its ids.
+
+        Args:
+            house_id: TinyId, GlobalId or sitemapData.propertyId
+
+        Returns:
+            Listing or None if not in the dataset
+        """
+        if self.delta:
+            key = self._delta_ids.get(str(house_id))
+            if key is not None:
+                return self.delta[key]
+
+        record_no = self.lookup(house_id)
+        if record_no is None:
+            return None
+        return self.read_record(record_no)
+
+    def _decode_block(self, block_no: int, fields: Optional[List[str]] = None) -> List[Any]:
+        """Decompress a block and parse (and project) every record that starts in it."""
+        block_start = self._block_starts[block_no]
+        block_end = (
+            self._block_starts[block_no + 1]
+            if block_no + 1 < len(self.blocks) else float('inf')
+        )
+        _, compressed_offset, compressed_length = self.blocks[block_no]
+        with open(self.dataset_path, 'rb') as f:
+            f.seek(compressed_offset)
+            data = zlib.decompress(f.read(compressed_length), wbits=31)
+
+        first = bisect.bisect_left(self.offsets, [block_start, 0])
+        records = []
+        for offset, length in self.offsets[first:]:
+            if offset >= block_end:
+                break
+            start = offset - block_start
+            if start + length <= len(data):
+                records.append(json.loads(data[start:start + length]))
+            else:
+                # Record continues in the next block
+                records.append(json.loads(self._read_range(offset, length)))
+
+        if fields is not None:
+            records = [
+                project_record(record, fields) if isinstance(record, dict) else record
+                for record in records
+            ]
+        return records
+
+    def iter_records(
+        self,
+        workers: int = 4,
+        fields: Optional[Iterable[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all records in dataset order.
+
+        For the block format, blocks are read ahead and decoded on a thread
+        pool (zlib releases the interpreter lock while decompressing); at
+        most ``2 * workers`` decoded blocks are held in memory. A single
+        gzip stream is parsed incrementally instead.
+
+        Args:
+            workers: Number of decoding threads (block format only)
+            fields: Optional dotted field paths to keep (see project_record),
+                applied before decoded blocks are queued
+
+        Yields:
+            Listings, with the delta file overlaid
+        """
+        fields = list(fields) if fields is not None else None
+
+        if not self.blocks:
+            yield from iter_dataset_records(self.dataset_path, fields)
+            return
+
+        # Projection must wait for the delta overlay when there is one
+        if self.delta:
+            yield from _overlay_delta(self._iter_blocks(workers), self.delta, fields)
+        else:
+            yield from self._iter_blocks(workers, fields)
+
+    def _iter_blocks(
+        self,
+        workers: int,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Decode all blocks in order on a thread pool with bounded read-ahead."""
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            next_block = 0
+            while pending or next_block < len(self.blocks):
+                while next_block < len(self.blocks) and len(pending) < 2 * workers:
+                    pending.append(executor.submit(self._decode_block, next_block, fields))
+                    next_block += 1
+                yield from pending.popleft().result()
+
+
+def write_dataset(
+    records: Iterable[Dict[str, Any]],
+    dataset_path: Path = DATASET_PATH,
+    index_path: Optional[Path] = INDEX_PATH,
+    records_per_block: int = RECORDS_PER_BLOCK
+) -> DatasetIndex:
+    """
+    Write the dataset in the seekable block format and save its index.
+
+    The output is a multi-member gzip file: every member holds a slice of the
+    JSON array with ``records_per_block`` complete records. Concatenated it is
+    still a regular gzip stream of one JSON array, so ``gunzip``, ``jq`` and
+    pako keep working, while the block table in the index allows random access
+    and parallel decoding.
+
+    Args:
+        records: Listings in dataset order (may be a generator)
+        dataset_path: Destination for the compressed dataset
+        index_path: Destination for the index (None to skip saving)
+        records_per_block: Records per gzip member
+
+    Returns:
+        Index of the written dataset
+    """
+    dataset_path = Path(dataset_path)
+    dataset_path.parent.mkdir(parents=True, exist_ok=True)
+
+    offsets = []
+    ids = {}
+    blocks = []
+    position = 0        # Uncompressed bytes written so far
+    block_start = 0
+    block_parts = []
+
+    tmp_path = dataset_path.with_name(dataset_path.name + '.tmp')
+    with open(tmp_path, 'wb') as out:
+
+        def flush_block():
+            nonlocal block_start
+            # mtime=0 keeps the output byte-identical for identical content
+            compressed = gzip.compress(b''.join(block_parts), compresslevel=9, mtime=0)
+            blocks.append([block_start, out.tell(), len(compressed)])
+            out.write(compressed)
+            block_parts.clear()
+            block_start = position
+
+        record_no = -1
+        for record_no, record in enumerate(records):
+            if record_no and record_no % records_per_block == 0:
+                flush_block()
+
+            separator = b'[' if record_no == 0 else b','
+            data = json.dumps(record, ensure_ascii=False).encode('utf-8')
+
+            block_parts.extend([separator, data])
+            offsets.append([position + len(separator), len(data)])
+            position += len(separator) + len(data)
+
+            if isinstance(record, dict):
+                for house_id in record_ids(record):
+                    ids.setdefault(house_id, record_no)
+
+        closing = b']' if record_no >= 0 else b'[]'
+        block_parts.append(closing)
+        position += len(closing)
+        flush_block()
+
+    os.replace(tmp_path, dataset_path)
+
+    blocks = blocks if len(blocks) > 1 else None
+    index = DatasetIndex(
+        dataset_path=dataset_path,
+        offsets=offsets,
+        ids=ids,
+        fingerprint=_dataset_fingerprint(dataset_path, blocks),
+        built_at=datetime.now(timezone.utc).isoformat(),
+        blocks=blocks
+    )
+    if index_path is not None:
+        index.save(index_path)
+
+    return index
+
+
+def convert_dataset(
+    source_path: Path,
+    dataset_path: Path = DATASET_PATH,
+    index_path: Optional[Path] = INDEX_PATH,
+    records_per_block: int = RECORDS_PER_BLOCK
+) -> DatasetIndex:
+    """
+    Convert a JSON array (plain or gzip, e.g. an Apify export) to the block format.
+
+    Records are streamed, so the source is never fully loaded in memory.
+    Converting a file in place is supported.
+
+    Args:
+        source_path: Plain or gzip compressed JSON array of listings
+        dataset_path: Destination for the compressed dataset
+        index_path: Destination for the index (None to skip saving)
+        records_per_block: Records per gzip member
+
+    Returns:
+        Index of the written dataset
+    """
+    source_path = Path(source_path)
+    with open(source_path, 'rb') as f:
+        compressed = f.read(2) == _GZIP_MAGIC
+
+    opener = gzip.open if compressed else open
+    with opener(source_path, 'rb') as f:
+        records = (record for _, _, record in _scan_records(f))
+        return write_dataset(records, dataset_path, index_path, records_per_block)
+
+
+def get_index(
+    dataset_path: Path = DATASET_PATH,
+    index_path: Path = INDEX_PATH,
+    rebuild: bool = True
+) -> Optional[DatasetIndex]:
+    """
+    Get an up-to-date index for the dataset.
+
+    Args:
+        dataset_path: Path to the compressed dataset
+        index_path: Path of the sidecar index
+        rebuild: Build and save a new index when missing or stale
+
+    Returns:
+        Index, or None if the dataset does not exist (or the index is stale
+        and rebuild is False)
+    """
+    index = DatasetIndex.load(index_path, dataset_path)
+    if index is not None or not rebuild or not Path(dataset_path).exists():
+        return index
+
+    index = DatasetIndex.build(dataset_path)
+    index.save(index_path)
+    return index
+
+
+def dataset_fingerprint(
+    dataset_path: Path = DATASET_PATH,
+    index_path: Path = INDEX_PATH
+) -> str:
+    """
+    Fingerprint identifying the current dataset content.
+
+    Uses the block-aware fingerprint of a current index when available and
+    includes the delta file.
+
+    Args:
+        dataset_path: Path to the compressed dataset
+        index_path: Path of the sidecar index
+
+    Returns:
+        Fingerprint string (changes whenever the dataset or its delta does)
+    """
+    index = DatasetIndex.load(index_path, dataset_path)
+    fingerprint = index.fingerprint if index is not None else _dataset_fingerprint(Path(dataset_path))
+
+    delta_path = delta_path_for(dataset_path)
+    if delta_path.exists():
+        fingerprint += f"+{_dataset_fingerprint(delta_path)}"
+    return fingerprint
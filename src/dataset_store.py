@@ -0,0 +1,381 @@
+"""SQLite-backed listing store built from the Apify dataset."""
+
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .dataset import (
+    DATASET_PATH,
+    INDEX_PATH,
+    dataset_fingerprint,
+    iter_dataset_records,
+    record_hash,
+)
+
+
+STORE_PATH = Path('data/apify_dataset.sqlite')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    tiny_id TEXT PRIMARY KEY,
+    global_id TEXT,
+    city TEXT,
+    province TEXT,
+    post_code TEXT,
+    latitude REAL,
+    longitude REAL,
+    price INTEGER,
+    bedrooms INTEGER,
+    publication_date TEXT,
+    is_sold_or_rented INTEGER,
+    content_hash TEXT NOT NULL,
+    record BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_listings_global_id ON listings (global_id);
+CREATE INDEX IF NOT EXISTS idx_listings_city ON listings (city);
+CREATE INDEX IF NOT EXISTS idx_listings_province ON listings (province);
+CREATE INDEX IF NOT EXISTS idx_listings_post_code ON listings (post_code);
+CREATE INDEX IF NOT EXISTS idx_listings_coordinates ON listings (latitude, longitude);
+CREATE INDEX IF NOT EXISTS idx_listings_price ON listings (price);
+CREATE INDEX IF NOT EXISTS idx_listings_bedrooms ON listings (bedrooms);
+CREATE INDEX IF NOT EXISTS idx_listings_publication_date ON listings (publication_date);
+CREATE INDEX IF NOT EXISTS idx_listings_sold ON listings (is_sold_or_rented);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_COLUMNS = (
+    'tiny_id', 'global_id', 'city', 'province', 'post_code',
+    'latitude', 'longitude', 'price', 'bedrooms', 'publication_date',
+    'is_sold_or_rented', 'content_hash', 'record',
+)
+
+# Rows written per transaction while syncing
+_SYNC_BATCH_SIZE = 1000
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """Parse ints that Funda sometimes delivers as strings ('3')."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _listing_row(record: Dict[str, Any], content_hash: str) -> Optional[Tuple]:
+    """
+    Build a listings row from a Funda record.
+
+    Returns:
+        Row tuple in _COLUMNS order, or None if the record has no TinyId
+    """
+    identifiers = record.get('Identifiers') or {}
+    tiny_id = identifiers.get('TinyId')
+    if tiny_id is None:
+        return None
+
+    address = record.get('AddressDetails') or {}
+    coordinates = record.get('Coordinates') or {}
+    price = record.get('Price') or {}
+    fast_view = record.get('FastView') or {}
+    global_id = identifiers.get('GlobalId')
+    is_sold = record.get('IsSoldOrRented')
+
+    blob = zlib.compress(
+        json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    )
+
+    return (
+        str(tiny_id),
+        str(global_id) if global_id is not None else None,
+        address.get('City'),
+        address.get('Province'),
+        address.get('PostCode'),
+        _to_float(coordinates.get('Latitude', address.get('Latitude'))),
+        _to_float(coordinates.get('Longitude', address.get('Longitude'))),
+        _to_int(price.get('NumericSellingPrice')),
+        _to_int(fast_view.get('NumberOfBedrooms')),
+        record.get('PublicationDate'),
+        int(is_sold) if is_sold is not None else None,
+        content_hash,
+        blob,
+    )
+
+
+class DatasetStore:
+    """
+    Local SQLite store of all listings with indexed query columns.
+
+    Full records are kept as zlib compressed JSON blobs; the columns hold the
+    fields needed to select listings (ids, location, price, bedrooms,
+    publication date, sold status).
+    """
+
+    def __init__(self, store_path: Path = STORE_PATH):
+        """
+        Open (and create if needed) the store.
+
+        Args:
+            store_path: SQLite database file
+        """
+        self.store_path = Path(store_path)
+        self.store_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Shared between worker threads; sqlite3 serializes access internally
+        self._conn = sqlite3.connect(str(self.store_path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> 'DatasetStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def sync(
+        self,
+        dataset_path: Path = DATASET_PATH,
+        index_path: Path = INDEX_PATH,
+        force: bool = False
+    ) -> Dict[str, int]:
+        """
+        Bring the store up to date with the compressed dataset.
+
+        Only listings whose content hash changed are rewritten and listings
+        that left the dataset are deleted. Nothing is read when the dataset
+        fingerprint matches the last sync.
+
+        Args:
+            dataset_path: Path to the compressed dataset
+            index_path: Path of the sidecar index (used for the fingerprint)
+            force: Re-check every listing even if the dataset looks unchanged
+
+        Returns:
+            Counts of added, updated, deleted and unchanged listings
+        """
+        stats = {'added': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+        fingerprint = dataset_fingerprint(dataset_path, index_path)
+        if not force and self._get_meta('dataset_fingerprint') == fingerprint:
+            stats['unchanged'] = len(self)
+            return stats
+
+        with self._lock:
+            known = dict(self._conn.execute("SELECT tiny_id, content_hash FROM listings"))
+            seen = set()
+            batch = []
+
+            def flush():
+                if batch:
+                    placeholders = ', '.join('?' * len(_COLUMNS))
+                    with self._conn:
+                        self._conn.executemany(
+                            f"INSERT OR REPLACE INTO listings ({', '.join(_COLUMNS)}) "
+                            f"VALUES ({placeholders})",
+                            batch
+                        )
+                    batch.clear()
+
+            for record in iter_dataset_records(dataset_path):
+                if not isinstance(record, dict):
+                    continue
+
+                tiny_id = (record.get('Identifiers') or {}).get('TinyId')
+                if tiny_id is None or str(tiny_id) in seen:
+                    continue  # First occurrence wins, like the index
+                tiny_id = str(tiny_id)
+                seen.add(tiny_id)
+
+                content_hash = record_hash(record)
+
+                if known.get(tiny_id) == content_hash:
+                    stats['unchanged'] += 1
+                    continue
+
+                row = _listing_row(record, content_hash)
+                stats['updated' if tiny_id in known else 'added'] += 1
+                batch.append(row)
+                if len(batch) >= _SYNC_BATCH_SIZE:
+                    flush()
+
+            flush()
+
+            removed = [(tiny_id,) for tiny_id in known if tiny_id not in seen]
+            with self._conn:
+                self._conn.executemany("DELETE FROM listings WHERE tiny_id = ?", removed)
+                self._set_meta('dataset_fingerprint', fingerprint)
+                self._set_meta('synced_at', datetime.now(timezone.utc).isoformat())
+            stats['deleted'] = len(removed)
+
+        return stats
+
+    def get(self, house_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a listing by TinyId or GlobalId.
+
+        Args:
+            house_id: TinyId or GlobalId
+
+        Returns:
+            Full listing or None if not in the store
+        """
+        row = self._conn.execute(
+            "SELECT record FROM listings WHERE tiny_id = ? OR global_id = ? LIMIT 1",
+            (str(house_id), str(house_id))
+        ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def _where(
+        self,
+        city: Optional[str] = None,
+        province: Optional[str] = None,
+        post_code_prefix: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        min_bedrooms: Optional[int] = None,
+        published_since: Optional[str] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        include_sold: bool = False
+    ) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause shared by find() and find_ids()."""
+        clauses = []
+        params: List[Any] = []
+
+        if city is not None:
+            clauses.append("city = ?")
+            params.append(city)
+        if province is not None:
+            clauses.append("province = ?")
+            params.append(province)
+        if post_code_prefix is not None:
+            clauses.append("post_code LIKE ?")
+            params.append(post_code_prefix.replace(' ', '') + '%')
+        if min_price is not None:
+            clauses.append("price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            clauses.append("price <= ?")
+            params.append(max_price)
+        if min_bedrooms is not None:
+            clauses.append("bedrooms >= ?")
+            params.append(min_bedrooms)
+        if published_since is not None:
+            clauses.append("publication_date >= ?")
+            params.append(published_since)
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            clauses.append("latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?")
+            params.extend([min_lat, max_lat, min_lon, max_lon])
+        if not include_sold:
+            clauses.append("COALESCE(is_sold_or_rented, 0) = 0")
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def find_ids(self, limit: Optional[int] = None, **filters) -> List[str]:
+        """
+        Find TinyIds of listings matching the filters.
+
+        Args:
+            limit: Maximum number of ids
+            **filters: city, province, post_code_prefix, min_price, max_price,
+                min_bedrooms, published_since, bbox (min_lat, min_lon, max_lat,
+                max_lon), include_sold
+
+        Returns:
+            TinyIds ordered by price
+        """
+        where, params = self._where(**filters)
+        sql = f"SELECT tiny_id FROM listings {where} ORDER BY price"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row[0] for row in self._conn.execute(sql, params)]
+
+    def find(self, limit: Optional[int] = None, **filters) -> Iterator[Dict[str, Any]]:
+        """
+        Find full listings matching the filters (see find_ids).
+
+        Yields:
+            Listings ordered by price
+        """
+        where, params = self._where(**filters)
+        sql = f"SELECT record FROM listings {where} ORDER BY price"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for (blob,) in self._conn.execute(sql, params):
+            yield json.loads(zlib.decompress(blob))
+
+    def cities(self) -> List[Dict[str, Any]]:
+        """
+        List unique cities with province and coordinates of one listing.
+
+        Returns:
+            Dicts with city, province, latitude and longitude
+        """
+        rows = self._conn.execute(
+            "SELECT city, province, latitude, longitude FROM listings "
+            "WHERE rowid IN ("
+            "  SELECT MIN(rowid) FROM listings "
+            "  WHERE city IS NOT NULL AND province IS NOT NULL "
+            "  AND latitude IS NOT NULL AND longitude IS NOT NULL "
+            "  GROUP BY city"
+            ") ORDER BY city"
+        )
+        return [
+            {'city': city, 'province': province, 'latitude': lat, 'longitude': lon}
+            for city, province, lat, lon in rows
+        ]
+
+
+def get_store(
+    store_path: Path = STORE_PATH,
+    dataset_path: Path = DATASET_PATH,
+    sync: bool = True
+) -> DatasetStore:
+    """
+    Open the listing store, syncing it with the dataset first.
+
+    Args:
+        store_path: SQLite database file
+        dataset_path: Path to the compressed dataset
+        sync: Incrementally sync when the dataset changed
+
+    Returns:
+        Open store
+    """
+    store = DatasetStore(store_path)
+    if sync and Path(dataset_path).exists():
+        store.sync(dataset_path)
+    return store
@@ -0,0 +1,357 @@
+"""Incremental sync of the Apify dataset into data/apify_dataset.json.gz."""
+
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .dataset import (
+    DATASET_PATH,
+    INDEX_PATH,
+    delta_path_for,
+    get_index,
+    iter_dataset_records,
+    listing_key,
+    load_delta,
+    record_hash,
+    write_dataset,
+)
+
+
+DATASET_ID = 'Yb4fTMJ9wQsuyZf3L'
+MANIFEST_PATH = Path('data/apify_dataset.manifest.json.gz')
+
+# Items fetched per API request
+PAGE_SIZE = 1000
+
+# Fold the delta into the base dataset once it holds this share of listings
+COMPACT_RATIO = 0.1
+
+# Hex digits of record_hash() kept per listing in the manifest
+_HASH_LENGTH = 16
+
+
+class SyncManifest:
+    """
+    State of the last sync: how far the Apify dataset was read, which base
+    dataset the delta applies to, and a content hash per listing.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        dataset_id: str,
+        item_offset: int = 0,
+        base_fingerprint: Optional[str] = None,
+        hashes: Optional[Dict[str, str]] = None,
+        synced_at: Optional[str] = None
+    ):
+        """
+        Initialize manifest.
+
+        Args:
+            dataset_id: Apify dataset ID
+            item_offset: Number of Apify items already synced
+            base_fingerprint: Fingerprint of the base dataset the delta belongs to
+            hashes: listing_key -> truncated record_hash of the current version
+            synced_at: ISO timestamp of the last sync
+        """
+        self.dataset_id = dataset_id
+        self.item_offset = item_offset
+        self.base_fingerprint = base_fingerprint
+        self.hashes = hashes or {}
+        self.synced_at = synced_at
+
+    @classmethod
+    def load(cls, manifest_path: Path = MANIFEST_PATH) -> Optional['SyncManifest']:
+        """
+        Load a saved manifest.
+
+        Returns:
+            Manifest, or None if missing, unreadable or of another format
+        """
+        manifest_path = Path(manifest_path)
+        if not manifest_path.exists():
+            return None
+
+        try:
+            with gzip.open(manifest_path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('format_version') != cls.FORMAT_VERSION:
+            return None
+
+        return cls(
+            dataset_id=data['dataset_id'],
+            item_offset=data['item_offset'],
+            base_fingerprint=data.get('base_fingerprint'),
+            hashes=data.get('hashes'),
+            synced_at=data.get('synced_at')
+        )
+
+    def save(self, manifest_path: Path = MANIFEST_PATH) -> Path:
+        """Write the manifest as compressed JSON (sorted, so git deltas stay small)."""
+        data = {
+            'format_version': self.FORMAT_VERSION,
+            'dataset_id': self.dataset_id,
+            'item_offset': self.item_offset,
+            'base_fingerprint': self.base_fingerprint,
+            'synced_at': self.synced_at,
+            'hashes': dict(sorted(self.hashes.items())),
+        }
+        _write_json_gz(data, manifest_path)
+        return Path(manifest_path)
+
+    def update(self, record: Dict[str, Any]) -> Optional[str]:
+        """
+        Record the hash of a listing.
+
+        Args:
+            record: Listing as returned by Apify
+
+        Returns:
+            'added', 'changed' or 'unchanged'; None if the record has no id
+        """
+        key = listing_key(record)
+        if key is None:
+            return None
+
+        digest = record_hash(record)[:_HASH_LENGTH]
+        previous = self.hashes.get(key)
+        self.hashes[key] = digest
+
+        if previous is None:
+            return 'added'
+        return 'unchanged' if previous == digest else 'changed'
+
+
+def _write_json_gz(data: Any, path: Path) -> None:
+    """Write compressed JSON atomically; mtime=0 keeps unchanged content byte-identical."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(gzip.compress(payload, compresslevel=9, mtime=0))
+    os.replace(tmp_path, path)
+
+
+def write_delta(records: List[Dict[str, Any]], dataset_path: Path = DATASET_PATH) -> None:
+    """
+    Write (or remove, when empty) the delta file of a dataset.
+
+    Args:
+        records: Changed and added listings, latest version only
+        dataset_path: Base dataset the delta applies to
+    """
+    delta_path = delta_path_for(dataset_path)
+    if records:
+        _write_json_gz(records, delta_path)
+    elif delta_path.exists():
+        delta_path.unlink()
+
+
+def _iter_items(
+    client: Any,
+    dataset_id: str,
+    offset: int,
+    item_count: int,
+    page_size: int
+) -> Iterator[Dict[str, Any]]:
+    """Fetch dataset items from ``offset`` up to ``item_count`` page by page."""
+    while offset < item_count:
+        # With clean=true empty items are dropped, so a page can be short
+        # without being the last one
+        yield from client.get_dataset_items(dataset_id, offset, page_size, clean=True)
+        offset += page_size
+
+
+def compact_dataset(
+    dataset_path: Path = DATASET_PATH,
+    index_path: Path = INDEX_PATH,
+    manifest_path: Path = MANIFEST_PATH
+) -> int:
+    """
+    Fold the delta into the base dataset and remove the delta file.
+
+    Args:
+        dataset_path: Path to the compressed dataset
+        index_path: Path of the sidecar index
+        manifest_path: Sync manifest to point at the new base (if present)
+
+    Returns:
+        Number of listings in the new base dataset
+    """
+    index = write_dataset(iter_dataset_records(dataset_path), dataset_path, index_path)
+    write_delta([], dataset_path)
+
+    manifest = SyncManifest.load(manifest_path)
+    if manifest is not None:
+        manifest.base_fingerprint = index.fingerprint
+        manifest.save(manifest_path)
+
+    return len(index)
+
+
+def sync_dataset(
+    client: Any,
+    dataset_id: str = DATASET_ID,
+    dataset_path: Path = DATASET_PATH,
+    index_path: Path = INDEX_PATH,
+    manifest_path: Path = MANIFEST_PATH,
+    full: bool = False,
+    compact: bool = False,
+    compact_ratio: float = COMPACT_RATIO,
+    page_size: int = PAGE_SIZE
+) -> Dict[str, Any]:
+    """
+    Bring the local dataset up to date with Apify.
+
+    Normally only items appended to the Apify dataset since the last sync
+    are downloaded. Listings whose content hash differs from the manifest go
+    into the delta file; the base dataset is only rewritten when the delta
+    grows past ``compact_ratio`` of it, so git stores a small delta per sync
+    instead of the whole dataset.
+
+    A full download is done when there is no usable manifest, when the base
+    dataset was replaced, when the Apify dataset shrank, or when ``full`` is
+    set. It still writes only a delta unless listings were removed.
+
+    Args:
+        client: ApifyClient
+        dataset_id: Apify dataset ID
+        dataset_path: Path to the compressed dataset
+        index_path: Path of the sidecar index
+        manifest_path: Path of the sync manifest
+        full: Download and compare every item
+        compact: Fold the delta into the base dataset afterwards
+        compact_ratio: Delta size (as share of the base) that triggers compaction
+        page_size: Items per API request
+
+    Returns:
+        Sync statistics (mode, fetched, added, changed, unchanged, removed,
+        item_count, delta_size, compacted)
+    """
+    dataset_path = Path(dataset_path)
+    item_count = client.get_dataset_item_count(dataset_id)
+    stats: Dict[str, Any] = {
+        'mode': 'incremental', 'fetched': 0, 'added': 0, 'changed': 0,
+        'unchanged': 0, 'removed': 0, 'item_count': item_count,
+        'delta_size': 0, 'compacted': False,
+    }
+
+    index = get_index(dataset_path, index_path) if dataset_path.exists() else None
+    manifest = SyncManifest.load(manifest_path)
+
+    usable = (
+        index is not None and manifest is not None
+        and manifest.dataset_id == dataset_id
+        and manifest.base_fingerprint == index.fingerprint
+        and manifest.item_offset <= item_count
+    )
+
+    if usable and not full:
+        delta = load_delta(dataset_path)
+        items = _iter_items(client, dataset_id, manifest.item_offset, item_count, page_size)
+    else:
+        stats['mode'] = 'full'
+        manifest, delta, index = _full_sync(
+            client, dataset_id, dataset_path, index_path, item_count, page_size, index, stats
+        )
+        items = iter(())
+
+    for item in items:
+        stats['fetched'] += 1
+        status = manifest.update(item)
+        if status is None:
+            continue
+        stats[status] += 1
+        if status != 'unchanged':
+            delta[listing_key(item)] = item
+
+    if stats['added'] or stats['changed'] or stats['mode'] == 'full':
+        write_delta(list(delta.values()), dataset_path)
+
+    manifest.item_offset = item_count
+    manifest.base_fingerprint = index.fingerprint
+    manifest.synced_at = datetime.now(timezone.utc).isoformat()
+    manifest.save(manifest_path)
+
+    if delta and (compact or len(delta) > compact_ratio * max(len(index), 1)):
+        compact_dataset(dataset_path, index_path, manifest_path)
+        stats['compacted'] = True
+        delta = {}
+
+    stats['delta_size'] = len(delta)
+    return stats
+
+
+def _full_sync(
+    client: Any,
+    dataset_id: str,
+    dataset_path: Path,
+    index_path: Path,
+    item_count: int,
+    page_size: int,
+    index: Any,
+    stats: Dict[str, Any]
+):
+    """
+    Download the whole Apify dataset and diff it against the local copy.
+
+    The download is streamed into a new block-format file. It replaces the
+    base dataset only when there is no base yet or listings were removed;
+    otherwise it is discarded and the changes go into the delta.
+
+    Returns:
+        (manifest, delta, index of the base dataset)
+    """
+    # Hashes of what we have locally (base with delta overlaid)
+    local = SyncManifest(dataset_id)
+    if index is not None:
+        for record in iter_dataset_records(dataset_path):
+            if isinstance(record, dict):
+                local.update(record)
+
+    manifest = SyncManifest(dataset_id)
+    delta: Dict[str, Dict[str, Any]] = {}
+
+    def download():
+        for item in _iter_items(client, dataset_id, 0, item_count, page_size):
+            stats['fetched'] += 1
+            key = listing_key(item)
+            if key is not None:
+                manifest.update(item)
+                previous = local.hashes.get(key)
+                if previous is None:
+                    stats['added'] += 1
+                elif previous != manifest.hashes[key]:
+                    stats['changed'] += 1
+                else:
+                    stats['unchanged'] += 1
+                # Without a base the download itself becomes the base
+                if index is not None and previous != manifest.hashes[key]:
+                    delta[key] = item
+            yield item
+
+    tmp_path = dataset_path.with_name(dataset_path.name + '.download')
+    downloaded = write_dataset(download(), tmp_path, index_path=None)
+
+    removed = set(local.hashes) - set(manifest.hashes)
+    stats['removed'] = len(removed)
+
+    if index is None or removed:
+        os.replace(tmp_path, dataset_path)
+        downloaded.dataset_path = dataset_path
+        downloaded.save(index_path)
+        return manifest, {}, downloaded
+
+    tmp_path.unlink()
+    delta = {**load_delta(dataset_path), **delta}
+    return manifest, delta, index
@@ -0,0 +1,245 @@
+"""Anthropic Message Batches API client for bulk analyses."""
+
+import os
+import json
+import time
+import urllib.request
+import urllib.error
+from typing import Any, Callable, Dict, List, Optional
+
+from .request_scheduler import send
+
+
+BATCHES_URL = "https://api.anthropic.com/v1/messages/batches"
+
+# Seconds between status checks while a batch is processing
+POLL_INTERVAL = 60
+
+# Requests per submitted batch; the API limit is 100,000 requests or 256MB,
+# and v2.0.0 prompts are around 30KB each
+MAX_BATCH_REQUESTS = 5000
+
+
+class MessageBatchClient:
+    """
+    Submit many Messages API requests as one asynchronous batch.
+
+    Batches are processed within 24 hours (usually much sooner) at half the
+    price of individual requests.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, api_url: str = BATCHES_URL):
+        """
+        Initialize batch client.
+
+        Args:
+            api_key: Anthropic API key (default: ANTHROPIC_API_KEY)
+            api_url: Message Batches endpoint
+        """
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        if not self.api_key:
+            raise ValueError("ANTHROPIC_API_KEY environment variable required")
+
+        self.api_url = api_url.rstrip("/")
+
+    def _request(self, method: str, url: str, data: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        Make HTTP request to the Message Batches API.
+
+        Args:
+            method: HTTP method
+            url: Full request URL
+            data: Optional request body
+
+        Returns:
+            Raw response body
+
+        Raises:
+            Exception: If request fails
+        """
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json"
+        }
+
+        req = urllib.request.Request(
+            url,
+            data=json.dumps(data).encode('utf-8') if data is not None else None,
+            headers=headers,
+            method=method
+        )
+
+        try:
+            return send(req, timeout=300)
+        except urllib.error.HTTPError as e:
+            error_body = e.read().decode('utf-8')
+            raise Exception(f"Claude batch API error: {e.code} {e.reason}\n{error_body}")
+
+    def create(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Submit a batch.
+
+        Args:
+            requests: Dicts with custom_id and params (a /v1/messages body)
+
+        Returns:
+            Batch object (id, processing_status, request_counts, ...)
+        """
+        return json.loads(self._request("POST", self.api_url, {"requests": requests}))
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Get the current state of a batch.
+
+        Args:
+            batch_id: Batch ID from create()
+
+        Returns:
+            Batch object
+        """
+        return json.loads(self._request("GET", f"{self.api_url}/{batch_id}"))
+
+    def wait(
+        self,
+        batch_id: str,
+        poll_interval: float = POLL_INTERVAL,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Poll a batch until it has ended.
+
+        Args:
+            batch_id: Batch ID from create()
+            poll_interval: Seconds between status checks
+            timeout: Give up after this many seconds (default: wait for the
+                API's own 24 hour expiry)
+
+        Returns:
+            Ended batch object (with results_url)
+
+        Raises:
+            TimeoutError: If the batch is still processing after timeout
+        """
+        started = time.time()
+        while True:
+            batch = self.retrieve(batch_id)
+            if batch.get("processing_status") == "ended":
+                return batch
+
+            if timeout is not None and time.time() - started > timeout:
+                raise TimeoutError(f"Batch {batch_id} still {batch.get('processing_status')} after {timeout:.0f}s")
+
+            counts = batch.get("request_counts", {})
+            print(f"   Batch {batch_id}: {counts.get('processing', '?')} processing, "
+                  f"{counts.get('succeeded', 0)} succeeded, {counts.get('errored', 0)} errored")
+            time.sleep(poll_interval)
+
+    def results(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Download the results of an ended batch.
+
+        Args:
+            batch: Ended batch object from wait() or retrieve()
+
+        Returns:
+            custom_id -> response text for succeeded requests, or an
+            Exception describing why the request failed
+        """
+        results_url = batch.get("results_url")
+        if not results_url:
+            raise ValueError(f"Batch {batch.get('id')} has no results yet ({batch.get('processing_status')})")
+
+        results: Dict[str, Any] = {}
+        for line in self._request("GET", results_url).decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            result = entry.get("result", {})
+
+            if result.get("type") == "succeeded":
+                content = result.get("message", {}).get("content", [])
+                results[entry["custom_id"]] = content[0].get("text", "") if content else ""
+            elif result.get("type") == "errored":
+                error = result.get("error", {}).get("error", result.get("error", {}))
+                results[entry["custom_id"]] = Exception(
+                    f"Claude batch request failed: {error.get('type')} {error.get('message', '')}".rstrip()
+                )
+            else:
+                # canceled or expired
+                results[entry["custom_id"]] = Exception(f"Claude batch request {result.get('type')}")
+
+        return results
+
+    def submit(
+        self,
+        requests: List[Dict[str, Any]],
+        on_submitted: Optional[Callable[[List[str]], None]] = None
+    ) -> List[str]:
+        """
+        Submit requests in batches of MAX_BATCH_REQUESTS.
+
+        Args:
+            requests: Dicts with custom_id and params (a /v1/messages body)
+            on_submitted: Called with the ids submitted so far after every
+                batch, so they can be saved before any waiting starts
+
+        Returns:
+            Batch IDs
+        """
+        batch_ids: List[str] = []
+        for start in range(0, len(requests), MAX_BATCH_REQUESTS):
+            chunk = requests[start:start + MAX_BATCH_REQUESTS]
+            batch = self.create(chunk)
+            batch_ids.append(batch["id"])
+            print(f"📨 Submitted batch {batch['id']} ({len(chunk)} requests)")
+            if on_submitted:
+                on_submitted(list(batch_ids))
+        return batch_ids
+
+    def run(
+        self,
+        requests: List[Dict[str, Any]],
+        poll_interval: float = POLL_INTERVAL,
+        timeout: Optional[float] = None,
+        batch_ids: Optional[List[str]] = None,
+        on_submitted: Optional[Callable[[List[str]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Submit requests (see submit) and wait for all results.
+
+        Args:
+            requests: Dicts with custom_id and params (a /v1/messages body)
+            poll_interval: Seconds between status checks
+            timeout: Give up waiting after this many seconds in total; the
+                batches keep processing and can be resumed with batch_ids
+            batch_ids: Resume earlier submitted batches instead of
+                submitting requests again
+            on_submitted: See submit()
+
+        Returns:
+            custom_id -> response text or Exception (see results())
+
+        Raises:
+            TimeoutError: If a batch is still processing after timeout
+        """
+        if batch_ids is None:
+            batch_ids = self.submit(requests, on_submitted)
+        else:
+            print(f"📨 Resuming batch(es) {', '.join(batch_ids)}")
+
+        deadline = time.time() + timeout if timeout is not None else None
+        results: Dict[str, Any] = {}
+        for batch_id in batch_ids:
+            remaining = max(deadline - time.time(), 0) if deadline is not None else None
+            try:
+                batch = self.wait(batch_id, poll_interval=poll_interval, timeout=remaining)
+            except TimeoutError as e:
+                raise TimeoutError(f"{e}; resume with batch ids {', '.join(batch_ids)}") from e
+            results.update(self.results(batch))
+
+        # Requests missing from the results file were never processed
+        for request in requests:
+            results.setdefault(request["custom_id"], Exception("No result returned for batch request"))
+
+        return results
@@ -0,0 +1,223 @@
+"""Content-addressed on-disk cache for LLM responses."""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .llm_stream import replay
+
+
+CACHE_DIR = Path('.cache/llm')
+
+# Total size of cached responses before the least recently used are evicted
+MAX_CACHE_BYTES = int(os.getenv('LLM_CACHE_MAX_MB', '200')) * 1024 * 1024
+
+
+def cache_key(provider: str, model: str, max_tokens: Optional[int], prompt: str) -> str:
+    """
+    Cache key of an LLM request.
+
+    Args:
+        provider: LLM provider ('claude', 'openai')
+        model: Model name
+        max_tokens: Response token limit (None if not sent)
+        prompt: Full prompt
+
+    Returns:
+        Hex SHA-256 over all request parameters that affect the response
+    """
+    request = json.dumps(
+        {'provider': provider, 'model': model, 'max_tokens': max_tokens, 'prompt': prompt},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    LLM responses stored as gzip files named after their cache key.
+
+    The file modification time is the last use; once the cache grows past
+    ``max_bytes`` the least recently used responses are removed.
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        """
+        Initialize cache.
+
+        Args:
+            cache_dir: Directory holding the cached responses
+            max_bytes: Maximum total size of cached responses
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached response.
+
+        Args:
+            key: Key from cache_key()
+
+        Returns:
+            Response text, or None if not cached
+        """
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+        return entry.get('response')
+
+    def put(self, key: str, response: str, **metadata: Any) -> None:
+        """
+        Store a response and evict old entries if the cache is too large.
+
+        Args:
+            key: Key from cache_key()
+            response: Response text
+            **metadata: Stored alongside for inspection (provider, model, ...)
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = dict(metadata, created_at=datetime.now(timezone.utc).isoformat(), response=response)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def size(self) -> int:
+        """Total size of the cached responses in bytes."""
+        return sum(path.stat().st_size for path in self.cache_dir.glob('*/*.json.gz'))
+
+    def evict(self) -> int:
+        """
+        Remove least recently used responses until the cache fits in max_bytes.
+
+        Returns:
+            Number of responses removed
+        """
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob('*/*.json.gz'):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+
+            return removed
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        for path in self.cache_dir.glob('*/*.json.gz'):
+            path.unlink(missing_ok=True)
+
+
+class CachedLLM:
+    """
+    Wraps an LLM client and answers repeated prompts from an LLMCache.
+
+    Exposes the same analyze()/analyze_stream()/analyze_async() interface as the wrapped client.
+    """
+
+    def __init__(self, llm: Any, cache: Optional[LLMCache] = None, refresh: bool = False):
+        """
+        Initialize cached client.
+
+        Args:
+            llm: LLM client (ClaudeLLM, OpenAILLM)
+            cache: Cache to use (default: CACHE_DIR)
+            refresh: Ignore cached responses, but still store new ones
+        """
+        self.llm = llm
+        self.cache = cache or LLMCache()
+        self.refresh = refresh
+        self.provider = llm.provider
+        self.model = getattr(llm, 'model', None)
+        self.max_tokens = getattr(llm, 'max_tokens', None)
+
+    def _key(self, prompt: str) -> str:
+        return cache_key(self.provider, self.model, self.max_tokens, prompt)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        if self.refresh:
+            return None
+        response = self.cache.get(key)
+        if response is not None:
+            print(f"♻️  Using cached {self.provider} response ({key[:12]})")
+        return response
+
+    def _store(self, key: str, response: str) -> None:
+        # Empty responses are usually errors worth retrying
+        if response:
+            self.cache.put(
+                key, response,
+                provider=self.provider, model=self.model, max_tokens=self.max_tokens
+            )
+
+    def lookup(self, prompt: str) -> Optional[str]:
+        """Cached response for this prompt (None on a miss or when refreshing)."""
+        return self._lookup(self._key(prompt))
+
+    def store(self, prompt: str, response: str) -> None:
+        """Cache a response obtained outside analyze() (e.g. from a message batch)."""
+        self._store(self._key(prompt), response)
+
+    def analyze(self, prompt: str) -> str:
+        """Return the cached response for this prompt, or call the LLM and cache it."""
+        key = self._key(prompt)
+        response = self._lookup(key)
+        if response is None:
+            response = self.llm.analyze(prompt)
+            self._store(key, response)
+        return response
+
+    def analyze_stream(
+        self,
+        prompt: str,
+        on_progress: Optional[Callable[..., None]] = None,
+        token_budget: Optional[int] = None
+    ) -> str:
+        """Streamed analyze(); a cached response is replayed through on_progress."""
+        key = self._key(prompt)
+        response = self._lookup(key)
+        if response is None:
+            response = self.llm.analyze_stream(prompt, on_progress=on_progress, token_budget=token_budget)
+            self._store(key, response)
+        else:
+            replay(response, max_tokens=self.max_tokens, token_budget=token_budget, on_progress=on_progress)
+        return response
+
+    async def analyze_async(self, prompt: str) -> str:
+        """Async variant of analyze(); cache hits don't take a provider slot."""
+        key = self._key(prompt)
+        response = self._lookup(key)
+        if response is None:
+            response = await self.llm.analyze_async(prompt)
+            self._store(key, response)
+        return response
@@ -0,0 +1,336 @@
+"""Streaming LLM responses: SSE events, incremental JSON parsing and progress."""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rules.projection import estimate_tokens
+
+
+Path = Tuple[Any, ...]
+
+
+class TruncatedResponseError(ValueError):
+    """
+    LLM response ended (or was aborted) before the JSON was complete.
+
+    A ValueError, like an unparseable response, so callers that handle bad
+    responses handle truncation too.
+
+    Attributes:
+        text: Response text received so far
+        completed: Values that were complete, by path (see IncrementalJSONParser)
+    """
+
+    def __init__(self, message: str, text: str = "", completed: Optional[Dict[Path, Any]] = None):
+        super().__init__(message)
+        self.text = text
+        self.completed = completed or {}
+
+
+def iter_sse(lines: Iterable[bytes]) -> Iterator[Tuple[str, str]]:
+    """
+    Parse a server-sent events stream.
+
+    Args:
+        lines: Raw lines of the response body (an open HTTP response)
+
+    Yields:
+        (event name, data) per event; the name is 'message' if the event
+        has none (OpenAI)
+    """
+    event, data = "message", []
+    for raw in lines:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue  # Comment / keep-alive
+        else:
+            name, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if name == "event":
+                event = value
+            elif name == "data":
+                data.append(value)
+    if data:
+        yield event, "\n".join(data)
+
+
+class IncrementalJSONParser:
+    """
+    Parse a JSON object fed in chunks, reporting values as soon as they complete.
+
+    Text before the first '{' (a markdown fence, a preamble) and after the
+    closing '}' is ignored. Values up to max_depth levels deep are decoded
+    when their last character arrives; with the default depth of 2 that is
+    every top-level field and every category in category_scores.
+    """
+
+    def __init__(self, on_value: Optional[Callable[[Path, Any], None]] = None, max_depth: int = 2):
+        """
+        Initialize parser.
+
+        Args:
+            on_value: Called with (path, value) for each completed value,
+                e.g. (('category_scores', 'location'), {...})
+            max_depth: Deepest path length to decode and report
+        """
+        self.on_value = on_value
+        self.max_depth = max_depth
+        self.text = ""
+        self.values: Dict[Path, Any] = {}
+        self.done = False
+
+        self._pos = 0
+        self._started = False
+        # Open containers: [kind, path, start, key or index, expecting a key]
+        self._stack: List[List[Any]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._value_start: Optional[int] = None
+        self._value_path: Path = ()
+        self._in_scalar = False
+
+    def _next_path(self) -> Path:
+        if not self._stack:
+            return ()
+        kind, path, _, key, _ = self._stack[-1]
+        return path + (key,)
+
+    def _complete(self, path: Path, start: int, end: int) -> None:
+        if len(path) <= self.max_depth:
+            value = json.loads(self.text[start:end])
+            self.values[path] = value
+            if self.on_value:
+                self.on_value(path, value)
+        if not path:
+            self.done = True
+
+    def feed(self, chunk: str) -> None:
+        """
+        Add the next piece of the response.
+
+        Raises:
+            json.JSONDecodeError: If a completed value is not valid JSON
+        """
+        self.text += chunk
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1][3] = json.loads(text[self._value_start:i + 1])
+                    else:
+                        self._complete(self._value_path, self._value_start, i + 1)
+                i += 1
+                continue
+
+            if self._in_scalar:
+                if c not in ",]} \t\r\n":
+                    i += 1
+                    continue
+                self._in_scalar = False
+                self._complete(self._value_path, self._value_start, i)
+
+            if not self._started:
+                if c != "{":
+                    i += 1
+                    continue
+                self._started = True
+
+            if c in " \t\r\n":
+                pass
+            elif c in "{[":
+                self._stack.append([c, self._next_path(), i, 0, c == "{"])
+            elif c in "}]":
+                _, path, start, _, _ = self._stack.pop()
+                self._complete(path, start, i + 1)
+            elif c == ",":
+                frame = self._stack[-1]
+                if frame[0] == "{":
+                    frame[4] = True
+                else:
+                    frame[3] += 1
+            elif c == ":":
+                self._stack[-1][4] = False
+            elif c == '"':
+                self._in_string = True
+                self._string_is_key = self._stack[-1][0] == "{" and self._stack[-1][4]
+                self._value_start = i
+                self._value_path = () if self._string_is_key else self._next_path()
+            else:
+                # Number, true, false or null
+                self._in_scalar = True
+                self._value_start = i
+                self._value_path = self._next_path()
+            i += 1
+
+        self._pos = i
+
+    @property
+    def completed(self) -> List[str]:
+        """Dotted paths of the completed fields (not list items), in completion order."""
+        return [
+            ".".join(path) for path in self.values
+            if path and all(isinstance(key, str) for key in path)
+        ]
+
+
+@dataclass
+class StreamProgress:
+    """
+    Generation progress of a streamed response.
+
+    Attributes:
+        output_tokens: Output tokens so far (estimated from the text)
+        max_tokens: Output token limit of the request, if known
+        completed: Dotted paths of the JSON values completed so far
+        latest: Path of the value that just completed, if any
+        value: The value that just completed (e.g. a category result)
+        done: The JSON object is complete
+    """
+    output_tokens: int = 0
+    max_tokens: Optional[int] = None
+    completed: List[str] = field(default_factory=list)
+    latest: Optional[str] = None
+    value: Any = None
+    done: bool = False
+
+
+class ResponseStream:
+    """
+    Collects streamed text: parses it incrementally, reports progress and
+    enforces the output token budget.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        on_progress: Optional[Callable[[StreamProgress], None]] = None
+    ):
+        """
+        Initialize stream.
+
+        Args:
+            max_tokens: Output token limit of the request (for progress)
+            token_budget: Abort once the response exceeds this many
+                (estimated) output tokens without being complete
+            on_progress: Called with a StreamProgress after every chunk
+        """
+        self.max_tokens = max_tokens
+        self.token_budget = token_budget
+        self.on_progress = on_progress
+        self.parser = IncrementalJSONParser(on_value=self._on_value)
+        self._new: List[Tuple[str, Any]] = []
+        self._invalid = False
+
+    @property
+    def text(self) -> str:
+        return self.parser.text
+
+    def _on_value(self, path: Path, value: Any) -> None:
+        if path and all(isinstance(key, str) for key in path):
+            self._new.append((".".join(path), value))
+
+    def add(self, chunk: str) -> None:
+        """
+        Add a chunk of response text.
+
+        on_progress is called once per field completed by the chunk (or
+        once, without a latest field, if none completed).
+
+        Raises:
+            TruncatedResponseError: If the token budget is exceeded
+        """
+        self._new = []
+        if self._invalid:
+            self.parser.text += chunk
+        else:
+            try:
+                self.parser.feed(chunk)
+            except json.JSONDecodeError:
+                # Stop parsing; the final parse reports it with the full response
+                self._invalid = True
+
+        output_tokens = estimate_tokens(self.text)
+        if self.on_progress:
+            for latest, value in self._new or [(None, None)]:
+                self.on_progress(StreamProgress(
+                    output_tokens=output_tokens,
+                    max_tokens=self.max_tokens,
+                    completed=self.parser.completed,
+                    latest=latest,
+                    value=value,
+                    done=self.parser.done,
+                ))
+
+        if self.token_budget is not None and output_tokens > self.token_budget and not self.parser.done:
+            raise self.truncated(f"exceeded the output budget of {self.token_budget} tokens")
+
+    def truncated(self, reason: str) -> TruncatedResponseError:
+        """Error describing a response that stopped early, with what was completed."""
+        completed = ", ".join(self.parser.completed) or "nothing"
+        return TruncatedResponseError(
+            f"LLM response {reason} after ~{estimate_tokens(self.text)} tokens (completed: {completed})",
+            text=self.text,
+            completed=dict(self.parser.values),
+        )
+
+    def finish(self, hit_limit: bool = False) -> str:
+        """
+        End the stream.
+
+        Args:
+            hit_limit: The API stopped at max_tokens
+
+        Returns:
+            Complete response text
+
+        Raises:
+            TruncatedResponseError: If the output limit cut the JSON short
+        """
+        if hit_limit and not self.parser.done:
+            raise self.truncated(f"hit max_tokens ({self.max_tokens})")
+        return self.text
+
+
+def replay(
+    text: str,
+    max_tokens: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    on_progress: Optional[Callable[[StreamProgress], None]] = None,
+    chunk_size: Optional[int] = None
+) -> str:
+    """
+    Run an already complete response through a ResponseStream.
+
+    For cached and mock responses, so they report progress like a stream.
+
+    Args:
+        text: Response text
+        max_tokens: Output token limit (for progress)
+        token_budget: Output budget (see ResponseStream)
+        on_progress: Progress callback
+        chunk_size: Characters per chunk (default: all at once)
+
+    Returns:
+        The response text
+    """
+    stream = ResponseStream(max_tokens=max_tokens, token_budget=token_budget, on_progress=on_progress)
+    size = chunk_size or max(len(text), 1)
+    for start in range(0, len(text), size):
+        stream.add(text[start:start + size])
+    return stream.finish()
@@ -47,13 +47,24 @@ class MarkdownGenerator:
                 if isinstance(cat_data, dict) and cat_data.get('red_flags'):
                     all_red_flags.extend(cat_data['red_flags'])
 
-            if all_red_flags:
+            # Pre-screening matches with the listing text they were found in
+            evidence = analysis.get('red_flags') or {}
+            found = evidence.get('dealbreakers', []) + evidence.get('warnings', [])
+
+            if all_red_flags or found:
                 lines.append("## 🚨 Red Flags")
                 lines.append("")
+            if all_red_flags:
                 for flag in all_red_flags:
                     lines.append(f"- ⚠️ {flag}")
                 lines.append("")
 
+            if found:
+                lines.append("**Gevonden in de advertentie:**")
+                for flag in found:
+                    lines.append(f"- `{flag['pattern']}`: \"{flag['snippet']}\"")
+                lines.append("")
+
         # Financial Breakdown (v2.0.0+)
         financial_cat = None
         if analysis.get('category_scores'):
@@ -0,0 +1,379 @@
+"""Dataset-wide red flag prescreen index (data/red_flags.prescreen.json.gz)."""
+
+import gzip
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .dataset import (
+    DATASET_PATH, dataset_fingerprint, index_path_for, iter_dataset_records, record_hash, record_ids
+)
+from .red_flag_cache import SCAN_CACHE_PATH, ScanCache
+from .red_flags import DEFAULT_PACK, RedFlagDetector, get_detector, pattern_id
+
+
+PRESCREEN_PATH = Path('data/red_flags.prescreen.json.gz')
+
+# Records sent to a worker process at a time
+CHUNK_SIZE = 250
+
+# Hex digits of record_hash() kept per listing (as in the sync manifest)
+_HASH_LENGTH = 16
+
+
+@lru_cache(maxsize=None)
+def _detector(pack: str, scan_cache_path: Optional[Path]) -> RedFlagDetector:
+    """Detector of a pack, one per process (the shared one with the default scan cache)."""
+    if scan_cache_path == SCAN_CACHE_PATH:
+        return get_detector(pack)
+    return RedFlagDetector(pack, cache=ScanCache(scan_cache_path))
+
+
+def _prescreen_chunk(
+    records: List[Dict[str, Any]],
+    known: Dict[str, str],
+    pack: str = DEFAULT_PACK,
+    scan_cache_path: Optional[Path] = SCAN_CACHE_PATH
+) -> List[Tuple[str, str, Optional[List[Any]], List[str]]]:
+    """
+    Hash and scan a chunk of listings (runs in a worker process).
+
+    Args:
+        records: Listings with a TinyId
+        known: TinyId -> hash of the already indexed version
+        pack: Red flag pack to scan with
+        scan_cache_path: Scan cache database (None: memory only)
+
+    Returns:
+        (TinyId, hash, entry, other ids) per listing; entry is None when
+        unchanged, other ids are the listing's GlobalId and propertyId
+    """
+    detector = _detector(pack, scan_cache_path)
+
+    results = []
+    for record in records:
+        tiny_id = str(record['Identifiers']['TinyId'])
+        digest = record_hash(record)[:_HASH_LENGTH]
+        other_ids = [house_id for house_id in record_ids(record) if house_id != tiny_id]
+        if known.get(tiny_id) == digest:
+            results.append((tiny_id, digest, None, other_ids))
+            continue
+
+        scan = detector.scan(record)
+        patterns = [pattern_id(flag['pattern']) for flag in scan['dealbreakers'] + scan['warnings']]
+        results.append((tiny_id, digest, [scan['recommendation'], scan['total_weight'], patterns, digest], other_ids))
+    return results
+
+
+class PrescreenIndex:
+    """
+    Red flag scan result of every listing in the dataset.
+
+    Per TinyId the index holds the recommendation, the total weight and the
+    ids of the matched patterns (see red_flags.pattern_id), so listings can
+    be excluded before any LLM call. Lookups also accept the GlobalId and
+    propertyId of a listing (see dataset.record_ids). Updates only rescan
+    listings whose content hash changed, unless the flags themselves
+    changed (another pack, or an edited one).
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(
+        self,
+        houses: Optional[Dict[str, List[Any]]] = None,
+        patterns: Optional[Dict[str, Dict[str, Any]]] = None,
+        scan_version: Optional[str] = None,
+        dataset_fingerprint: Optional[str] = None,
+        built_at: Optional[str] = None,
+        pack: Optional[str] = None,
+        aliases: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize index.
+
+        Args:
+            houses: TinyId -> [recommendation, total_weight, pattern_ids, record_hash]
+            patterns: Pattern id -> pattern, category, reason and weight
+            scan_version: RedFlagDetector.scan_version the houses were scanned with
+            dataset_fingerprint: Dataset fingerprint at the last update
+            built_at: ISO timestamp of the last update
+            pack: Red flag pack the houses were scanned with
+            aliases: GlobalId/propertyId -> TinyId
+        """
+        self.houses = houses or {}
+        self.patterns = patterns or {}
+        self.scan_version = scan_version
+        self.dataset_fingerprint = dataset_fingerprint
+        self.built_at = built_at
+        self.pack = pack
+        self.aliases = aliases or {}
+
+    def __len__(self) -> int:
+        return len(self.houses)
+
+    @classmethod
+    def load(cls, prescreen_path: Path = PRESCREEN_PATH) -> Optional['PrescreenIndex']:
+        """
+        Load a saved index.
+
+        Returns:
+            Index, or None if missing, unreadable or of another format
+        """
+        prescreen_path = Path(prescreen_path)
+        if not prescreen_path.exists():
+            return None
+
+        try:
+            with gzip.open(prescreen_path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('format_version') != cls.FORMAT_VERSION:
+            return None
+
+        return cls(
+            houses=data.get('houses'),
+            patterns=data.get('patterns'),
+            scan_version=data.get('scan_version'),
+            dataset_fingerprint=data.get('dataset_fingerprint'),
+            built_at=data.get('built_at'),
+            pack=data.get('pack'),
+            aliases=data.get('aliases')
+        )
+
+    def save(self, prescreen_path: Path = PRESCREEN_PATH) -> Path:
+        """Write the index as compressed JSON (sorted, so git deltas stay small)."""
+        prescreen_path = Path(prescreen_path)
+        prescreen_path.parent.mkdir(parents=True, exist_ok=True)
+
+        data = {
+            'format_version': self.FORMAT_VERSION,
+            'pack': self.pack,
+            'scan_version': self.scan_version,
+            'dataset_fingerprint': self.dataset_fingerprint,
+            'built_at': self.built_at,
+            'patterns': self.patterns,
+            'houses': dict(sorted(self.houses.items())),
+            'aliases': dict(sorted(self.aliases.items())),
+        }
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        # Write atomically; mtime=0 keeps unchanged content byte-identical
+        tmp_path = prescreen_path.with_name(prescreen_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(payload, compresslevel=9, mtime=0))
+        os.replace(tmp_path, prescreen_path)
+
+        return prescreen_path
+
+    def get(self, house_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Prescreen result of a listing.
+
+        Args:
+            house_id: TinyId, GlobalId or propertyId
+
+        Returns:
+            Dict with recommendation, total_weight and patterns (pattern
+            dicts with id), or None if the listing is not indexed
+        """
+        entry = self._entry(house_id)
+        if entry is None:
+            return None
+        recommendation, total_weight, pattern_ids, _ = entry
+        return {
+            'recommendation': recommendation,
+            'total_weight': total_weight,
+            'patterns': [{'id': pid, **self.patterns.get(pid, {})} for pid in pattern_ids],
+        }
+
+    def recommendation(self, house_id: str) -> Optional[str]:
+        """Recommendation of a listing (AFWIJZEN, VERDER ONDERZOEK, GESCHIKT), None if not indexed."""
+        entry = self._entry(house_id)
+        return entry[0] if entry else None
+
+    def rejected(self, house_ids: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Listings the prescreen rejects (AFWIJZEN, like fast rejection).
+
+        Args:
+            house_ids: Only consider these ids (TinyId, GlobalId or
+                propertyId; default: all TinyIds). Returned as given.
+        """
+        candidates = self.houses if house_ids is None else [str(h) for h in house_ids]
+        return [house_id for house_id in candidates if self.recommendation(house_id) == 'AFWIJZEN']
+
+    def _entry(self, house_id: str) -> Optional[List[Any]]:
+        """Entry of a listing by TinyId, or by GlobalId/propertyId through the aliases."""
+        house_id = str(house_id)
+        entry = self.houses.get(house_id)
+        if entry is None and house_id in self.aliases:
+            entry = self.houses.get(self.aliases[house_id])
+        return entry
+
+    def update(
+        self,
+        dataset_path: Path = DATASET_PATH,
+        index_path: Optional[Path] = None,
+        workers: Optional[int] = None,
+        force: bool = False,
+        pack: str = DEFAULT_PACK,
+        scan_cache_path: Optional[Path] = SCAN_CACHE_PATH
+    ) -> Dict[str, int]:
+        """
+        Bring the index up to date with the dataset.
+
+        Listings are hashed and scanned in chunks on a process pool. Only
+        listings whose content hash changed are rescanned; listings that
+        left the dataset are removed. Nothing is read when neither the
+        dataset fingerprint, the pack nor its flags changed.
+
+        Args:
+            dataset_path: Path to the compressed dataset
+            index_path: Path of the sidecar index, used for the fingerprint
+                (default: next to the dataset, see dataset.index_path_for)
+            workers: Worker processes (default: CPU count; 1 scans in-process)
+            force: Rescan every listing
+            pack: Red flag pack to scan with (rules/red_flags/<pack>.json)
+            scan_cache_path: Scan cache database of the detectors (None:
+                memory only)
+
+        Returns:
+            Counts of added, updated, deleted and unchanged listings
+        """
+        stats = {'added': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+        detector = _detector(pack, scan_cache_path)
+        # Same key as the scan cache: the pack version and a hash of its flags
+        version = detector.scan_version
+        fingerprint = dataset_fingerprint(dataset_path, index_path or index_path_for(dataset_path))
+        if not force and self.scan_version == version and self.dataset_fingerprint == fingerprint:
+            stats['unchanged'] = len(self)
+            return stats
+
+        # Entries scanned with another pack or other flags can't be reused
+        known = {} if force or self.scan_version != version else {
+            house_id: entry[3] for house_id, entry in self.houses.items()
+        }
+
+        houses = {}
+        aliases = {}
+        chunks = _chunks(dataset_path)
+        for tiny_id, digest, entry, other_ids in self._scan(chunks, known, workers, pack, scan_cache_path):
+            for other_id in other_ids:
+                aliases.setdefault(other_id, tiny_id)
+            if entry is None:
+                houses[tiny_id] = self.houses[tiny_id]
+                stats['unchanged'] += 1
+            else:
+                houses[tiny_id] = entry
+                stats['updated' if tiny_id in self.houses else 'added'] += 1
+
+        stats['deleted'] = sum(1 for house_id in self.houses if house_id not in houses)
+
+        self.houses = houses
+        # A TinyId always wins over another listing's GlobalId/propertyId
+        self.aliases = {other_id: tiny_id for other_id, tiny_id in aliases.items() if other_id not in houses}
+        self.patterns = {
+            flag.id: {'pattern': flag.pattern, 'category': flag.category, 'reason': flag.reason, 'weight': flag.weight}
+            for flag in detector.dealbreakers + detector.warnings
+        }
+        self.pack = pack
+        self.scan_version = version
+        self.dataset_fingerprint = fingerprint
+        self.built_at = datetime.now(timezone.utc).isoformat()
+        return stats
+
+    @staticmethod
+    def _scan(
+        chunks: Iterator[List[Dict[str, Any]]],
+        known: Dict[str, str],
+        workers: Optional[int],
+        pack: str,
+        scan_cache_path: Optional[Path]
+    ) -> Iterator[Tuple[str, str, Optional[List[Any]], List[str]]]:
+        """Run _prescreen_chunk over all chunks, on a process pool with bounded read-ahead."""
+        workers = workers or os.cpu_count() or 1
+
+        def known_for(chunk):
+            return {
+                house_id: known[house_id]
+                for house_id in (str(record['Identifiers']['TinyId']) for record in chunk)
+                if house_id in known
+            }
+
+        if workers <= 1:
+            for chunk in chunks:
+                yield from _prescreen_chunk(chunk, known_for(chunk), pack, scan_cache_path)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_prescreen_chunk, chunk, known_for(chunk), pack, scan_cache_path))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+
+def _chunks(dataset_path: Path) -> Iterator[List[Dict[str, Any]]]:
+    """Listings with a TinyId in chunks of CHUNK_SIZE (first occurrence wins, like the store)."""
+    seen = set()
+    chunk = []
+    for record in iter_dataset_records(dataset_path):
+        if not isinstance(record, dict):
+            continue
+        tiny_id = (record.get('Identifiers') or {}).get('TinyId')
+        if tiny_id is None or str(tiny_id) in seen:
+            continue
+        seen.add(str(tiny_id))
+
+        chunk.append(record)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def get_prescreen(
+    prescreen_path: Path = PRESCREEN_PATH,
+    dataset_path: Path = DATASET_PATH,
+    update: bool = True,
+    workers: Optional[int] = None,
+    pack: str = DEFAULT_PACK,
+    index_path: Optional[Path] = None,
+    scan_cache_path: Optional[Path] = SCAN_CACHE_PATH
+) -> PrescreenIndex:
+    """
+    Load the prescreen index, updating and saving it first when the dataset changed.
+
+    Args:
+        prescreen_path: Saved index
+        dataset_path: Path to the compressed dataset
+        update: Incrementally update when the dataset, the pack or its flags changed
+        workers: Worker processes for the update
+        pack: Red flag pack the index should be scanned with
+        index_path: Sidecar index of the dataset (default: next to the dataset)
+        scan_cache_path: Scan cache database (None: memory only)
+
+    Returns:
+        Index (empty if there is neither a saved index nor a dataset)
+    """
+    index = PrescreenIndex.load(prescreen_path) or PrescreenIndex()
+    if update and Path(dataset_path).exists():
+        built_at = index.built_at
+        index.update(
+            dataset_path, index_path, workers=workers, pack=pack, scan_cache_path=scan_cache_path
+        )
+        if index.built_at != built_at:
+            index.save(prescreen_path)
+    return index
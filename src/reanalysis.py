@@ -0,0 +1,173 @@
+"""Select houses whose latest analysis is out of date."""
+
+import json
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from rules.registry import RulesRegistry
+
+from .dataset import DATASET_PATH, INDEX_PATH, get_index, record_hash
+
+
+HOUSES_DIR = Path('houses')
+
+
+@lru_cache(maxsize=None)
+def prompt_hash(rules_version: str) -> str:
+    """Prompt configuration hash of a rules version (see BaseRules.prompt_hash)."""
+    return RulesRegistry.get_rules(rules_version).prompt_hash
+
+
+def analysis_inputs(
+    house_data: Dict[str, Any],
+    enrichment_data: Optional[Dict[str, Any]] = None,
+    rules_version: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Describe the inputs an analysis was produced from.
+
+    Stored as 'inputs' in latest_analysis.json so later runs can tell whether
+    the listing, its enrichment or the prompt of the rules changed since.
+
+    Args:
+        house_data: Listing that was analyzed
+        enrichment_data: AirROI enrichment used (if any)
+        rules_version: Rules version the analysis was made with
+
+    Returns:
+        Dictionary with record_hash, enriched_at and prompt_hash
+    """
+    return {
+        'record_hash': record_hash(house_data),
+        'enriched_at': (enrichment_data or {}).get('enriched_at'),
+        'prompt_hash': prompt_hash(rules_version) if rules_version else None,
+    }
+
+
+def _load_json(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _recorded_inputs(house_dir: Path, latest: Dict[str, Any]) -> Dict[str, Any]:
+    """Inputs of the latest analysis, reconstructed for analyses that predate them."""
+    if latest.get('inputs'):
+        return latest['inputs']
+
+    # The raw listing is saved next to every analysis with the same timestamp
+    # (analyses/v2.0.0_2025-11-09T21-59-00.json -> raw/data_2025-11-09T21-59-00.json)
+    timestamp = Path(latest.get('analysis_file', '')).stem.partition('_')[2]
+    raw_data = _load_json(house_dir / 'raw' / f'data_{timestamp}.json') if timestamp else None
+
+    return {
+        'record_hash': record_hash(raw_data) if raw_data is not None else None,
+        'enriched_at': None,
+        'prompt_hash': None,
+    }
+
+
+def reanalysis_reason(
+    house_id: str,
+    house_data: Optional[Dict[str, Any]],
+    rules_version: str,
+    houses_dir: Path = HOUSES_DIR
+) -> Optional[str]:
+    """
+    Check whether a house needs a new analysis.
+
+    Args:
+        house_id: House ID
+        house_data: Current listing from the dataset (None skips the listing check)
+        rules_version: Rules version the analysis should use
+        houses_dir: Directory holding the per-house results
+
+    Returns:
+        Human readable reason, or None if the latest analysis is up to date
+    """
+    house_dir = Path(houses_dir) / house_id
+    latest = _load_json(house_dir / 'latest_analysis.json')
+    if latest is None:
+        return 'not analyzed yet'
+
+    if latest.get('rules_version') != rules_version:
+        return f"rules {latest.get('rules_version')} → {rules_version}"
+
+    recorded = _recorded_inputs(house_dir, latest)
+    # Same version, other prompt (e.g. a new listing projection); analyses
+    # that didn't record the hash were made before it could be compared
+    if recorded.get('prompt_hash') != prompt_hash(rules_version):
+        return 'prompt changed'
+
+    if house_data is not None and recorded.get('record_hash') != record_hash(house_data):
+        return 'listing changed'
+
+    enrichment = _load_json(house_dir / 'enrichment' / 'airroi_enrichment.json') or {}
+    enriched_at = enrichment.get('enriched_at')
+    if enriched_at:
+        if recorded.get('enriched_at'):
+            updated = enriched_at != recorded['enriched_at']
+        else:
+            # Enrichment unknown at analysis time: compare timestamps instead
+            updated = _parse_timestamp(enriched_at) > _parse_timestamp(latest['analyzed_at'])
+        if updated:
+            return 'enrichment updated'
+
+    return None
+
+
+def select_stale_houses(
+    rules_version: str = 'latest',
+    house_ids: Optional[Iterable[str]] = None,
+    houses_dir: Path = HOUSES_DIR,
+    dataset_path: Path = DATASET_PATH,
+    index_path: Path = INDEX_PATH
+) -> Dict[str, str]:
+    """
+    Find the houses whose latest analysis no longer matches its inputs.
+
+    A house is selected when it was analyzed with another rules version
+    or another prompt of the same version, when its listing in the dataset changed, or when its enrichment was
+    re-fetched after the analysis. Houses that are no longer in the dataset
+    are skipped. Without a local dataset only rules and enrichment are
+    compared.
+
+    Args:
+        rules_version: Target rules version ('latest' for the newest)
+        house_ids: Candidate houses (default: every directory in houses_dir)
+        houses_dir: Directory holding the per-house results
+        dataset_path: Path to the compressed dataset
+        index_path: Path of the sidecar index
+
+    Returns:
+        House ID -> reason, in candidate order
+    """
+    if rules_version == 'latest':
+        rules_version = RulesRegistry.get_latest_version()
+
+    houses_dir = Path(houses_dir)
+    if house_ids is None:
+        house_ids = sorted(d.name for d in houses_dir.iterdir() if d.is_dir()) if houses_dir.exists() else []
+
+    index = get_index(dataset_path, index_path) if Path(dataset_path).exists() else None
+
+    stale = {}
+    for house_id in house_ids:
+        house_data = None
+        if index is not None:
+            house_data = index.get(house_id)
+            if house_data is None:
+                continue  # Listing left the dataset; nothing to re-analyze with
+
+        reason = reanalysis_reason(house_id, house_data, rules_version, houses_dir)
+        if reason:
+            stale[house_id] = reason
+
+    return stale
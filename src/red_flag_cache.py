@@ -0,0 +1,171 @@
+"""LRU and on-disk cache of red flag scan results."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+SCAN_CACHE_PATH = Path('.cache/red_flags/scans.sqlite')
+
+# Scan results kept in memory per process
+MEMORY_ENTRIES = 1024
+
+# Scan results kept on disk before the oldest are removed
+MAX_ENTRIES = int(os.getenv('RED_FLAG_SCAN_CACHE_MAX', '100000'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_created_at ON scans (created_at);
+"""
+
+
+def scan_key(version: str, text: str) -> str:
+    """
+    Cache key of a red flag scan.
+
+    Args:
+        version: Version of the flags the text is scanned with
+            (RedFlagDetector.scan_version)
+        text: Extracted listing text, before lowercasing
+
+    Returns:
+        The version and the hex SHA-256 of the text
+    """
+    return f"{version}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+class ScanCache:
+    """
+    Red flag scan results by scan_key, in memory and in SQLite.
+
+    A listing whose text didn't change is not scanned again, neither
+    within a process (the in-memory LRU) nor in later runs such as bulk
+    re-analysis or prescreen refreshes (the database). The database is
+    opened lazily per process, so worker processes each get their own
+    connection; an unusable database leaves only the memory layer.
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[Path] = SCAN_CACHE_PATH,
+        memory_entries: int = MEMORY_ENTRIES,
+        max_entries: int = MAX_ENTRIES
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            cache_path: SQLite database file (None: memory only)
+            memory_entries: Results kept in the in-memory LRU
+            max_entries: Results kept in the database; the oldest are
+                removed when a process opens it
+        """
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        self._memory: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached scan result.
+
+        Returns:
+            A fresh copy of the result, or None if not cached
+        """
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return json.loads(payload)
+
+            conn = self._connection()
+            row = None
+            if conn is not None:
+                try:
+                    row = conn.execute("SELECT result FROM scans WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error:
+                    row = None
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+
+            self._remember(key, row[0])
+            self.stats['disk_hits'] += 1
+            return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a scan result in memory and on disk."""
+        payload = json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._remember(key, payload)
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO scans (key, result, created_at) VALUES (?, ?, ?)",
+                        (key, payload, time.time())
+                    )
+            except sqlite3.Error:
+                pass  # A busy or read-only cache only costs a rescan
+
+    def clear_memory(self) -> None:
+        """Forget the in-memory results (the database is kept)."""
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key: str, payload: str) -> None:
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Database connection of this process, opened (and pruned) on first use."""
+        if self.cache_path is None:
+            return None
+        if self._pid == os.getpid():
+            return self._conn
+
+        # First use in this process (or in a forked worker)
+        self._pid = os.getpid()
+        self._conn = None
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.cache_path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            with conn:
+                conn.execute(
+                    "DELETE FROM scans WHERE key IN "
+                    "(SELECT key FROM scans ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+            self._conn = conn
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️  Red flag scan cache unavailable, keeping scans in memory only: {e}")
+        return self._conn
+
+
+@lru_cache(maxsize=None)
+def get_scan_cache() -> ScanCache:
+    """Scan cache shared by the detectors of this process (see red_flags.get_detector)."""
+    return ScanCache()
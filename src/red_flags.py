@@ -1,14 +1,48 @@
 """
 Red Flag Detection System voor BNB/Vakantieverhuur
-Makkelijk uitbreidbaar via patterns en categorieën
+Makkelijk uitbreidbaar via patterns en categorieën: de patterns staan per
+rules versie in een pack, rules/red_flags/<versie>.json
 
 Focus: Maximaal rendement via zelfverhuur
 Dealbreakers: Verplichte parkorganisaties, verhuurrestricties
 """
 
-from typing import List, Dict, Tuple, Optional
+from typing import Any, List, Dict, Tuple, Optional
+from bisect import bisect_left
+from functools import cached_property, lru_cache
+from pathlib import Path
+import hashlib
+import json
+import os
 import re
 
+from .red_flag_cache import ScanCache, get_scan_cache, scan_key
+
+
+# Red flag packs: per rules versie een JSON bestand met de patterns
+PACKS_DIR = Path(__file__).resolve().parent.parent / 'rules' / 'red_flags'
+
+# Pack van RedFlagDetector() en get_detector() zonder argument
+DEFAULT_PACK = 'v2.0.0'
+
+# Gecompileerde matchers per pack (niet gecommit, zoals .cache/llm)
+MATCHER_CACHE_DIR = Path('.cache/red_flags')
+
+# Bump when the serialized matcher layout changes
+_ARTIFACT_FORMAT = 1
+
+# Bump when the scan result changes for the same flags and text (cached scans)
+_SCAN_FORMAT = 1
+
+# Maximum number of characters between the words of a pattern
+MAX_WORD_GAP = 50
+
+# Characters of context around a match in an evidence snippet
+SNIPPET_CONTEXT = 60
+
+# Sentence ends used to clip snippets (a dot in "€3.000" is not one)
+_SENTENCE_END = re.compile(r'[.!?](?=\s|$)|\n')
+
 
 class RedFlagCategory:
     DEALBREAKER = "dealbreaker"  # Automatisch NEE
@@ -24,7 +58,11 @@ class RedFlag:
         self.category = category
         self.reason = reason
         self.weight = weight
-        self.regex = self._compile_pattern()
+
+    @cached_property
+    def regex(self):
+        """Regex van het pattern, pas gecompileerd bij het eerste gebruik"""
+        return self._compile_pattern()
 
     def _compile_pattern(self):
         """
@@ -33,189 +71,449 @@ class RedFlag:
         """
         words = self.pattern.split()
         # Use .{0,50}? for non-greedy matching with max 50 chars between words
-        pattern = r'.{0,50}?'.join(map(re.escape, words))
+        pattern = rf'.{{0,{MAX_WORD_GAP}}}?'.join(map(re.escape, words))
         return re.compile(pattern, re.IGNORECASE | re.DOTALL)
 
+    @property
+    def id(self) -> str:
+        """Korte stabiele id van het pattern (voor compacte indexen)"""
+        return pattern_id(self.pattern)
+
     def matches(self, text: str) -> bool:
         return bool(self.regex.search(text.lower()))
 
 
-# DEALBREAKERS - Automatisch NEE advies
-DEALBREAKER_FLAGS = [
-    # Verhuurrestricties - Core dealbreakers
-    RedFlag("verhuur niet toegestaan", RedFlagCategory.DEALBREAKER,
-            "Verhuur niet toegestaan - kan niet zelfverhuren", weight=100),
-    RedFlag("permanente bewoning en verhuur zijn niet toegestaan", RedFlagCategory.DEALBREAKER,
-            "Zowel bewoning als verhuur verboden", weight=100),
-    RedFlag("verhuur aan derden is niet toegestaan", RedFlagCategory.DEALBREAKER,
-            "Verhuur aan derden (gasten) verboden", weight=100),
-    RedFlag("verhuur niet mogelijk", RedFlagCategory.DEALBREAKER,
-            "Verhuur expliciet niet mogelijk", weight=100),
-
-    # Verplichte parkorganisatie - Geen zelfverhuur
-    RedFlag("verplichte verhuur via", RedFlagCategory.DEALBREAKER,
-            "Verplichte verhuur via parkorganisatie - geen zelfverhuur mogelijk", weight=100),
-    RedFlag("verhuurmogelijkheden via de organisatie op het park", RedFlagCategory.DEALBREAKER,
-            "Verhuur alleen via parkorganisatie toegestaan", weight=90),
-    RedFlag("verhuur alleen via derden toegestaan", RedFlagCategory.DEALBREAKER,
-            "Geen zelfverhuur toegestaan", weight=100),
-    RedFlag("uitsluitend verhuur via", RedFlagCategory.DEALBREAKER,
-            "Uitsluitend verhuur via parkorganisatie", weight=100),
-
-    # Specifieke parkorganisaties (lock-in met hoge fees)
-    RedFlag("landal", RedFlagCategory.DEALBREAKER,
-            "Landal - verplichte verhuurstructuur met hoge fees (40%+)", weight=100),
-    RedFlag("europarcs", RedFlagCategory.DEALBREAKER,
-            "Europarcs - verplichte verhuurstructuur met hoge fees", weight=100),
-    RedFlag("roompot", RedFlagCategory.DEALBREAKER,
-            "Roompot - verplichte verhuurstructuur met hoge fees", weight=100),
-    RedFlag("summio", RedFlagCategory.DEALBREAKER,
-            "Summio - verplichte verhuurstructuur met hoge fees", weight=100),
-
-    # Hoge commissies - Rendement killer
-    RedFlag("40% fee", RedFlagCategory.DEALBREAKER,
-            "40% fee op verhuur - veel te hoog voor rendement", weight=95),
-    RedFlag("40% commissie", RedFlagCategory.DEALBREAKER,
-            "40% commissie op verhuur - rendement niet haalbaar", weight=95),
-    RedFlag("50% commissie", RedFlagCategory.DEALBREAKER,
-            "50% commissie - extreem hoog, onrendabel", weight=95),
-    RedFlag("over de verhuuropbrengst wordt een fee van 40%", RedFlagCategory.DEALBREAKER,
-            "40% fee op opbrengst - te hoge kosten", weight=95),
-
-    # Leeftijdsrestricties - Beperkt doelgroep
-    RedFlag("minimum leeftijd voor bewoners is 30 jaar", RedFlagCategory.DEALBREAKER,
-            "Leeftijdsrestrictie 30+ beperkt doelgroep drastisch", weight=80),
-    RedFlag("minimumleeftijd 30 jaar", RedFlagCategory.DEALBREAKER,
-            "Leeftijdsrestrictie beperkt verhuurpotentieel", weight=80),
-
-    # Recron - Beperkte vrijheid
-    RedFlag("recron voorwaarden zijn van toepassing", RedFlagCategory.DEALBREAKER,
-            "Recron voorwaarden beperken verhuurvrijheid significant", weight=85),
-    RedFlag("recron voorwaarden", RedFlagCategory.DEALBREAKER,
-            "Recron regelgeving beperkt operationele vrijheid", weight=85),
-
-    # Privilege clausule - Extra kosten
-    RedFlag("privilegeclausule", RedFlagCategory.DEALBREAKER,
-            "Privilege clausule: extra kosten (vaak €10.000+) voor verhuurrecht", weight=90),
-    RedFlag("dient er door iedere nieuwe eigenaar de privilegeclausule afgenomen te worden",
-            RedFlagCategory.DEALBREAKER,
-            "Verplichte privilege clausule bij overdracht (€9.797 extra)", weight=90),
-
-    # Seizoensbeperkingen - Te kort verhuurseizoen
-    RedFlag("seizoenscamping 1 april - 1 oktober", RedFlagCategory.DEALBREAKER,
-            "Alleen zomerseizoen (6 maanden) - 50% van jaar niet bruikbaar", weight=85),
-    RedFlag("seizoenscamping april tot oktober", RedFlagCategory.DEALBREAKER,
-            "Alleen zomerseizoen - rendement te laag", weight=85),
-    RedFlag("geopend van maart t/m oktober", RedFlagCategory.DEALBREAKER,
-            "Park slechts 8 maanden open - beperkt rendement", weight=80),
-
-    # Onderhoudsstaat - Onduidelijke kosten
-    RedFlag("enig onderhoud nodig", RedFlagCategory.DEALBREAKER,
-            "Onduidelijke onderhoudskosten - kan zeer hoog uitpakken", weight=75),
-    RedFlag("renovatie noodzakelijk", RedFlagCategory.DEALBREAKER,
-            "Grote renovatie nodig - extra kapitaal vereist", weight=80),
-    RedFlag("het chalet heeft enig onderhoud nodig", RedFlagCategory.DEALBREAKER,
-            "Onderhoud nodig zonder specificatie - risicovol", weight=75),
-]
-
-
-# WARNINGS - MISSCHIEN advies (verder onderzoek nodig)
-WARNING_FLAGS = [
-    # Erfpacht/huur - Geen eigendom grond
-    RedFlag("erfpacht", RedFlagCategory.WARNING,
-            "Erfpacht - check voorwaarden, kosten en looptijd zorgvuldig", weight=50),
-    RedFlag("huurgrond", RedFlagCategory.WARNING,
-            "Huurgrond - doorlopende kosten, geen eigendom grond, beperkte exit", weight=50),
-    RedFlag("geen eigendom grond", RedFlagCategory.WARNING,
-            "Grond niet in eigendom - beperkte controle en exit opties", weight=55),
-
-    # Parkkosten - Kan rendement drukken
-    RedFlag("parkkosten", RedFlagCategory.WARNING,
-            "Parkkosten - vraag specificatie op (gas/water/elektra included?)", weight=35),
-    RedFlag("servicekosten", RedFlagCategory.WARNING,
-            "Servicekosten - vraag exacte breakdown", weight=35),
-    RedFlag("hoge parkkosten", RedFlagCategory.WARNING,
-            "Hoge parkkosten vermeld - kan rendement significant drukken", weight=60),
-    RedFlag("parkkosten €", RedFlagCategory.WARNING,
-            "Check of parkkosten all-inclusive zijn (energie/water)", weight=30),
-
-    # Eigenaar goedkeuring - Extra stap in proces
-    RedFlag("parkeigenaar wil voordat koop tot stand komt gesprek", RedFlagCategory.WARNING,
-            "Goedkeuring parkeigenaar vereist - screeningsproces, mogelijk afwijzing", weight=45),
-    RedFlag("goedkeuring eigenaar vereist", RedFlagCategory.WARNING,
-            "Eigenaar moet nieuwe koper goedkeuren - extra onzekerheid", weight=45),
-    RedFlag("toestemming eigenaar", RedFlagCategory.WARNING,
-            "Toestemming eigenaar nodig - kan proces vertragen", weight=40),
-
-    # Beperkte verhuurperiodes - Minder dan ideaal
-    RedFlag("chalet mag 20 weken per jaar recreatief verhuurd worden", RedFlagCategory.WARNING,
-            "Beperkt tot 20 weken verhuur per jaar - 60% van jaar niet beschikbaar", weight=70),
-    RedFlag("mag 20 weken verhuurd worden", RedFlagCategory.WARNING,
-            "Slechts 20 weken verhuur toegestaan - beperkt rendement", weight=70),
-    RedFlag("park is geopend van maart t/m oktober", RedFlagCategory.WARNING,
-            "Park alleen zomerseizoen open (8 mnd) - wintermaanden beperkt", weight=55),
-    RedFlag("verblijf op dit park mag vanaf 25 maart tot 31 oktober", RedFlagCategory.WARNING,
-            "Seizoensbeperking maart-oktober - winter niet mogelijk", weight=55),
-    RedFlag("geen overnachting in de winter", RedFlagCategory.WARNING,
-            "Wintermaanden geen verhuur mogelijk - rendement impact", weight=60),
-    RedFlag("in de overige maanden mag overdag gerecreëerd worden maar niet worden overnacht",
-            RedFlagCategory.WARNING,
-            "Geen overnachtingen buiten seizoen - beperkt verhuurperiode", weight=60),
-
-    # Bouwjaar - Verouderd (hoger onderhoud)
-    RedFlag("bouwjaar 2010", RedFlagCategory.WARNING,
-            "Bouwjaar 2010 - check staat, mogelijke renovatie nodig", weight=40),
-    RedFlag("bouwjaar 2005", RedFlagCategory.WARNING,
-            "15+ jaar oud - hogere onderhoudskosten te verwachten", weight=45),
-    RedFlag("bouwjaar 2000", RedFlagCategory.WARNING,
-            "20+ jaar oud - waarschijnlijk renovatie nodig", weight=50),
-    RedFlag("bouwjaar 1995", RedFlagCategory.WARNING,
-            "25+ jaar oud - significante renovatie waarschijnlijk", weight=55),
-    RedFlag("bouwjaar 1990", RedFlagCategory.WARNING,
-            "30+ jaar oud - hoge renovatiekosten verwacht", weight=60),
-]
+def pattern_id(pattern: str) -> str:
+    """Eerste 8 hex-cijfers van de SHA-1 van een (lowercase) pattern"""
+    return hashlib.sha1(pattern.lower().encode('utf-8')).hexdigest()[:8]
+
+
+def snippet(text: str, start: int, end: int, context: int = SNIPPET_CONTEXT) -> str:
+    """
+    Korte tekst rond een match, als bewijs bij een red flag.
+
+    Neemt hoogstens context karakters aan beide kanten, afgekapt op de
+    zin waarin de match staat; waar midden in een zin wordt afgekapt
+    gebeurt dat op een woordgrens, met '…'. Witruimte wordt samengevoegd.
+
+    Args:
+        text: Tekst waarin gematcht is
+        start: Begin van de match
+        end: Einde van de match
+        context: Maximaal aantal karakters context per kant
+
+    Returns:
+        Snippet op één regel
+    """
+    left = max(0, start - context)
+    right = min(len(text), end + context)
+
+    prefix = suffix = ''
+    sentence_ends = [m.end() for m in _SENTENCE_END.finditer(text, left, start)]
+    if sentence_ends:
+        left = sentence_ends[-1]
+    elif left > 0:
+        space = text.find(' ', left, start)
+        left = space + 1 if space != -1 else left
+        prefix = '…'
+
+    sentence_end = _SENTENCE_END.search(text, end, right)
+    if sentence_end:
+        right = sentence_end.start() + (sentence_end.group() != '\n')
+    elif right < len(text):
+        space = text.rfind(' ', end, right)
+        right = space if space != -1 else right
+        suffix = '…'
+
+    return prefix + ' '.join(text[left:right].split()) + suffix
+
+
+class _WordAutomaton:
+    """
+    Aho-Corasick automaton over de losse woorden van alle patterns.
+
+    Vindt alle voorkomens van alle woorden in één pass over de tekst.
+    Karakters worden vergeleken zoals re.IGNORECASE dat doet op lowercase
+    tekst (bv. 'ı' is 'i', 'ſ' is 's'), zodat de resultaten gelijk zijn
+    aan die van de losse regexes.
+    """
+
+    def __init__(self, words: Tuple[str, ...]):
+        self.words = words
+        self.alphabet: List[str] = []
+        self.fold: Dict[str, str] = {}
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+
+        for word_id, word in enumerate(words):
+            node = 0
+            for char in word:
+                char = self._fold(char)
+                if char not in self.alphabet:
+                    self.alphabet.append(char)
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.out[node].append(word_id)
+
+        # Breadth-first: fail links point to the longest proper suffix in the trie
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                if node:
+                    fallback = self.fail[node]
+                    while fallback and char not in self.goto[fallback]:
+                        fallback = self.fail[fallback]
+                    self.fail[child] = self.goto[fallback].get(char, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def state(self) -> Dict[str, Any]:
+        """Volledige toestand als JSON-serialiseerbare dict"""
+        return {
+            'words': list(self.words),
+            'alphabet': self.alphabet,
+            'fold': self.fold,
+            'goto': self.goto,
+            'fail': self.fail,
+            'out': self.out,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> '_WordAutomaton':
+        """Automaton uit state(), zonder hem opnieuw te bouwen"""
+        automaton = cls.__new__(cls)
+        automaton.words = tuple(state['words'])
+        automaton.alphabet = state['alphabet']
+        automaton.fold = state['fold']
+        automaton.goto = state['goto']
+        automaton.fail = state['fail']
+        automaton.out = state['out']
+        return automaton
+
+    def _fold(self, char: str) -> str:
+        """Representant van de IGNORECASE-klasse van een karakter"""
+        folded = self.fold.get(char)
+        if folded is None:
+            folded = char
+            for known in self.alphabet:
+                if re.fullmatch(re.escape(known), char, re.IGNORECASE):
+                    folded = known
+                    break
+            self.fold[char] = folded
+        return folded
+
+    def find(self, text: str) -> List[List[int]]:
+        """
+        Alle voorkomens van alle woorden.
+
+        Returns:
+            Per woord (index in words) de oplopende startposities
+        """
+        occurrences: List[List[int]] = [[] for _ in self.words]
+        goto, fail, out, fold = self.goto, self.fail, self.out, self.fold
+        lengths = [len(word) for word in self.words]
+        node = 0
+        for position, char in enumerate(text):
+            folded = fold.get(char)
+            if folded is None:
+                folded = self._fold(char)
+            while node and folded not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(folded, 0)
+            for word_id in out[node]:
+                occurrences[word_id].append(position + 1 - lengths[word_id])
+        return occurrences
+
+
+@lru_cache(maxsize=8)
+def _automaton(words: Tuple[str, ...]) -> _WordAutomaton:
+    return _WordAutomaton(words)
+
+
+class RedFlagMatcher:
+    """
+    Matcht een lijst RedFlags in één pass over de tekst.
+
+    Geeft dezelfde resultaten als RedFlag.matches per flag: de woorden van
+    een pattern in volgorde, met maximaal MAX_WORD_GAP karakters ertussen.
+    De woorden worden via een Aho-Corasick automaton gevonden; daarna
+    wordt per flag alleen de afstand tussen de gevonden woorden gecheckt.
+    """
+
+    def __init__(self, flags: List[RedFlag], automaton: Optional[_WordAutomaton] = None):
+        """
+        Args:
+            flags: Flags om te matchen
+            automaton: Eerder gebouwde automaton (zie RedFlagPack.matcher);
+                genegeerd als hij niet over dezelfde woorden gaat
+        """
+        self.flags = list(flags)
+        self._flag_words = [flag.pattern.split() for flag in self.flags]
+        words = tuple(sorted({word for words in self._flag_words for word in words}))
+        if automaton is None or automaton.words != words:
+            automaton = _automaton(words)
+        self._automaton = automaton
+        index = {word: i for i, word in enumerate(words)}
+        self._flag_word_ids = [[index[word] for word in words] for words in self._flag_words]
+
+    def scan(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Flags die in de tekst voorkomen, met de plek van de match.
+
+        Args:
+            text: Tekst, al lowercase (zoals RedFlagDetector._extract_text)
+
+        Returns:
+            (index in self.flags, start, end) per gevonden flag, oplopend op
+            index; start/end zijn gelijk aan flag.regex.search(text).span()
+        """
+        occurrences = self._automaton.find(text)
+        hits = []
+        for i, word_ids in enumerate(self._flag_word_ids):
+            span = self._first_match(word_ids, occurrences)
+            if span is not None:
+                hits.append((i, *span))
+        return hits
+
+    def _first_match(self, word_ids: List[int], occurrences: List[List[int]]) -> Optional[Tuple[int, int]]:
+        """
+        Eerste match van de woorden in volgorde, met hoogstens MAX_WORD_GAP ertussen.
+
+        Dezelfde match als de regex: de vroegste start, en daarna per woord
+        het eerstvolgende voorkomen waarmee het pattern nog af te maken is
+        (de regex zoekt non-greedy en backtrackt).
+        """
+        if not word_ids:
+            return 0, 0  # Leeg pattern matcht altijd, net als een lege regex
+        words = self._automaton.words
+        lengths = [len(words[word_id]) for word_id in word_ids]
+
+        # Backwards: the occurrences of each word from which the rest of the pattern can follow
+        valid = [occurrences[word_ids[-1]]]
+        for word_id, length in zip(reversed(word_ids[:-1]), reversed(lengths[:-1])):
+            following = valid[0]
+            starts = []
+            for start in occurrences[word_id]:
+                j = bisect_left(following, start + length)
+                if j < len(following) and following[j] <= start + length + MAX_WORD_GAP:
+                    starts.append(start)
+            if not starts:
+                return None
+            valid.insert(0, starts)
+        if not valid[0]:
+            return None
+
+        # Forwards: the earliest start, then the earliest possible next word
+        start = valid[0][0]
+        end = start + lengths[0]
+        for starts, length in zip(valid[1:], lengths[1:]):
+            end = starts[bisect_left(starts, end)] + length
+        return start, end
+
+
+class RedFlagPack:
+    """
+    Versioned set red flags uit rules/red_flags/<version>.json.
+
+    Patterns toevoegen of aanpassen kan in het JSON bestand, zonder code
+    wijziging. De matcher wordt per pack één keer gebouwd en als artifact
+    in MATCHER_CACHE_DIR bewaard; volgende processen laden hem daaruit.
+    """
+
+    def __init__(self, version: str, data: Dict[str, Any], digest: str):
+        """
+        Args:
+            version: Pack versie (bestandsnaam zonder .json)
+            data: Inhoud van het pack bestand
+            digest: Hash van het pack bestand (sleutel van het matcher artifact)
+        """
+        self.version = version
+        self.description = data.get('description', '')
+        self.digest = digest
+        self.dealbreakers = self._flags(data.get('dealbreakers', []), RedFlagCategory.DEALBREAKER)
+        self.warnings = self._flags(data.get('warnings', []), RedFlagCategory.WARNING)
+
+    @staticmethod
+    def _flags(groups: List[Dict[str, Any]], category: str) -> List[RedFlag]:
+        """RedFlags uit de groepen van een pack (de groep is alleen documentatie)"""
+        return [
+            RedFlag(flag['pattern'], category, flag['reason'], weight=flag['weight'])
+            for group in groups
+            for flag in group['flags']
+        ]
+
+    @property
+    def flags(self) -> List[RedFlag]:
+        """Dealbreakers gevolgd door warnings"""
+        return self.dealbreakers + self.warnings
+
+    @property
+    def artifact_path(self) -> Path:
+        return MATCHER_CACHE_DIR / f'{self.version}-{self.digest}.json'
+
+    @cached_property
+    def matcher(self) -> RedFlagMatcher:
+        """Matcher over de flags van het pack, uit het artifact als dat er is"""
+        automaton = None
+        try:
+            with open(self.artifact_path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('format') == _ARTIFACT_FORMAT:
+                automaton = _WordAutomaton.from_state(state)
+        except (OSError, ValueError, KeyError):
+            pass
+
+        matcher = RedFlagMatcher(self.flags, automaton)
+        if matcher._automaton is not automaton:
+            self._save_artifact(matcher._automaton)
+        return matcher
+
+    def _save_artifact(self, automaton: _WordAutomaton):
+        """Schrijf het artifact atomisch; een niet schrijfbare cache is geen fout"""
+        try:
+            self.artifact_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.artifact_path.with_name(f'{self.artifact_path.name}.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'format': _ARTIFACT_FORMAT, **automaton.state()}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.artifact_path)
+        except OSError:
+            pass
+
+
+def list_packs() -> List[str]:
+    """Beschikbare pack versies"""
+    return sorted(path.stem for path in PACKS_DIR.glob('*.json'))
+
+
+def load_pack(version: str = DEFAULT_PACK) -> RedFlagPack:
+    """
+    Laad een red flag pack (één keer per proces).
+
+    Args:
+        version: Pack versie, bv. 'v2.0.0'
+
+    Returns:
+        Het pack
+
+    Raises:
+        ValueError: Als het pack niet bestaat
+    """
+    return _load_pack(version)
+
+
+@lru_cache(maxsize=None)
+def _load_pack(version: str) -> RedFlagPack:
+    path = PACKS_DIR / f'{version}.json'
+    try:
+        content = path.read_bytes()
+    except FileNotFoundError:
+        raise ValueError(
+            f"Red flag pack '{version}' not found. "
+            f"Available packs: {', '.join(list_packs())}"
+        )
+    digest = hashlib.sha1(content).hexdigest()[:12]
+    return RedFlagPack(version, json.loads(content), digest)
+
+
+def __getattr__(name: str):
+    # DEALBREAKER_FLAGS en WARNING_FLAGS komen uit het standaard pack,
+    # pas geladen als ze gebruikt worden
+    if name == 'DEALBREAKER_FLAGS':
+        return load_pack().dealbreakers
+    if name == 'WARNING_FLAGS':
+        return load_pack().warnings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class RedFlagDetector:
     """Main detector class voor red flag scanning"""
 
-    def __init__(self):
-        self.dealbreakers = DEALBREAKER_FLAGS.copy()
-        self.warnings = WARNING_FLAGS.copy()
+    def __init__(self, pack: str = DEFAULT_PACK, cache: Optional[ScanCache] = None):
+        """
+        Args:
+            pack: Versie van het red flag pack (rules/red_flags/<pack>.json)
+            cache: Cache voor scan resultaten (None: altijd scannen)
+        """
+        self.pack = load_pack(pack)
+        self.dealbreakers = self.pack.dealbreakers.copy()
+        self.warnings = self.pack.warnings.copy()
+        self.cache = cache
+        self._matcher: Optional[RedFlagMatcher] = None
+        self._scan_version: Optional[str] = None
+
+    @property
+    def matcher(self) -> RedFlagMatcher:
+        """Matcher over alle flags, opnieuw gebouwd na add_dealbreaker/add_warning"""
+        flags = self.dealbreakers + self.warnings
+        if self._matcher is None or self._matcher.flags != flags:
+            self._matcher = self.pack.matcher if flags == self.pack.flags else RedFlagMatcher(flags)
+            definitions = [
+                [flag.pattern, flag.category, flag.reason, flag.weight] for flag in flags
+            ]
+            digest = hashlib.sha1(json.dumps([_SCAN_FORMAT, definitions]).encode('utf-8')).hexdigest()[:12]
+            self._scan_version = f'{self.pack.version}-{digest}'
+        return self._matcher
+
+    @property
+    def scan_version(self) -> str:
+        """Pack versie plus hash van de huidige flags: scans met een andere versie zijn verouderd"""
+        self.matcher  # Bijgewerkt na add_dealbreaker/add_warning
+        return self._scan_version
 
     def scan(self, property_data: Dict) -> Dict:
         """
         Scan property voor red flags
 
+        Met een cache wordt een pand waarvan de tekst niet veranderd is niet
+        opnieuw gescand (sleutel: scan_version en een hash van de tekst).
+
         Returns:
-            Dict met recommendation, found flags, en scoring
+            Dict met recommendation, found flags, en scoring. Elke gevonden
+            flag heeft start/end (offsets in _extract_text) en een snippet
+            met de context van de match als bewijs
         """
         # Verzamel alle tekst
-        text = self._extract_text(property_data)
+        original = self._join_text(property_data)
+
+        if self.cache is None:
+            return self._scan_text(original)
+
+        key = scan_key(self.scan_version, original)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._scan_text(original)
+            self.cache.put(key, result)
+        return result
+
+    def _scan_text(self, original: str) -> Dict:
+        """Scan de samengevoegde tekst (zie scan)"""
+        text = original.lower()
+        # Snippets uit de originele tekst, tenzij lowercase de offsets verschuift
+        source = original if len(original) == len(text) else text
 
         found_dealbreakers = []
         found_warnings = []
         total_weight = 0
 
-        # Check dealbreakers
-        for flag in self.dealbreakers:
-            if flag.matches(text):
-                found_dealbreakers.append({
-                    'pattern': flag.pattern,
-                    'reason': flag.reason,
-                    'weight': flag.weight
-                })
-                total_weight += flag.weight
-
-        # Check warnings
-        for flag in self.warnings:
-            if flag.matches(text):
-                found_warnings.append({
-                    'pattern': flag.pattern,
-                    'reason': flag.reason,
-                    'weight': flag.weight
-                })
-                total_weight += flag.weight
+        # Alle flags in één pass over de tekst, met de plek van elke match
+        matcher = self.matcher
+        for i, start, end in matcher.scan(text):
+            flag = matcher.flags[i]
+            found = found_dealbreakers if i < len(self.dealbreakers) else found_warnings
+            found.append({
+                'pattern': flag.pattern,
+                'reason': flag.reason,
+                'weight': flag.weight,
+                'start': start,
+                'end': end,
+                'snippet': snippet(source, start, end)
+            })
+            total_weight += flag.weight
 
         # Determine recommendation
         if found_dealbreakers or total_weight >= 100:
@@ -244,7 +542,11 @@ class RedFlagDetector:
         }
 
     def _extract_text(self, property_data: Dict) -> str:
-        """Extract alle relevante tekst uit property data"""
+        """Extract alle relevante tekst uit property data (lowercase)"""
+        return self._join_text(property_data).lower()
+
+    def _join_text(self, property_data: Dict) -> str:
+        """Alle relevante tekst uit property data, in de originele schrijfwijze"""
         texts = []
 
         # Beschrijving (belangrijkste bron)
@@ -279,7 +581,7 @@ class RedFlagDetector:
             elif isinstance(label, dict) and 'Text' in label:
                 texts.append(label['Text'])
 
-        return ' '.join(texts).lower()
+        return ' '.join(texts)
 
     def add_dealbreaker(self, pattern: str, reason: str, weight: int = 100):
         """Voeg custom dealbreaker toe (makkelijk uitbreiden!)"""
@@ -304,13 +606,25 @@ class RedFlagDetector:
         }
 
 
-def get_detector() -> RedFlagDetector:
-    """Convenience function voor getting detector instance"""
-    return RedFlagDetector()
+def get_detector(pack: str = DEFAULT_PACK) -> RedFlagDetector:
+    """
+    Gedeelde detector per pack (één per proces, buiten het pad per pand),
+    met de gedeelde scan cache: een ongewijzigd pand wordt niet opnieuw
+    gescand, ook niet in een volgende run.
+
+    Niet aanpassen met add_dealbreaker/add_warning: dat geldt dan voor
+    iedereen. Maak voor eigen flags een nieuwe RedFlagDetector.
+    """
+    return _shared_detector(pack)
+
+
+@lru_cache(maxsize=None)
+def _shared_detector(pack: str) -> RedFlagDetector:
+    return RedFlagDetector(pack, cache=get_scan_cache())
 
 
 if __name__ == "__main__":
-    # Test code
+    # Test code (python -m src.red_flags)
     detector = RedFlagDetector()
     print(f"Red Flag Detector geïnitialiseerd")
     print(f"Dealbreakers: {len(detector.dealbreakers)}")
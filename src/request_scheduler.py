@@ -0,0 +1,343 @@
+"""Shared rate limiting and retries for outbound HTTP requests."""
+
+import email.utils
+import os
+import random
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+
+# HTTP statuses worth retrying: rate limited, overloaded (Anthropic 529) or
+# a transient server/gateway failure
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504, 529}
+
+# Methods that may be repeated after a request possibly reached the server.
+# A POST (an LLM call, a message batch) that timed out may already be
+# processed and billed, so it is only retried when it was never sent.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+@dataclass
+class HostLimits:
+    """
+    Request limits for one API host.
+
+    Attributes:
+        requests_per_minute: Sustained request rate (None: unlimited)
+        tokens_per_minute: Sustained LLM token rate, counted from the
+            estimates callers pass to send() (None: unlimited)
+        burst: Requests that may go out at once before the rate applies
+        max_retries: Retries after a retryable failure
+        backoff_base: First backoff delay in seconds (doubled per retry)
+        backoff_max: Maximum backoff delay in seconds
+    """
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    burst: Optional[float] = None
+    max_retries: int = 5
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
+
+
+def _env_rate(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return float(value) or None
+
+
+# Limits per host; the env vars lower them to the account's tier
+DEFAULT_LIMITS: Dict[str, HostLimits] = {
+    "api.anthropic.com": HostLimits(
+        requests_per_minute=_env_rate("ANTHROPIC_RPM", 50),
+        tokens_per_minute=_env_rate("ANTHROPIC_TPM", None),
+        burst=5,
+    ),
+    "api.openai.com": HostLimits(
+        requests_per_minute=_env_rate("OPENAI_RPM", 500),
+        tokens_per_minute=_env_rate("OPENAI_TPM", None),
+        burst=5,
+    ),
+    "api.apify.com": HostLimits(requests_per_minute=_env_rate("APIFY_RPM", 600), burst=10),
+    "api.airroi.com": HostLimits(requests_per_minute=_env_rate("AIRROI_RPM", 60), burst=2),
+    # Nominatim usage policy: at most one request per second
+    "nominatim.openstreetmap.org": HostLimits(requests_per_minute=60, burst=1),
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilling at a fixed rate per minute.
+
+    The level may go negative when more is consumed than was available
+    (e.g. a correction after the actual token usage is known); later
+    acquisitions then wait until the debt is paid off.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize bucket.
+
+        Args:
+            per_minute: Refill rate
+            capacity: Maximum level, i.e. the burst size (default: one
+                minute's worth)
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1) -> float:
+        """
+        Take tokens now, possibly on credit.
+
+        Args:
+            amount: Tokens to take (capped at the capacity, so oversized
+                requests still go through eventually)
+
+        Returns:
+            Seconds to wait before the reservation is covered
+        """
+        with self._lock:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+            return max(0.0, -self.level / self.rate)
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Take tokens, sleeping until they are available.
+
+        Args:
+            amount: Tokens to take
+
+        Returns:
+            Seconds waited
+        """
+        wait = self.reserve(amount)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def adjust(self, amount: float) -> None:
+        """Take (positive) or return (negative) tokens without waiting."""
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value: Header value: seconds, or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RequestScheduler:
+    """
+    Sends HTTP requests within per-host rate limits, retrying transient failures.
+
+    Every request first takes a slot from its host's request bucket (and
+    its estimated tokens from the token bucket). Responses with a
+    retryable status (429, 529, 5xx) and connection errors are retried
+    with jittered exponential backoff; a Retry-After header overrides the
+    backoff and pauses all requests to that host.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, HostLimits]] = None, default: Optional[HostLimits] = None):
+        """
+        Initialize scheduler.
+
+        Args:
+            limits: Limits per host name (default: DEFAULT_LIMITS)
+            default: Limits for other hosts (default: retries, no rate limit)
+        """
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.default = default or HostLimits()
+        self._buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _host_buckets(self, host: str) -> Dict[str, TokenBucket]:
+        with self._lock:
+            if host not in self._buckets:
+                limits = self.limits.get(host, self.default)
+                buckets = {}
+                if limits.requests_per_minute:
+                    buckets["requests"] = TokenBucket(limits.requests_per_minute, limits.burst)
+                if limits.tokens_per_minute:
+                    buckets["tokens"] = TokenBucket(limits.tokens_per_minute)
+                self._buckets[host] = buckets
+            return self._buckets[host]
+
+    def _wait_for_slot(self, host: str, tokens: float) -> None:
+        paused = self._paused_until.get(host, 0) - time.monotonic()
+        if paused > 0:
+            time.sleep(paused)
+
+        buckets = self._host_buckets(host)
+        if "requests" in buckets:
+            buckets["requests"].acquire(1)
+        if tokens and "tokens" in buckets:
+            buckets["tokens"].acquire(tokens)
+
+    def _pause(self, host: str, seconds: float) -> None:
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._paused_until[host] = max(self._paused_until.get(host, 0), until)
+
+    def adjust_tokens(self, url: str, delta: float) -> None:
+        """
+        Correct a token estimate once the actual usage is known.
+
+        Args:
+            url: Request URL (for the host)
+            delta: Actual minus estimated tokens
+        """
+        bucket = self._host_buckets(urllib.parse.urlsplit(url).hostname or "").get("tokens")
+        if bucket and delta:
+            bucket.adjust(delta)
+
+    def open(
+        self,
+        request: Union[urllib.request.Request, str],
+        timeout: float = 30,
+        tokens: float = 0
+    ) -> Any:
+        """
+        Open a request within the host's limits, retrying transient failures.
+
+        Only opening the response is retried; for streamed responses, errors
+        while reading the body are up to the caller. Retryable statuses are
+        retried for every method. Timeouts and dropped connections are only
+        retried for idempotent methods; other requests (POST) are retried
+        only when the connection could not be set up, so nothing was sent.
+
+        Args:
+            request: Request (or URL for a plain GET)
+            timeout: Socket timeout per attempt in seconds
+            tokens: Estimated LLM tokens, counted against tokens_per_minute
+
+        Returns:
+            Open response (use as a context manager)
+
+        Raises:
+            urllib.error.HTTPError: Non-retryable status, or retries exhausted
+                (the body is still unread, so callers can include it)
+            urllib.error.URLError: Connection failed on every attempt, or
+                a non-idempotent request failed after it may have been sent
+        """
+        if isinstance(request, str):
+            request = urllib.request.Request(request)
+
+        host = urllib.parse.urlsplit(request.full_url).hostname or ""
+        limits = self.limits.get(host, self.default)
+        idempotent = request.get_method() in IDEMPOTENT_METHODS
+
+        for attempt in range(limits.max_retries + 1):
+            self._wait_for_slot(host, tokens)
+            try:
+                return urllib.request.urlopen(request, timeout=timeout)
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUSES or attempt == limits.max_retries:
+                    raise
+                delay = retry_after_seconds(e.headers.get("retry-after") if e.headers else None)
+                e.close()
+                reason = f"HTTP {e.code}"
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                if attempt == limits.max_retries or not (idempotent or _not_sent(e)):
+                    raise
+                delay = None
+                reason = str(getattr(e, "reason", e))
+
+            if delay is not None:
+                # The server said when to come back; hold every request to this host
+                delay += random.uniform(0, 0.1 * delay + 0.1)
+                self._pause(host, delay)
+            else:
+                # Full jitter: spreads out retries of concurrent requests
+                delay = random.uniform(0, min(limits.backoff_max, limits.backoff_base * 2 ** attempt))
+
+            print(f"   ↻ {host}: {reason}, retry {attempt + 1}/{limits.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+    def send(
+        self,
+        request: Union[urllib.request.Request, str],
+        timeout: float = 30,
+        tokens: float = 0
+    ) -> bytes:
+        """
+        Send a request within the host's limits, retrying transient failures.
+
+        Args:
+            request: Request (or URL for a plain GET)
+            timeout: Socket timeout per attempt in seconds
+            tokens: Estimated LLM tokens, counted against tokens_per_minute
+
+        Returns:
+            Response body
+
+        Raises:
+            urllib.error.HTTPError: Non-retryable status, or retries exhausted
+                (the body is still unread, so callers can include it)
+            urllib.error.URLError: Connection failed on every attempt, or
+                a non-idempotent request failed after it may have been sent
+        """
+        with self.open(request, timeout=timeout, tokens=tokens) as response:
+            return response.read()
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """Process-wide scheduler shared by all API clients."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
+
+
+def _not_sent(error: Exception) -> bool:
+    """Whether a connection error happened before any of the request was sent."""
+    reason = getattr(error, "reason", error)
+    # Refused connection or failed DNS lookup; a timeout may be a read timeout
+    return isinstance(reason, (ConnectionRefusedError, socket.gaierror))
+
+
+def send(request: Union[urllib.request.Request, str], timeout: float = 30, tokens: float = 0) -> bytes:
+    """Send a request through the shared scheduler (see RequestScheduler.send)."""
+    return get_scheduler().send(request, timeout=timeout, tokens=tokens)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Incrementally sync the local Apify dataset (data/apify_dataset.json.gz).
+
+Usage:
+    python sync_dataset.py                  # Fetch new items only
+    python sync_dataset.py --full           # Re-download and diff everything
+    python sync_dataset.py --compact        # Fold the delta into the base file
+"""
+
+import argparse
+import json
+import sys
+
+from src.apify_client import ApifyClient
+from src.dataset_sync import DATASET_ID, compact_dataset, sync_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync the Apify dataset into data/')
+
+    parser.add_argument(
+        '--dataset-id',
+        default=DATASET_ID,
+        help=f'Apify dataset ID (default: {DATASET_ID})'
+    )
+
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Download every item and compare content hashes'
+    )
+
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Fold the delta into the base dataset after syncing'
+    )
+
+    parser.add_argument(
+        '--compact-only',
+        action='store_true',
+        help='Only fold the delta into the base dataset (no download)'
+    )
+
+    parser.add_argument(
+        '--stats-file',
+        help='Also write the sync statistics as JSON to this file'
+    )
+
+    args = parser.parse_args()
+
+    if args.compact_only:
+        count = compact_dataset()
+        print(f"✅ Compacted dataset ({count} listings)")
+        return 0
+
+    client = ApifyClient()
+    print(f"🔄 Syncing dataset {args.dataset_id}...")
+    stats = sync_dataset(client, args.dataset_id, full=args.full, compact=args.compact)
+
+    print(f"✅ {stats['mode'].capitalize()} sync: fetched {stats['fetched']} of "
+          f"{stats['item_count']} items")
+    print(f"   Added: {stats['added']}, changed: {stats['changed']}, "
+          f"unchanged: {stats['unchanged']}, removed: {stats['removed']}")
+    if stats['compacted']:
+        print("   Delta folded into the base dataset")
+    else:
+        print(f"   Delta holds {stats['delta_size']} listings")
+
+    if args.stats_file:
+        with open(args.stats_file, 'w') as f:
+            json.dump(stats, f, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
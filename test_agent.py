@@ -0,0 +1,681 @@
+#!/usr/bin/env python3
+"""
+Tests for the analysis agent (src/agent.py) with the mock LLM.
+
+Run: python test_agent.py
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.agent import ClaudeLLM, HouseAnalysisAgent, MockLLM
+from src.llm_cache import CachedLLM, LLMCache
+from src.llm_stream import TruncatedResponseError
+from src.request_scheduler import HostLimits, RequestScheduler, TokenBucket
+import src.agent as agent_module
+from rules import get_rules
+from test_dataset import load_raw_records
+
+
+class SlowMockLLM(MockLLM):
+    """Mock LLM that takes a while and records how many calls overlap."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def analyze(self, prompt):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return super().analyze(prompt)
+
+
+def test_analyze_many():
+    """analyze_many runs LLM calls concurrently up to the provider cap."""
+    records = load_raw_records()[:6]
+    houses = [
+        {'house_id': record['Identifiers']['TinyId'], 'house_data': record}
+        for record in records
+    ]
+
+    agent = HouseAnalysisAgent(rules_version='v2.0.0', llm_provider='mock')
+    agent.llm = SlowMockLLM()
+
+    cap = agent_module.PROVIDER_CONCURRENCY['mock']
+    agent_module.PROVIDER_CONCURRENCY['mock'] = 3
+    try:
+        started = time.time()
+        results = agent.analyze_many(houses)
+        elapsed = time.time() - started
+    finally:
+        agent_module.PROVIDER_CONCURRENCY['mock'] = cap
+
+    assert [r['house_id'] for r in results] == [h['house_id'] for h in houses]
+    for result in results:
+        agent.validate_analysis(result)
+
+    # Same result shape as the blocking path
+    single = agent.analyze_house(records[0], houses[0]['house_id'])
+    assert single.keys() == results[0].keys()
+    assert single['overall_score'] == results[0]['overall_score']
+
+    assert agent.llm.max_active == 3, agent.llm.max_active
+    assert elapsed < len(houses) * agent.llm.delay
+
+    print(f"✅ analyze_many ran {len(houses)} houses, {agent.llm.max_active} at a time ({elapsed:.2f}s)")
+
+
+class CountingLLM(MockLLM):
+    """Mock LLM posing as a real provider, counting calls."""
+
+    provider = 'claude'
+    model = 'test-model'
+    max_tokens = 8000
+
+    def __init__(self):
+        self.calls = 0
+
+    def analyze(self, prompt):
+        self.calls += 1
+        return super().analyze(prompt)
+
+
+def test_llm_cache():
+    """Identical prompts are answered from the cache; LRU eviction by size."""
+    record = load_raw_records()[0]
+    house_id = record['Identifiers']['TinyId']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(Path(tmp), max_bytes=10 * 1024 * 1024)
+        agent = HouseAnalysisAgent(rules_version='v2.0.0', llm_provider='mock')
+        llm = CountingLLM()
+        agent.llm = CachedLLM(llm, cache)
+
+        first = agent.analyze_house(record, house_id)
+        second = agent.analyze_house(record, house_id)
+        assert llm.calls == 1
+        assert first['category_scores'] == second['category_scores']
+
+        # Different request parameters: cache miss
+        llm.max_tokens = 4000
+        agent.llm = CachedLLM(llm, cache)
+        agent.analyze_house(record, house_id)
+        assert llm.calls == 2
+
+        # Refresh calls the LLM again
+        agent.llm = CachedLLM(llm, cache, refresh=True)
+        agent.analyze_house(record, house_id)
+        assert llm.calls == 3
+
+        # Least recently used entry goes first
+        lru = LLMCache(Path(tmp) / 'lru')
+        for n, key in enumerate(['a' * 64, 'b' * 64]):
+            lru.put(key, 'response')
+            os.utime(lru._path(key), (1000 + n, 1000 + n))
+        # Room for two entries (compressed sizes differ by a few bytes with the timestamp)
+        lru.max_bytes = lru.size() + 64
+        assert lru.get('a' * 64) == 'response'  # Now the most recent
+        lru.put('c' * 64, 'response')
+        assert lru.get('b' * 64) is None
+        assert lru.get('a' * 64) == lru.get('c' * 64) == 'response'
+
+    print("✅ LLM cache answered repeated prompt without an API call")
+
+
+def test_prompt_caching():
+    """The static rules prefix is identical per house and sent as a cached block."""
+    records = load_raw_records()[:2]
+    rules = get_rules('v2.0.0')
+    prompts = [rules.get_analysis_prompt(record) for record in records]
+
+    assert prompts[0].static == prompts[1].static
+    assert prompts[0].dynamic != prompts[1].dynamic
+    assert str(prompts[0]) == prompts[0].static + '\n' + prompts[0].dynamic
+    assert records[0]['Identifiers']['TinyId'] not in prompts[0].static
+
+    llm = ClaudeLLM(api_key='test')
+    content = llm.request_body(prompts[0])['messages'][0]['content']
+    assert content[0] == {
+        'type': 'text', 'text': prompts[0].static, 'cache_control': {'type': 'ephemeral'}
+    }
+    assert content[1] == {'type': 'text', 'text': prompts[0].dynamic}
+
+    # Plain prompts (older rules versions) are sent as before
+    plain = get_rules('v1.1.0').get_analysis_prompt(records[0])
+    assert llm.request_body(plain)['messages'][0]['content'] == plain
+
+    print(f"✅ Static prompt prefix cacheable ({len(prompts[0].static)} of {len(prompts[0])} chars)")
+
+
+def test_fast_reject():
+    """Houses with dealbreakers get a local AFWIJZEN analysis without an LLM call."""
+    records = {record['Identifiers']['TinyId']: record for record in load_raw_records()}
+    rejected, accepted = records['43017473'], records['43132761']
+
+    agent = HouseAnalysisAgent(rules_version='v2.0.0', llm_provider='mock', fast_reject=True)
+    agent.llm = CountingLLM()
+
+    analysis = agent.analyze_house(rejected, '43017473')
+    agent.validate_analysis(analysis)
+    assert agent.llm.calls == 0
+    assert analysis['investment_recommendation'].startswith('AFWIJZEN')
+    assert analysis['metadata']['llm_model'] == 'red_flags'
+    assert analysis['overall_score'] <= 3
+    dealbreakers = analysis['category_scores']['legal']['red_flags']
+    assert dealbreakers and analysis['top_concerns'][:len(dealbreakers)] == dealbreakers
+    assert set(analysis['category_scores']) == set(agent.rules.categories)
+    assert [flag['pattern'] for flag in analysis['red_flags']['dealbreakers']] == ['verhuur niet mogelijk', 'roompot']
+    assert 'Roompot' in analysis['red_flags']['dealbreakers'][1]['snippet']
+
+    # The full analysis stores the evidence its prompt was built with
+    full = agent.analyze_house(accepted, '43132761')
+    assert agent.llm.calls == 1
+    assert full['red_flags'] == agent.rules.get_analysis_prompt(accepted).red_flags
+
+    # Opt-in only, and only for rules with red flag pre-screening
+    agent = HouseAnalysisAgent(rules_version='v2.0.0', llm_provider='mock')
+    agent.llm = CountingLLM()
+    agent.analyze_house(rejected, '43017473')
+    assert agent.llm.calls == 1
+    assert get_rules('v1.1.0').fast_rejection(rejected) is None
+
+    print(f"✅ Dealbreaker house rejected locally (score {analysis['overall_score']})")
+
+
+class CategoryMockLLM(MockLLM):
+    """Mock LLM answering category prompts and the synthesis prompt separately."""
+
+    def __init__(self):
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def analyze(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+        if '## 🧩 SYNTHESE' in prompt:
+            return json.dumps({
+                'overall_assessment': 'Synthese',
+                'top_strengths': ['Locatie'],
+                'top_concerns': ['Erfpacht'],
+                'investment_recommendation': 'OVERWEGEN - check erfpacht',
+                'action_plan': ['Vraag erfpachtvoorwaarden op'],
+            })
+        # A real model answers only its own category; the mock answers all of them
+        return super().analyze(prompt)
+
+
+class SlowCategoryMockLLM(CategoryMockLLM):
+    """Category mock LLM tracking how many calls run at the same time."""
+
+    delay = 0.05
+
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.max_active = 0
+
+    def analyze(self, prompt):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return super().analyze(prompt)
+
+
+def test_per_category():
+    """Categories are analyzed in separate calls and merged with the synthesis."""
+    from test_rules import ENRICHMENT, MARKET_METRICS
+
+    record = {r['Identifiers']['TinyId']: r for r in load_raw_records()}['43132761']
+    agent = HouseAnalysisAgent(rules_version='v2.0.0', llm_provider='mock', per_category=True)
+    agent.llm = CategoryMockLLM()
+
+    analysis = agent.analyze_house(record, '43132761', enrichment_data=ENRICHMENT, market_metrics=MARKET_METRICS)
+    agent.validate_analysis(analysis)
+
+    categories = agent.rules.categories
+    assert len(agent.llm.prompts) == len(categories) + 1
+    assert list(analysis['category_scores']) == list(categories)
+    assert analysis['overall_score'] == agent.rules.calculate_overall_score(
+        {name: category['score'] for name, category in analysis['category_scores'].items()}
+    )
+    assert analysis['investment_recommendation'].startswith('OVERWEGEN')
+    assert analysis['action_plan'] == ['Vraag erfpachtvoorwaarden op']
+    assert analysis['metadata']['llm_calls'] == len(categories) + 1
+    assert set(analysis['metadata']['prompts']) == set(categories) | {'synthesis'}
+
+    # Market data only goes to the categories that use it; the synthesis sees the category results
+    prompts = agent.rules.get_category_prompts(record, ENRICHMENT, MARKET_METRICS)
+    assert 'AIRROI' in prompts['financial'] and 'AIRROI' not in prompts['legal']
+    assert all(f'"{name}"' in prompt.static for name, prompt in prompts.items())
+    assert '"score": 8.5' in agent.llm.prompts[-1]
+
+    # Async path and rules without a per-category mode
+    results = agent.analyze_many([{'house_id': '43132761', 'house_data': record}])
+    assert results[0]['action_plan'] and results[0]['metadata']['llm_calls'] == len(categories) + 1
+    assert get_rules('v1.1.0').get_category_prompts(record) is None
+    assert get_rules('v1.1.0').get_synthesis_prompt(record, analysis['category_scores']) is None
+
+    # The blocking path holds the same provider request slots as the async
+    # path, also across threads (batch --workers), each with its own loop
+    agent.llm = SlowCategoryMockLLM()
+    cap = agent_module.PROVIDER_CONCURRENCY['mock']
+    agent_module.PROVIDER_CONCURRENCY['mock'] = 2
+    try:
+        agent.analyze_house(record, '43132761')
+        assert agent.llm.max_active == 2, agent.llm.max_active
+        workers = [threading.Thread(target=agent.analyze_house, args=(record, '43132761')) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        agent_module.PROVIDER_CONCURRENCY['mock'] = cap
+    assert agent.llm.max_active == 2, agent.llm.max_active
+
+    # Rules without a synthesis step: overall score from the categories only
+    agent.llm = CategoryMockLLM()
+    agent.rules.get_synthesis_prompt = lambda house_data, category_scores: None
+    unsynthesized = agent.analyze_house(record, '43132761')
+    assert len(agent.llm.prompts) == len(categories)
+    assert unsynthesized['metadata']['llm_calls'] == len(categories)
+    assert set(unsynthesized['metadata']['prompts']) == set(categories)
+    assert unsynthesized['overall_score'] == analysis['overall_score']
+    assert unsynthesized['overall_assessment'] == ''
+
+    sizes = {name: breakdown['total_tokens'] for name, breakdown in analysis['metadata']['prompts'].items()}
+    print(f"✅ Per-category analysis merged from {len(sizes)} calls: {sizes}")
+
+
+class ScreeningMockLLM(MockLLM):
+    """Mock small model returning the same score for every category."""
+
+    model = 'mock-small'
+
+    def __init__(self, score):
+        self.score = score
+        self.prompts = []
+
+    def analyze(self, prompt):
+        self.prompts.append(prompt)
+        return json.dumps({
+            'category_scores': {
+                name: {'score': self.score, 'reasoning': 'Screening'}
+                for name in ('location', 'property', 'financial', 'legal')
+            },
+            'overall_assessment': 'Screening',
+            'investment_recommendation': 'AFWIJZEN - lage score' if self.score < 4 else 'OVERWEGEN',
+        })
+
+
+def test_cascade():
+    """Only houses whose screening score exceeds the threshold get the full analysis."""
+    record = {r['Identifiers']['TinyId']: r for r in load_raw_records()}['43132761']
+    agent = HouseAnalysisAgent(rules_version='v2.0.0', llm_provider='mock', cascade_threshold=4.0)
+    agent.llm = CountingLLM()
+
+    # Below the threshold: the screening is the analysis
+    agent.screening_llm = ScreeningMockLLM(score=3.0)
+    analysis = agent.analyze_house(record, '43132761')
+    agent.validate_analysis(analysis)
+    assert agent.llm.calls == 0
+    assert analysis['overall_score'] == 3.0
+    assert analysis['metadata']['llm_model'] == 'screening'
+    assert analysis['metadata']['screening'] == {
+        'model': 'mock-small', 'overall_score': 3.0, 'threshold': 4.0, 'passed': False
+    }
+    full_prompt = agent.rules.get_analysis_prompt(record)
+    assert len(agent.screening_llm.prompts[0]) < len(full_prompt) / 2
+
+    # Above it: full analysis, screening recorded
+    agent.screening_llm = ScreeningMockLLM(score=6.0)
+    analysis = agent.analyze_house(record, '43132761')
+    assert agent.llm.calls == 1
+    assert analysis['metadata']['llm_model'] == 'mock'
+    assert analysis['metadata']['screening']['passed'] is True
+    assert analysis['overall_score'] != 6.0
+
+    # Async path; a failed screening falls back to the full analysis
+    agent.screening_llm = ScreeningMockLLM(score=3.0)
+    agent.screening_llm.analyze = lambda prompt: 'not json'
+    results = agent.analyze_many([{'house_id': '43132761', 'house_data': record}])
+    assert agent.llm.calls == 2 and 'screening' not in results[0]['metadata']
+
+    # Screening model overrides apply to their own provider only (read at import)
+    env = dict(os.environ, CLAUDE_SCREENING_MODEL='claude-test')
+    env.pop('OPENAI_SCREENING_MODEL', None)
+    output = subprocess.run(
+        [sys.executable, '-c', 'import json; from src.agent import SCREENING_MODELS; print(json.dumps(SCREENING_MODELS))'],
+        cwd=Path(__file__).parent, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert json.loads(output) == {'mock': 'mock', 'claude': 'claude-test', 'openai': 'gpt-4o-mini'}
+
+    print("✅ Cascade kept screening below threshold, full analysis above it")
+
+
+class BatchStubHandler(BaseHTTPRequestHandler):
+    """Minimal Message Batches API: one poll in progress, then ended."""
+
+    batches = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, content_type='application/json'):
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        assert self.headers['x-api-key'] == 'test'
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        batch_id = f"msgbatch_{len(self.batches) + 1}"
+        self.batches[batch_id] = {'requests': body['requests'], 'polls': 0}
+        self._send(json.dumps({'id': batch_id, 'processing_status': 'in_progress'}))
+
+    def do_GET(self):
+        host = f"http://{self.headers['Host']}"
+        if self.path.startswith('/results/'):
+            lines = []
+            for request in self.batches[self.path.rsplit('/', 1)[1]]['requests']:
+                content = request['params']['messages'][0]['content']
+                assert content[0]['cache_control'] == {'type': 'ephemeral'}
+                if request['custom_id'] == 'fail':
+                    result = {'type': 'errored', 'error': {'type': 'error', 'error': {
+                        'type': 'overloaded_error', 'message': 'Overloaded'}}}
+                else:
+                    result = {'type': 'succeeded', 'message': {
+                        'content': [{'type': 'text', 'text': MockLLM().analyze('')}]}}
+                lines.append(json.dumps({'custom_id': request['custom_id'], 'result': result}))
+            self._send('\n'.join(lines), 'application/binary')
+            return
+
+        batch_id = self.path.rsplit('/', 1)[1]
+        batch = self.batches[batch_id]
+        batch['polls'] += 1
+        if batch['polls'] < 2:
+            self._send(json.dumps({'id': batch_id, 'processing_status': 'in_progress',
+                                   'request_counts': {'processing': len(batch['requests'])}}))
+        else:
+            self._send(json.dumps({'id': batch_id, 'processing_status': 'ended',
+                                   'results_url': f"{host}/results/{batch_id}"}))
+
+
+def test_analyze_batch():
+    """Message batch results go through the normal result path and the cache."""
+    records = load_raw_records()[:3]
+    houses = [
+        {'house_id': record['Identifiers']['TinyId'], 'house_data': record}
+        for record in records
+    ]
+    houses[-1]['house_id'] = 'fail'
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), BatchStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            agent = HouseAnalysisAgent(rules_version='v2.0.0', llm_provider='mock')
+            llm = ClaudeLLM(api_key='test')
+            llm.api_url = f"http://127.0.0.1:{server.server_port}/v1/messages"
+            agent.llm = CachedLLM(llm, LLMCache(Path(tmp)))
+            agent.llm_provider = 'claude'
+
+            results = agent.analyze_batch(houses, poll_interval=0)
+            assert len(BatchStubHandler.batches) == 1
+            for house, result in zip(houses[:2], results[:2]):
+                agent.validate_analysis(result)
+                assert result['house_id'] == house['house_id']
+            assert isinstance(results[2], Exception)
+            assert 'overloaded_error' in str(results[2])
+
+            # Succeeded responses were cached; only the failed house is resubmitted
+            agent.analyze_batch(houses, poll_interval=0)
+            assert len(BatchStubHandler.batches) == 2
+            assert [r['custom_id'] for r in BatchStubHandler.batches['msgbatch_2']['requests']] == ['fail']
+
+            # A batch outlasting the timeout is saved on submit and collected later without resubmitting
+            agent.llm = CachedLLM(llm, LLMCache(Path(tmp) / 'resume'))
+            submitted = []
+            try:
+                agent.analyze_batch(houses[:2], poll_interval=0, timeout=0, on_submitted=submitted.append)
+                assert False, "Expected a timeout"
+            except TimeoutError as e:
+                assert submitted == [['msgbatch_3']] and 'msgbatch_3' in str(e)
+            results = agent.analyze_batch(houses[:2], poll_interval=0, batch_ids=submitted[-1])
+            assert len(BatchStubHandler.batches) == 3
+            assert [result['house_id'] for result in results] == [house['house_id'] for house in houses[:2]]
+
+            # Resuming for fewer houses than the batch holds skips the extra results
+            agent.llm = CachedLLM(llm, LLMCache(Path(tmp) / 'resume_subset'))
+            results = agent.analyze_batch(houses[:1], poll_interval=0, batch_ids=submitted[-1])
+            assert len(BatchStubHandler.batches) == 3
+            assert [result['house_id'] for result in results] == [houses[0]['house_id']]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"✅ Message batch analyzed {len(houses) - 1} houses, failure reported per house")
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Responds 429 (with retry-after), then 529, then 200; /bad is a 400."""
+
+    calls = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.calls.append(time.monotonic())
+        if self.path == '/bad':
+            status, headers, body = 400, {}, b'invalid request'
+        elif self.path == '/flaky' and len(self.calls) == 1:
+            status, headers, body = 429, {'retry-after': '0.2'}, b'rate limited'
+        elif self.path == '/flaky' and len(self.calls) == 2:
+            status, headers, body = 529, {}, b'overloaded'
+        else:
+            status, headers, body = 200, {}, b'ok'
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        # Accepts the request, then answers too late: a read timeout
+        self.calls.append(time.monotonic())
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(0.3)
+        try:
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up
+
+
+def test_request_scheduler():
+    """Test retries on 429/529 and per-host request pacing"""
+    print("\n⏱️  Testing request scheduler...")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        scheduler = RequestScheduler(limits={}, default=HostLimits(backoff_base=0.01))
+
+        # 429 honours retry-after, 529 falls back to backoff, then succeeds
+        assert scheduler.send(f"{base}/flaky") == b'ok'
+        assert len(FlakyHandler.calls) == 3
+        assert FlakyHandler.calls[1] - FlakyHandler.calls[0] >= 0.2
+
+        # Non-retryable errors raise at once with the body unread
+        FlakyHandler.calls.clear()
+        try:
+            scheduler.send(f"{base}/bad")
+            assert False, "400 should raise"
+        except urllib.error.HTTPError as e:
+            assert e.code == 400 and e.read() == b'invalid request'
+        assert len(FlakyHandler.calls) == 1
+
+        # A POST that timed out may have been processed: not sent again
+        once = RequestScheduler(limits={}, default=HostLimits(max_retries=2, backoff_base=0.01))
+        FlakyHandler.calls.clear()
+        try:
+            once.send(urllib.request.Request(f"{base}/slow", data=b'{}'), timeout=0.1)
+            assert False, "timeout should raise"
+        except (urllib.error.URLError, TimeoutError):
+            pass
+        assert len(FlakyHandler.calls) == 1
+
+        # A POST whose connection was refused never reached the server: retried
+        closed = socket.socket()
+        closed.bind(('127.0.0.1', 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+        with mock.patch('urllib.request.urlopen', wraps=urllib.request.urlopen) as urlopen:
+            try:
+                once.send(urllib.request.Request(f"http://127.0.0.1:{closed_port}/", data=b'{}'))
+                assert False, "refused connection should raise"
+            except urllib.error.URLError:
+                pass
+        assert urlopen.call_count == 3
+
+        # 600 requests/minute with no burst: one request per 0.1s
+        paced = RequestScheduler(limits={'127.0.0.1': HostLimits(requests_per_minute=600, burst=1)})
+        FlakyHandler.calls.clear()
+        for _ in range(4):
+            paced.send(f"{base}/ok")
+        assert FlakyHandler.calls[-1] - FlakyHandler.calls[0] >= 0.28
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Token budget: a full bucket goes at once, the next request waits for the refill
+    bucket = TokenBucket(6000, capacity=100)
+    assert bucket.acquire(100) == 0
+    assert 0.45 <= bucket.reserve(50) <= 0.55
+
+    print("✅ Retries honour retry-after and backoff, POSTs not resent after a timeout, requests paced per host")
+
+
+class SSEStubHandler(BaseHTTPRequestHandler):
+    """Streams the mock analysis as Messages API events; /short stops at max_tokens halfway."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        assert body['stream'] is True
+
+        text = MockLLM().analyze('')
+        if self.path == '/short':
+            text, stop_reason = text[:len(text) // 2], 'max_tokens'
+        else:
+            stop_reason = 'end_turn'
+
+        events = [('message_start', {'message': {'usage': {'input_tokens': 10}}})]
+        events += [
+            ('content_block_delta', {'delta': {'type': 'text_delta', 'text': text[i:i + 30]}})
+            for i in range(0, len(text), 30)
+        ]
+        events.append(('message_delta', {'delta': {'stop_reason': stop_reason}}))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for event, data in events:
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+
+
+def test_streaming():
+    """Streamed responses report categories as they complete and fail fast when cut off."""
+    print("\n📡 Testing streamed analysis...")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SSEStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        llm = ClaudeLLM(api_key='test')
+        llm.api_url = f"{base}/v1/messages"
+        updates = []
+        response = llm.analyze_stream('prompt', on_progress=updates.append)
+        assert json.loads(response) == json.loads(MockLLM().analyze(''))
+
+        categories = [u.latest for u in updates if u.latest and u.latest.startswith('category_scores.')]
+        assert categories == [f"category_scores.{c}" for c in ('location', 'property', 'financial', 'legal')]
+        # Each category arrives while the rest of the response is still being generated
+        first = next(u for u in updates if u.latest == 'category_scores.location')
+        assert first.value['score'] == 8.5 and first.output_tokens < updates[-1].output_tokens
+        assert updates[-1].done
+
+        # Cut off at max_tokens: an error naming what did complete
+        llm.api_url = f"{base}/short"
+        try:
+            llm.analyze_stream('prompt')
+            assert False, "truncated response should raise"
+        except TruncatedResponseError as e:
+            assert 'max_tokens' in str(e)
+            assert ('category_scores', 'location') in e.completed
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Over the output budget: aborted before the response is complete
+    agent = HouseAnalysisAgent(rules_version='v2.0.0', llm_provider='mock', stream=True, output_token_budget=100)
+    house = load_raw_records()[0]
+    try:
+        agent.analyze_house(house, house['Identifiers']['TinyId'])
+        assert False, "response over budget should raise"
+    except TruncatedResponseError as e:
+        assert 'budget of 100 tokens' in str(e)
+        assert len(e.text) < len(MockLLM().analyze(''))
+
+    print("✅ Categories streamed as they complete, truncation and budget overrun detected")
+
+
+if __name__ == '__main__':
+    try:
+        test_analyze_many()
+        test_llm_cache()
+        test_prompt_caching()
+        test_fast_reject()
+        test_per_category()
+        test_cascade()
+        test_analyze_batch()
+        test_request_scheduler()
+        test_streaming()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for house lookups in Apify datasets (src/apify_client.py).
+
+The client runs against an in-memory dataset that counts item requests, so
+the tests check how much of the dataset a lookup downloads.
+
+Run: python test_apify_client.py
+"""
+
+import copy
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.apify_client import ApifyClient, item_ids
+from test_dataset import load_raw_records
+
+
+class FakeApifyClient(ApifyClient):
+    """ApifyClient serving dataset items from a list, counting requests."""
+
+    def __init__(self, items):
+        super().__init__(api_token='test')
+        self.items = items
+        self.calls = []
+
+    def get_dataset_item_count(self, dataset_id):
+        self.calls.append(('count',))
+        return len(self.items)
+
+    def get_dataset_items(self, dataset_id, offset=0, limit=1000, fields=None, clean=False):
+        self.calls.append(('items', offset, limit))
+        return self.items[offset:offset + limit]
+
+
+class FakeIndex:
+    """Local dataset index stand-in (DatasetIndex.lookup)."""
+
+    def __init__(self, record_numbers):
+        self.record_numbers = record_numbers
+
+    def lookup(self, house_id):
+        return self.record_numbers.get(str(house_id))
+
+
+def tiny_id(record):
+    return str(record['Identifiers']['TinyId'])
+
+
+def test_get_house_data():
+    """A lookup scans id pages only up to the first match, or uses the local index offset."""
+    print("\n🔍 Testing Apify house lookup...")
+
+    records = load_raw_records()[:10]
+
+    # The scan stops at the page holding the house, then fetches that one item
+    client = FakeApifyClient(records)
+    assert client.get_house_data('test', tiny_id(records[1]), page_size=4) == records[1]
+    assert client.calls == [('items', 0, 4), ('items', 1, 1)]
+
+    # Ids seen while scanning are remembered: no second scan
+    client.calls.clear()
+    assert client.get_house_data('test', tiny_id(records[2]), page_size=4) == records[2]
+    assert client.calls == [('items', 2, 1)]
+
+    # The local index offset is tried first and needs no scan at all
+    client = FakeApifyClient(records)
+    index = FakeIndex({tiny_id(records[7]): 7})
+    assert client.get_house_data('test', tiny_id(records[7]), id_index=index, page_size=4) == records[7]
+    assert client.calls == [('items', 7, 1)]
+
+    # An outdated index offset falls back to the scan
+    client.calls.clear()
+    index = FakeIndex({tiny_id(records[6]): 3})
+    assert client.get_house_data('test', tiny_id(records[6]), id_index=index, page_size=4) == records[6]
+    assert client.calls == [('items', 3, 1), ('items', 0, 4), ('items', 4, 4), ('items', 6, 1)]
+
+    # Dataset rewritten after the id map was built: the stale offset is dropped and rescanned
+    client.items = records[5:] + records[:5]
+    client.calls.clear()
+    assert client.get_house_data('test', tiny_id(records[1]), page_size=4) == records[1]
+    assert client.calls == [('items', 1, 1), ('items', 0, 4), ('items', 4, 4), ('items', 6, 1)]
+
+    # Unknown ids scan the whole dataset once and return None
+    client = FakeApifyClient(records)
+    assert client.get_house_data('test', '1', page_size=4) is None
+    assert client.calls == [('items', 0, 4), ('items', 4, 4), ('items', 8, 4)]
+
+    print("✅ Lookups stop at the first match, use the local index and recover from stale offsets")
+
+
+def test_url_ids():
+    """Items without id fields match on numeric URL path segments only."""
+    print("\n🔗 Testing URL ids...")
+
+    url = 'https://www.funda.nl/detail/recreatie/hoenderloo-gem-apeldoorn/huis-krimweg-140-a65/43017473/'
+    assert item_ids({'url': url}) == ['43017473']
+    assert item_ids({'Urls': {'FriendlyUrl': {'FullUrl': url}}}) == ['43017473']
+
+    # Unlike a substring test, parts of the id or address don't match
+    client = FakeApifyClient([{'url': url}])
+    assert client.get_house_data('test', '43017473') == {'url': url}
+    for partial in ('4301', '140', 'a65'):
+        assert client.resolve_ids('test', [partial]) == {partial: None}
+
+    print("✅ URL path segments matched exactly")
+
+
+def test_resolve_ids():
+    """Any id form resolves to the item offset; the map is reused and extended."""
+    print("\n🗺️  Testing id resolution...")
+
+    records = load_raw_records()[:10]
+    # A listing whose sitemap propertyId differs from its TinyId
+    record = records[5] = copy.deepcopy(records[5])
+    record['sitemapData']['propertyId'] = 990000005
+    tiny = tiny_id(record)
+    global_id = str(record['Identifiers']['GlobalId'])
+    property_id = '990000005'
+    assert len({tiny, global_id, property_id}) == 3
+
+    client = FakeApifyClient(records)
+    resolved = client.resolve_ids('test', [tiny, global_id, property_id], page_size=4)
+    assert resolved == {tiny: 5, global_id: 5, property_id: 5}
+    assert client.calls == [('items', 0, 4), ('items', 4, 4)]
+
+    # Known ids are dictionary hits, no requests
+    client.calls.clear()
+    resolved = client.resolve_ids('test', [tiny_id(records[0]), global_id], page_size=4)
+    assert resolved == {tiny_id(records[0]): 0, global_id: 5}
+    assert client.calls == []
+
+    # After a complete scan, unknown ids only cost an item count request
+    assert client.resolve_ids('test', ['1'], page_size=4) == {'1': None}
+    client.calls.clear()
+    assert client.resolve_ids('test', ['1'], page_size=4) == {'1': None}
+    assert client.calls == [('count',)]
+
+    # Items appended later are found by scanning from the end of the map
+    client.items = records + load_raw_records()[10:12]
+    client.calls.clear()
+    appended = tiny_id(client.items[11])
+    assert client.resolve_ids('test', [appended], page_size=4) == {appended: 11}
+    assert client.calls == [('count',), ('items', 10, 4)]
+
+    print("✅ TinyId, GlobalId and propertyId resolved from one map, appended items found")
+
+
+if __name__ == '__main__':
+    try:
+        test_get_house_data()
+        test_url_ids()
+        test_resolve_ids()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
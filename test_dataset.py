@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Tests for local dataset access (src/dataset.py).
+
+Builds small compressed datasets from the raw Funda records archived under
+houses/*/raw and checks index lookups and the block format against a plain
+json.load of the same data.
+
+Run: python test_dataset.py
+"""
+
+import gzip
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.dataset import DatasetIndex, convert_dataset, get_index, iter_dataset_records
+from src.dataset_store import DatasetStore
+from src.dataset_sync import MANIFEST_PATH, SyncManifest, sync_dataset
+
+
+def load_raw_records():
+    """Load the most recent raw record of every archived house."""
+    records = []
+    for house_dir in sorted(Path('houses').iterdir()):
+        raw_files = sorted((house_dir / 'raw').glob('data_*.json'))
+        if raw_files:
+            with open(raw_files[-1], 'r') as f:
+                records.append(json.load(f))
+    return records
+
+
+class FakeApify:
+    """Serves dataset items from a list like the Apify items endpoint."""
+
+    def __init__(self, items):
+        self.items = items
+        self.fetched = 0
+
+    def get_dataset_item_count(self, dataset_id):
+        return len(self.items)
+
+    def get_dataset_items(self, dataset_id, offset=0, limit=1000, fields=None, clean=False):
+        page = self.items[offset:offset + limit]
+        self.fetched += len(page)
+        return page
+
+
+def write_dataset(path, records, indent=None):
+    """Write records the way the sync workflow does (one gzip stream)."""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(records, f, indent=indent, ensure_ascii=False)
+
+
+def test_index_lookup():
+    """Every id resolves to the same record a full json.load finds."""
+    records = load_raw_records()
+    assert records, "No raw house records found"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for indent in (None, 2):
+            dataset_path = Path(tmp) / f'dataset_{indent}.json.gz'
+            index_path = Path(tmp) / f'dataset_{indent}.index.json.gz'
+            write_dataset(dataset_path, records, indent=indent)
+
+            index = get_index(dataset_path, index_path)
+            assert len(index) == len(records)
+
+            reloaded = DatasetIndex.load(index_path, dataset_path)
+            assert reloaded is not None
+
+            for record in records:
+                tiny_id = record['Identifiers']['TinyId']
+                global_id = record['Identifiers']['GlobalId']
+                assert reloaded.get(tiny_id) == record
+                assert reloaded.get(global_id) == record
+
+            assert reloaded.get('does-not-exist') is None
+
+    print(f"✅ Index lookups match for {len(records)} records")
+
+
+def test_stale_index():
+    """An index is ignored once the dataset changes."""
+    records = load_raw_records()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_path = Path(tmp) / 'dataset.json.gz'
+        index_path = Path(tmp) / 'dataset.index.json.gz'
+
+        write_dataset(dataset_path, records)
+        get_index(dataset_path, index_path)
+
+        write_dataset(dataset_path, records[:-1])
+        assert DatasetIndex.load(index_path, dataset_path) is None
+        assert len(get_index(dataset_path, index_path)) == len(records) - 1
+
+    print("✅ Stale index detected and rebuilt")
+
+
+def test_block_format():
+    """Block format round-trips and stays a plain gzip JSON array."""
+    records = load_raw_records()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_path = Path(tmp) / 'export.json'
+        dataset_path = Path(tmp) / 'dataset.json.gz'
+        index_path = Path(tmp) / 'dataset.index.json.gz'
+
+        with open(source_path, 'w') as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+
+        index = convert_dataset(source_path, dataset_path, index_path, records_per_block=4)
+        assert len(index.blocks) == (len(records) + 3) // 4
+
+        # Readable as one regular gzip stream
+        with gzip.open(dataset_path, 'rt', encoding='utf-8') as f:
+            assert json.load(f) == records
+
+        reloaded = DatasetIndex.load(index_path, dataset_path)
+        assert reloaded.blocks == index.blocks
+        assert list(reloaded.iter_records(workers=2)) == records
+
+        for record in reversed(records):
+            assert reloaded.get(record['Identifiers']['TinyId']) == record
+
+        # Rebuilding from the file recovers the same block table
+        rebuilt = DatasetIndex.build(dataset_path)
+        assert rebuilt.blocks == index.blocks
+        assert rebuilt.offsets == index.offsets
+
+    print(f"✅ Block format round-trips ({len(index.blocks)} blocks)")
+
+
+def test_streaming_iterator():
+    """Streaming iterator yields projected records in order."""
+    records = load_raw_records()
+    fields = ['Identifiers.TinyId', 'AddressDetails.City', 'Price.NumericSellingPrice']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_path = Path(tmp) / 'dataset.json.gz'
+        write_dataset(dataset_path, records, indent=2)
+
+        assert list(iter_dataset_records(dataset_path)) == records
+
+        projected = list(iter_dataset_records(dataset_path, fields=fields))
+        assert projected[0] == {
+            'Identifiers': {'TinyId': records[0]['Identifiers']['TinyId']},
+            'AddressDetails': {'City': records[0]['AddressDetails']['City']},
+            'Price': {'NumericSellingPrice': records[0]['Price']['NumericSellingPrice']},
+        }
+        assert len(projected) == len(records)
+
+        # Same projection through the block reader
+        index = convert_dataset(dataset_path, dataset_path, None, records_per_block=4)
+        assert list(index.iter_records(workers=2, fields=fields)) == projected
+
+    print(f"✅ Streaming iterator projects {len(fields)} fields")
+
+
+def test_dataset_store():
+    """SQLite store answers id and range queries and syncs incrementally."""
+    records = load_raw_records()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_path = Path(tmp) / 'dataset.json.gz'
+        index_path = Path(tmp) / 'dataset.index.json.gz'
+        write_dataset(dataset_path, records)
+
+        with DatasetStore(Path(tmp) / 'store.sqlite') as store:
+            stats = store.sync(dataset_path, index_path)
+            assert stats['added'] == len(records)
+
+            first = records[0]
+            assert store.get(first['Identifiers']['TinyId']) == first
+            assert store.get(str(first['Identifiers']['GlobalId'])) == first
+
+            max_price = 200000
+            expected = sorted(
+                r['Identifiers']['TinyId'] for r in records
+                if r['Price'].get('NumericSellingPrice', 0) <= max_price
+                and not r.get('IsSoldOrRented')
+            )
+            assert sorted(store.find_ids(max_price=max_price)) == expected
+
+            # Unchanged dataset: nothing is re-read
+            assert store.sync(dataset_path, index_path)['added'] == 0
+
+            # Changed and removed listings only
+            changed = json.loads(json.dumps(records[1:]))
+            changed[0]['Price']['NumericSellingPrice'] = 1
+            write_dataset(dataset_path, changed)
+            stats = store.sync(dataset_path, index_path)
+            assert stats == {'added': 0, 'updated': 1, 'deleted': 1, 'unchanged': len(records) - 2}
+            assert store.find_ids(max_price=1) == [changed[0]['Identifiers']['TinyId']]
+
+    print(f"✅ Dataset store synced and queried ({len(records)} listings)")
+
+
+def test_incremental_sync():
+    """Sync downloads only new items and keeps changes in the delta."""
+    records = load_raw_records()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_path = Path(tmp) / 'dataset.json.gz'
+        index_path = Path(tmp) / 'dataset.index.json.gz'
+        manifest_path = Path(tmp) / MANIFEST_PATH.name
+        paths = dict(
+            dataset_path=dataset_path, index_path=index_path,
+            manifest_path=manifest_path, compact_ratio=0.5
+        )
+
+        apify = FakeApify(json.loads(json.dumps(records[:10])))
+        stats = sync_dataset(apify, 'test', page_size=4, **paths)
+        assert stats['mode'] == 'full' and stats['added'] == 10
+        assert list(iter_dataset_records(dataset_path)) == records[:10]
+        base = dataset_path.read_bytes()
+
+        # Scraper pushes a changed listing, an unchanged one and a new one
+        changed = json.loads(json.dumps(records[3]))
+        changed['Price']['NumericSellingPrice'] = 1
+        apify.items += [changed, records[4], records[10]]
+        apify.fetched = 0
+
+        stats = sync_dataset(apify, 'test', page_size=4, **paths)
+        assert stats['mode'] == 'incremental' and apify.fetched == 3
+        assert (stats['added'], stats['changed'], stats['unchanged']) == (1, 1, 1)
+        assert dataset_path.read_bytes() == base
+
+        # Readers see the delta overlaid on the base dataset
+        expected = records[:3] + [changed] + records[4:11]
+        assert list(iter_dataset_records(dataset_path)) == expected
+        assert get_index(dataset_path, index_path).get(changed['Identifiers']['TinyId']) == changed
+        assert SyncManifest.load(manifest_path).item_offset == 13
+
+        # Nothing new: nothing fetched or written
+        apify.fetched = 0
+        assert sync_dataset(apify, 'test', **paths)['fetched'] == 0 and apify.fetched == 0
+
+        stats = sync_dataset(apify, 'test', compact=True, **paths)
+        assert stats['compacted'] and stats['delta_size'] == 0
+        assert list(iter_dataset_records(dataset_path, include_delta=False)) == expected
+
+    print("✅ Incremental sync fetched only new items")
+
+
+if __name__ == '__main__':
+    try:
+        test_index_lookup()
+        test_stale_index()
+        test_block_format()
+        test_streaming_iterator()
+        test_dataset_store()
+        test_incremental_sync()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the stale-analysis selector (src/reanalysis.py).
+
+Copies archived houses into a temporary directory and checks which ones the
+selector picks after changing the rules version, the prompt, the listing
+and the enrichment.
+
+Run: python test_reanalysis.py
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rules.v2_0_0 import RulesV2_0_0
+from src import reanalysis
+from src.dataset import write_dataset
+from src.reanalysis import analysis_inputs, select_stale_houses
+
+
+def copy_houses(tmp):
+    """Copy the houses analyzed with v2.0.0 and return their ids and listings."""
+    houses_dir = Path(tmp) / 'houses'
+    records = {}
+    for house_dir in sorted(Path('houses').iterdir()):
+        if not (house_dir / 'latest_analysis.json').exists():
+            continue
+        with open(house_dir / 'latest_analysis.json', 'r') as f:
+            latest = json.load(f)
+        if latest['rules_version'] != 'v2.0.0':
+            continue
+
+        shutil.copytree(house_dir, houses_dir / house_dir.name)
+        timestamp = Path(latest['analysis_file']).stem.partition('_')[2]
+        with open(house_dir / 'raw' / f'data_{timestamp}.json', 'r') as f:
+            records[house_dir.name] = json.load(f)
+    return houses_dir, records
+
+
+def test_select_stale_houses():
+    """Only houses with changed rules, prompt, listing or enrichment are selected."""
+    with tempfile.TemporaryDirectory() as tmp:
+        houses_dir, records = copy_houses(tmp)
+        dataset_path = Path(tmp) / 'dataset.json.gz'
+        index_path = Path(tmp) / 'dataset.index.json.gz'
+        paths = dict(houses_dir=houses_dir, dataset_path=dataset_path, index_path=index_path)
+
+        house_ids = list(records)
+        write_dataset(records.values(), dataset_path, index_path)
+
+        # Archived analyses predate the recorded prompt hash (and the v2.0.0
+        # listing projection): stale even though the version is the same
+        assert select_stale_houses('v2.0.0', **paths) == {house_id: 'prompt changed' for house_id in house_ids}
+        assert len(select_stale_houses('v1.1.0', **paths)) == len(house_ids)
+
+        # Inputs unchanged once re-analyzed with the current prompt
+        for house_id in house_ids:
+            latest_path = houses_dir / house_id / 'latest_analysis.json'
+            latest = json.loads(latest_path.read_text())
+            latest['inputs'] = analysis_inputs(records[house_id], rules_version='v2.0.0')
+            latest_path.write_text(json.dumps(latest))
+        assert select_stale_houses('v2.0.0', **paths) == {}
+
+        # Another prompt under the same version (e.g. an edited projection)
+        with mock.patch.object(RulesV2_0_0, 'house_data_style', 'json'):
+            reanalysis.prompt_hash.cache_clear()
+            try:
+                assert set(select_stale_houses('v2.0.0', **paths).values()) == {'prompt changed'}
+            finally:
+                reanalysis.prompt_hash.cache_clear()
+
+        # Listing changed in the dataset
+        changed = json.loads(json.dumps(records[house_ids[0]]))
+        changed['Price']['NumericSellingPrice'] += 1000
+        write_dataset([changed] + list(records.values())[1:], dataset_path, index_path)
+        assert select_stale_houses('v2.0.0', **paths) == {house_ids[0]: 'listing changed'}
+
+        # Enrichment re-fetched after the analysis
+        enrichment = {'enriched': True, 'enriched_at': '2099-01-01T00:00:00+00:00'}
+        enrichment_path = houses_dir / house_ids[1] / 'enrichment' / 'airroi_enrichment.json'
+        enrichment_path.parent.mkdir(exist_ok=True)
+        with open(enrichment_path, 'w') as f:
+            json.dump(enrichment, f)
+        stale = select_stale_houses('v2.0.0', **paths)
+        assert stale[house_ids[1]] == 'enrichment updated'
+
+        # Recorded inputs of a new analysis match again
+        latest_path = houses_dir / house_ids[1] / 'latest_analysis.json'
+        with open(latest_path, 'r') as f:
+            latest = json.load(f)
+        latest['inputs'] = analysis_inputs(records[house_ids[1]], enrichment, 'v2.0.0')
+        with open(latest_path, 'w') as f:
+            json.dump(latest, f)
+        assert house_ids[1] not in select_stale_houses('v2.0.0', **paths)
+
+        # Listings that left the dataset are skipped
+        write_dataset(list(records.values())[1:], dataset_path, index_path)
+        assert house_ids[0] not in select_stale_houses('v1.1.0', **paths)
+
+    print(f"✅ Stale analyses selected correctly ({len(house_ids)} houses)")
+
+
+if __name__ == '__main__':
+    try:
+        test_select_stale_houses()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
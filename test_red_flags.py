@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Tests for red flag detection (src/red_flags.py).
+
+Run: python test_red_flags.py
+"""
+
+import copy
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import src.prescreen as prescreen
+import src.red_flags as red_flags
+from rules import get_rules
+from src.dataset import dataset_fingerprint, get_index, index_path_for
+from src.prescreen import PrescreenIndex, get_prescreen
+from src.red_flag_cache import ScanCache
+from src.red_flags import (
+    DEALBREAKER_FLAGS, WARNING_FLAGS, RedFlag, RedFlagDetector, RedFlagMatcher, get_detector, load_pack, snippet
+)
+from test_dataset import load_raw_records, write_dataset
+
+
+def test_matcher_matches_regex():
+    """The single-pass matcher finds exactly the flags the per-flag regexes find."""
+    print("\n🚩 Testing red flag matcher...")
+
+    flags = DEALBREAKER_FLAGS + WARNING_FLAGS
+    matcher = RedFlagMatcher(flags)
+    detector = RedFlagDetector()
+
+    texts = [detector._extract_text(record) for record in load_raw_records()]
+    texts += [
+        # Word gaps of exactly 50 and of 51 characters
+        "verhuur" + "x" * 50 + "niet" + " " * 50 + "toegestaan",
+        "verhuur" + "x" * 51 + "niet toegestaan",
+        # Overlapping words, repeated words and a pattern split over lines
+        "parkkostenparkkosten € 2000, hoge parkkosten\nerfpachterfpacht",
+        "verhuur niet verhuur niet\n\nmogelijk",
+        # re.IGNORECASE treats these as 'i' and 's'
+        "erfpacht ı ſ paſkkoſten huurgrond mınımumleeftıjd 30 jaar",
+        "",
+    ]
+
+    matched = 0
+    for text in texts:
+        # Same flags, and the same span as the regex match
+        expected = [(i, *match.span()) for i, flag in enumerate(flags) if (match := flag.regex.search(text))]
+        assert matcher.scan(text) == expected, text[:80]
+        matched += len(expected)
+
+    # Custom flags are picked up by the detector's matcher
+    detector.add_dealbreaker("geen eigen opgang", "Test")
+    assert detector.scan({'ListingDescription': {'Description': 'Geen eigen\nopgang'}})['dealbreaker_count'] == 1
+
+    print(f"✅ Matcher agrees with the regexes on {len(texts)} texts ({matched} flags found)")
+
+
+def test_evidence_snippets():
+    """Found flags carry their offsets and a short snippet of the matched sentence."""
+    print("\n🔎 Testing red flag evidence snippets...")
+
+    detector = RedFlagDetector()
+    description = (
+        "Vrijstaand chalet op het park. " + "Ruime tuin met veel privacy en een grote schuur. " * 3
+        + "Let op: VERHUUR is op dit park NIET toegestaan! Parkkosten € 2.400 per jaar."
+    )
+    result = detector.scan({'ListingDescription': {'Description': description}})
+    text = detector._extract_text({'ListingDescription': {'Description': description}})
+
+    dealbreaker = result['dealbreakers'][0]
+    assert dealbreaker['pattern'] == 'verhuur niet toegestaan'
+    assert text[dealbreaker['start']:dealbreaker['end']] == 'verhuur is op dit park niet toegestaan'
+    # Clipped to the sentence, in the original case
+    assert dealbreaker['snippet'] == 'Let op: VERHUUR is op dit park NIET toegestaan!'
+
+    # The dot in "€ 2.400" doesn't end the sentence
+    warning = next(flag for flag in result['warnings'] if flag['pattern'] == 'parkkosten €')
+    assert warning['snippet'] == 'Parkkosten € 2.400 per jaar.'
+
+    # Without a sentence end in reach the snippet is cut at a word boundary
+    long_text = "woord " * 30 + "erfpacht" + " woord" * 30
+    start = long_text.index("erfpacht")
+    clipped = snippet(long_text, start, start + len("erfpacht"), context=20)
+    assert clipped.startswith('…') and clipped.endswith('…') and 'erfpacht' in clipped
+    assert len(clipped) <= 20 + len("erfpacht") + 20 + 2
+
+    print(f"✅ Evidence: \"{dealbreaker['snippet']}\"")
+
+
+def test_pattern_packs():
+    """Flags come from versioned packs whose matcher is cached as an artifact."""
+    print("\n📦 Testing red flag packs...")
+
+    pack = load_pack(get_rules('v2.0.0').red_flag_pack)
+    assert pack.dealbreakers == DEALBREAKER_FLAGS and pack.warnings == WARNING_FLAGS
+    assert get_detector() is get_detector() and get_detector().matcher is pack.matcher
+    assert RedFlagDetector().matcher is pack.matcher
+
+    try:
+        load_pack('v0.0.0')
+        assert False, "Unknown pack should raise"
+    except ValueError as e:
+        assert 'v2.0.0' in str(e)
+
+    packs_dir, cache_dir = red_flags.PACKS_DIR, red_flags.MATCHER_CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        red_flags.PACKS_DIR = Path(tmp) / 'packs'
+        red_flags.MATCHER_CACHE_DIR = Path(tmp) / 'cache'
+        try:
+            # A new pattern is only a data change
+            red_flags.PACKS_DIR.mkdir()
+            (red_flags.PACKS_DIR / 'test.json').write_text(json.dumps({
+                'version': 'test',
+                'dealbreakers': [{'group': 'Test', 'flags': [
+                    {'pattern': 'geen eigen opgang', 'reason': 'Test', 'weight': 100}
+                ]}],
+                'warnings': [],
+            }))
+            house = {'ListingDescription': {'Description': 'Geen eigen\nopgang'}}
+            assert RedFlagDetector('test').scan(house)['dealbreaker_count'] == 1
+            assert load_pack('test').artifact_path.exists()
+
+            # A fresh process loads the automaton from the artifact instead of building it
+            red_flags._load_pack.cache_clear()
+            matcher = load_pack('test').matcher
+            assert matcher._automaton is not red_flags._automaton(matcher._automaton.words)
+            assert RedFlagDetector('test').scan(house)['dealbreaker_count'] == 1
+        finally:
+            red_flags.PACKS_DIR, red_flags.MATCHER_CACHE_DIR = packs_dir, cache_dir
+            red_flags._load_pack.cache_clear()
+            red_flags._shared_detector.cache_clear()
+
+    print(f"✅ Pack {pack.version}: {len(pack.dealbreakers)} dealbreakers, {len(pack.warnings)} warnings")
+
+
+def test_scan_cache():
+    """Unchanged listing text is served from the scan cache, in memory and across runs."""
+    print("\n💾 Testing red flag scan cache...")
+
+    records = load_raw_records()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = Path(tmp) / 'scans.sqlite'
+        detector = RedFlagDetector(cache=ScanCache(cache_path))
+        expected = [RedFlagDetector().scan(record) for record in records]
+
+        assert [detector.scan(record) for record in records] == expected
+        assert [detector.scan(record) for record in records] == expected
+        assert detector.cache.stats == {'memory_hits': len(records), 'disk_hits': 0, 'misses': len(records)}
+
+        # Results are copies: callers can't corrupt the cache
+        detector.scan(records[0])['dealbreakers'].clear()
+        assert detector.scan(records[0]) == expected[0]
+
+        # A later run reads the database; other fields of the listing don't matter
+        rerun = RedFlagDetector(cache=ScanCache(cache_path))
+        repriced = copy.deepcopy(records[0])
+        repriced['Price'] = {'SellingPrice': '€ 1 k.k.'}
+        assert rerun.scan(repriced) == expected[0]
+        assert rerun.cache.stats['disk_hits'] == 1
+
+        # Changed text and changed flags are rescanned
+        changed = copy.deepcopy(records[0])
+        changed['ListingDescription']['Description'] += ' Verhuur niet toegestaan.'
+        assert rerun.scan(changed)['dealbreaker_count'] == expected[0]['dealbreaker_count'] + 1
+        version = rerun.scan_version
+        rerun.add_warning('eigen grond', 'Test')
+        assert rerun.scan_version != version
+        assert rerun.scan(records[0]) != expected[0] and rerun.cache.stats['misses'] == 2
+
+    print(f"✅ {len(records)} listings scanned once, then served from memory and disk")
+
+
+def test_prescreen_index():
+    """The prescreen index matches the detector and only rescans changed listings."""
+    print("\n🗂️  Testing red flag prescreen index...")
+
+    records = load_raw_records()
+    detector = RedFlagDetector()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_path = Path(tmp) / 'dataset.json.gz'
+        prescreen_path = Path(tmp) / 'prescreen.json.gz'
+        # Keep the scans out of the shared cache in .cache/red_flags
+        paths = dict(scan_cache_path=Path(tmp) / 'scans.sqlite')
+        write_dataset(dataset_path, records)
+
+        # Built on a process pool
+        index = PrescreenIndex()
+        stats = index.update(dataset_path, workers=2, pack='v2.0.0', **paths)
+        assert stats['added'] == len(records) == len(index)
+        assert index.pack == 'v2.0.0'
+        assert (Path(tmp) / 'scans.sqlite').exists()
+        for record in records:
+            result = index.get(record['Identifiers']['TinyId'])
+            scan = detector.scan(record)
+            assert result['recommendation'] == scan['recommendation']
+            assert result['total_weight'] == scan['total_weight']
+            assert [p['pattern'] for p in result['patterns']] == [
+                flag['pattern'] for flag in scan['dealbreakers'] + scan['warnings']
+            ]
+        assert {'43017473', '89991513'} <= set(index.rejected())
+        assert '43132761' not in index.rejected()
+
+        # GlobalIds (e.g. from --ids-file) resolve to their listing and are returned as given
+        assert index.rejected(['7662010', '43132761']) == ['7662010']
+        assert index.get('7662010') == index.get('43017473')
+        index.save(prescreen_path)
+
+        # One listing changed, one left the dataset: only the changed one is rescanned
+        changed = copy.deepcopy(records[1:])
+        changed[0]['ListingDescription']['Description'] += ' Verhuur niet toegestaan.'
+        write_dataset(dataset_path, changed)
+        index = PrescreenIndex.load(prescreen_path)
+        assert index.pack == 'v2.0.0'
+        stats = index.update(dataset_path, workers=1, **paths)
+        assert stats == {'added': 0, 'updated': 1, 'deleted': 1, 'unchanged': len(changed) - 1}
+        assert str(records[0]['Identifiers']['TinyId']) not in index.houses
+        assert '7662010' not in index.aliases
+        global_id = str(changed[0]['Identifiers']['GlobalId'])
+        assert index.recommendation(global_id) == 'AFWIJZEN'
+        assert index.recommendation(changed[0]['Identifiers']['TinyId']) == 'AFWIJZEN'
+        assert index.update(dataset_path, workers=1, **paths)['unchanged'] == len(changed)
+        assert index.update(dataset_path, workers=1, force=True, **paths)['updated'] == len(changed)
+
+        # Keyed on the detector's scan_version: a changed reason alone rescans too
+        detector = prescreen._detector('v2.0.0', paths['scan_cache_path'])
+        flag = detector.dealbreakers[0]
+        detector.dealbreakers[0] = RedFlag(flag.pattern, flag.category, 'Nieuwe reden', flag.weight)
+        try:
+            assert index.update(dataset_path, workers=1, **paths)['updated'] == len(changed)
+            assert index.scan_version == detector.scan_version
+            assert index.patterns[flag.id]['reason'] == 'Nieuwe reden'
+        finally:
+            prescreen._detector.cache_clear()
+        assert index.update(dataset_path, workers=1, **paths)['updated'] == len(changed)
+
+        # The fingerprint comes from the dataset's own sidecar index, not data/
+        get_index(dataset_path, index_path_for(dataset_path))
+        assert index.update(dataset_path, workers=1, **paths)['updated'] == 0
+        assert index.dataset_fingerprint == dataset_fingerprint(dataset_path, index_path_for(dataset_path))
+
+        # get_prescreen saves what it updated
+        assert get_prescreen(prescreen_path, dataset_path, workers=1, **paths).houses == index.houses
+        assert PrescreenIndex.load(prescreen_path).houses == index.houses
+        assert PrescreenIndex.load(prescreen_path).aliases == index.aliases
+
+        # Unknown packs are rejected before anything is scanned
+        try:
+            index.update(dataset_path, workers=1, pack='v0.0.0', **paths)
+            assert False, "unknown pack accepted"
+        except ValueError:
+            pass
+
+    print(f"✅ {len(records)} listings prescreened, {len(index.rejected())} rejected, changes rescanned incrementally")
+
+
+if __name__ == '__main__':
+    try:
+        test_matcher_matches_regex()
+        test_evidence_snippets()
+        test_pattern_packs()
+        test_scan_cache()
+        test_prescreen_index()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned rules and their prompts (rules/).
+
+Run: python test_rules.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rules import get_rules
+from rules.projection import estimate_tokens, flatten_kenmerken, format_house_data
+from src.agent import HouseAnalysisAgent
+from test_dataset import load_raw_records
+
+
+def test_house_data_projection():
+    """v2.0.0 embeds only the scoring fields, with kenmerken flattened."""
+    records = load_raw_records()
+    rules = get_rules('v2.0.0')
+    record = records[0]
+
+    text = rules.format_house_data(record)
+    for dropped in ('Media', 'Urls', 'sitemapData', 'KadastraleKaartBaseUrl', 'GlobalId', 'cloud.funda.nl'):
+        assert dropped not in text, dropped
+    assert record['ListingDescription']['Description'].splitlines()[0] in text
+    assert f"NumericSellingPrice: {record['Price']['NumericSellingPrice']}" in text
+
+    # Every kenmerk value survives flattening, grouped ones with their group label
+    sections = flatten_kenmerken(record['KenmerkSections'])
+    assert sections['Bouw']['Bouwjaar'] == '1974'
+    assert sections['Oppervlakten en inhoud']['Gebruiksoppervlakten / Wonen'] == '52 m²'
+    assert 'Gebruiksoppervlakten / Wonen: 52 m²' in text
+
+    prompt = rules.get_analysis_prompt(record)
+    assert text in prompt.dynamic
+
+    # Older rules versions keep the whole listing
+    assert get_rules('v1.1.0').house_fields is None
+    assert format_house_data(record) == get_rules('v1.1.0').format_house_data(record)
+
+    raw = projected = 0
+    for record in records:
+        stats = rules.house_data_stats(record)
+        assert stats['projected_tokens'] < stats['raw_tokens']
+        raw += stats['raw_tokens']
+        projected += stats['projected_tokens']
+    assert projected < raw / 2
+
+    print(f"✅ House data projected: ~{raw} → ~{projected} tokens for {len(records)} listings")
+
+
+ENRICHMENT = {
+    'enriched': True,
+    'comparables': [
+        {'bedrooms': 3, 'bathrooms': 1,
+         'metrics': {'ttm': {'revenue': 20000 + n, 'occupancy': 60, 'adr': 110, 'days_booked': 200}}}
+        for n in range(8)
+    ],
+    'revenue_estimate': {'estimate': {'revenue': 24000, 'occupancy': 0.62}},
+}
+MARKET_METRICS = {'province': 'Gelderland', 'metrics': {'occupancy': 0.58, 'adr': 121.5}}
+
+
+def test_prompt_budget():
+    """Sections are measured, trimmed in priority order and recorded in metadata."""
+    record = load_raw_records()[0]
+    rules = get_rules('v2.0.0')
+
+    full = rules.get_analysis_prompt(record, ENRICHMENT, MARKET_METRICS)
+    breakdown = full.breakdown()
+    assert list(breakdown['sections']) == [
+        'system', 'categories', 'output_format', 'red_flags', 'house_data',
+        'airroi', 'market_metrics', 'instructions'
+    ]
+    assert sum(s['chars'] for s in breakdown['sections'].values()) + 1 == breakdown['total_chars']
+    assert breakdown['total_tokens'] == estimate_tokens(full)
+    assert full.trimmed == []
+
+    # Just over budget: fewer comparables, market metrics kept
+    airroi = full.sections[5]
+    rules.prompt_token_budget = breakdown['total_tokens'] - 10
+    prompt = rules.get_analysis_prompt(record, ENRICHMENT, MARKET_METRICS)
+    assert prompt.trimmed == ['airroi: 2 comparables']
+    assert 'Listing 3:' not in prompt and 'Listing 2:' in prompt
+    assert 'MARKT METRICS' in prompt
+    assert prompt.static == full.static
+
+    # Far over budget: comparables gone, market metrics dropped, required sections kept
+    rules.prompt_token_budget = 1000
+    prompt = rules.get_analysis_prompt(record, ENRICHMENT, MARKET_METRICS)
+    assert prompt.trimmed == ['airroi: 2 comparables', 'airroi: 0 comparables', 'market_metrics: dropped']
+    assert 'Listing 1:' not in prompt and 'Revenue Schatting' in prompt
+    assert 'market_metrics' not in prompt.breakdown()['sections']
+    assert prompt.breakdown()['sections']['airroi']['chars'] < len(airroi.text)
+
+    # Stored with the analysis
+    agent = HouseAnalysisAgent(rules_version='v2.0.0', llm_provider='mock', prompt_budget=1000)
+    analysis = agent.analyze_house(record, '43017473', enrichment_data=ENRICHMENT, market_metrics=MARKET_METRICS)
+    assert analysis['metadata']['prompt']['budget_tokens'] == 1000
+    assert analysis['metadata']['prompt']['trimmed'] == prompt.trimmed
+
+    print(f"✅ Prompt of ~{breakdown['total_tokens']} tokens trimmed to budget: {', '.join(prompt.trimmed)}")
+
+
+if __name__ == '__main__':
+    try:
+        test_house_data_projection()
+        test_prompt_budget()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch command of the CLI (run_analysis.py).
+
+Runs `batch` with the mock LLM in a temporary working directory holding a
+small dataset, so the analyses, reports and scores index it writes don't
+touch the repository.
+
+Run: python test_run_analysis.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from typer.testing import CliRunner
+
+import run_analysis
+from src import red_flag_cache, red_flags
+from src.dataset import DATASET_PATH, INDEX_PATH, write_dataset
+from test_dataset import load_raw_records
+
+
+def tiny_id(record):
+    return str(record['Identifiers']['TinyId'])
+
+
+def run_batch(*args, fail=()):
+    """
+    Run the batch command, failing the analysis of the given houses.
+
+    Returns:
+        (CLI result, house ids passed to update_analysis_scores_batch per call)
+    """
+    analyze_house = run_analysis.HouseAnalysisAgent.analyze_house
+    update_scores = run_analysis.update_analysis_scores_batch
+    score_updates = []
+
+    def failing_analyze_house(agent, house_data, house_id, *a, **kw):
+        if house_id in fail:
+            raise RuntimeError('LLM unavailable')
+        return analyze_house(agent, house_data, house_id, *a, **kw)
+
+    def recording_update(analyses):
+        score_updates.append(sorted(analyses))
+        update_scores(analyses)
+
+    with mock.patch.object(run_analysis.HouseAnalysisAgent, 'analyze_house', failing_analyze_house), \
+            mock.patch.object(run_analysis, 'update_analysis_scores_batch', recording_update):
+        result = CliRunner().invoke(run_analysis.app, [
+            'batch', '--rules', 'v2.0.0', '--llm', 'mock', '--no-commit', '--skip-enrichment', *args
+        ])
+    return result, score_updates
+
+
+def test_batch():
+    """Selected houses are analyzed; failures are collected and left out of the scores index."""
+    print("\n📦 Testing batch command...")
+
+    records = load_raw_records()[:4]
+    ids = [tiny_id(record) for record in records]
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        # The red flag scan cache uses a relative path: reopen it in tmp
+        red_flags._shared_detector.cache_clear()
+        red_flag_cache.get_scan_cache.cache_clear()
+        try:
+            write_dataset(records, DATASET_PATH, INDEX_PATH)
+
+            # Unknown ids are skipped, a failing house is collected and fails the run
+            result, score_updates = run_batch(ids[0], ids[1], '1', fail={ids[1]})
+            assert result.exit_code == 1, result.output
+            assert '1: not found in dataset, skipped' in result.output
+            assert f'❌ {ids[1]}: LLM unavailable' in result.output
+            assert 'Analyzed 1 houses' in result.output and '(1 failed)' in result.output
+            assert score_updates == [[ids[0]]]
+            assert (Path('houses') / ids[0] / 'latest_analysis.json').exists()
+            assert not (Path('houses') / ids[1]).exists()
+
+            with open('data/analysis_scores.json', 'r') as f:
+                assert list(json.load(f)['houses']) == [ids[0]]
+
+            # Ids from a file
+            Path('ids.txt').write_text(f"{ids[2]}\n\n{ids[3]}\n")
+            result, score_updates = run_batch('--ids-file', 'ids.txt', '--no-reports')
+            assert result.exit_code == 0, result.output
+            assert score_updates == [sorted(ids[2:])]
+
+            # --stale picks only analyses made with other inputs or rules
+            assert 'No houses selected' in run_batch('--stale')[0].output
+            latest_path = Path('houses') / ids[2] / 'latest_analysis.json'
+            latest = json.loads(latest_path.read_text())
+            latest['rules_version'] = 'v1.1.0'
+            latest_path.write_text(json.dumps(latest))
+
+            # Selectors matching nothing don't widen --stale to every analyzed house
+            Path('none.txt').write_text('\n')
+            for selector in (['--ids-file', 'none.txt'], ['--city', 'Nergenshuizen']):
+                result, score_updates = run_batch('--stale', *selector)
+                assert 'No houses selected' in result.output, result.output
+                assert score_updates == []
+
+            result, score_updates = run_batch('--stale')
+            assert result.exit_code == 0, result.output
+            assert score_updates == [[ids[2]]]
+
+            # Nothing analyzed: the scores index is not written
+            result, score_updates = run_batch(ids[3], fail={ids[3]})
+            assert result.exit_code == 1
+            assert score_updates == []
+        finally:
+            os.chdir(cwd)
+            red_flags._shared_detector.cache_clear()
+            red_flag_cache.get_scan_cache.cache_clear()
+
+    print("✅ Failures collected, unknown ids skipped, --ids-file and --stale selection work")
+
+
+if __name__ == '__main__':
+    try:
+        test_batch()
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)